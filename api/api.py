@@ -1,11 +1,5 @@
-from fastapi import APIRouter
 from api.config import ENDPOINTS
+from api.registry import ProviderRegistry
 
-api_router = APIRouter()
-
-for endpoint in ENDPOINTS:
-    api_router.include_router(
-        endpoint.get('router').router,
-        prefix=f'/{endpoint.get("prefix")}',
-        tags=[endpoint.get('tag')]
-    )
+registry = ProviderRegistry(ENDPOINTS, prefix='/api/v1')
+api_router = registry.router
@@ -1,43 +1,54 @@
 # api/v1/config.py
 from typing import List, Dict, Any
 
-from api.v1.endpoints.ifood import router as ifood_router
-from api.v1.endpoints.uber_eats.restaurant import router as uber_eats_restaurant_router
-from api.v1.endpoints.osuper import router as osuper_router
-from api.v1.endpoints.tendaatacado import router as tendaatacado_router
-from api.v1.endpoints.vipcommerce import router as vipcommerce_router
-from api.v1.endpoints.vtex import router as vtex_router
 
 EndpointConfig = Dict[str, Any]
 ENDPOINTS: List[EndpointConfig] = [
     {
         'prefix': 'ifood',
         'tag': 'Ifood',
-        'router': ifood_router
+        'module': 'api.v1.endpoints.ifood.router'
     },
     {
         'prefix': 'uber-eats-restaurant',
         'tag': 'Uber Eats - Restaurant',
-        'router': uber_eats_restaurant_router
+        'module': 'api.v1.endpoints.uber_eats.restaurant.router'
     },
     {
         'prefix': 'tendaatacado',
         'tag': 'Tenda Atacado',
-        'router': tendaatacado_router
+        'module': 'api.v1.endpoints.tendaatacado.router'
     },
     {
         'prefix': 'vipcommerce',
         'tag': 'VipCommerce',
-        'router': vipcommerce_router
+        'module': 'api.v1.endpoints.vipcommerce.router'
     },
     {
         'prefix': 'osuper',
         'tag': 'OSuper',
-        'router': osuper_router
+        'module': 'api.v1.endpoints.osuper.router'
     },
     {
         'prefix': 'vtex',
         'tag': 'Vtex',
-        'router': vtex_router
+        'module': 'api.v1.endpoints.vtex.router'
+    },
+    {
+        'prefix': 'batch',
+        'tag': 'Batch',
+        'module': 'api.v1.endpoints.batch.router'
+    },
+    {
+        'prefix': 'jobs',
+        'tag': 'Jobs',
+        'module': 'api.v1.endpoints.jobs.router',
+        # Its startup handler starts the job workers and the scheduler
+        'eager': True
+    },
+    {
+        'prefix': 'snapshots',
+        'tag': 'Snapshots',
+        'module': 'api.v1.endpoints.snapshots.router'
     },
 ]
@@ -0,0 +1,182 @@
+""" Registry
+
+Provider routers mounted from the metadata in api.config. A provider's router
+module, and with it its models, parsers and HTTP client, is imported on the
+first request under its prefix. Endpoints marked eager, or all of them with
+PROVIDERS_EAGER (pre-started instances), are imported when mounted.
+"""
+import importlib
+import inspect
+import os
+import threading
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import APIRouter, FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.dependencies.utils import get_parameterless_sub_dependant, solve_dependencies
+from fastapi.exceptions import RequestValidationError
+from fastapi.params import Depends
+from loguru import logger
+from starlette.requests import Request
+from starlette.routing import BaseRoute, Match, NoMatchFound
+from starlette.types import Receive, Scope, Send
+
+from api.config import EndpointConfig
+
+PROVIDERS_EAGER = os.getenv('PROVIDERS_EAGER', 'false').lower() in ('1', 'true', 'yes')
+
+
+class LazyRoute(BaseRoute):
+    """
+    Class LazyRoute
+
+    Placeholder matching a path (and, with prefix, every path under it) until
+    its providers are loaded. The first request loads them, which removes the
+    placeholder, and is then dispatched again to the real routes. The
+    dependencies (the app's authorizer) run first, so a rejected request
+    does not load anything.
+    """
+
+    def __init__(
+        self, registry: 'ProviderRegistry', path: str, names: List[str], prefix: bool = True,
+        dependencies: Sequence[Depends] = ()
+    ):
+        self.registry = registry
+        self.path = path
+        self.names = names
+        self.prefix = prefix
+        self.dependant = Dependant(path=path)
+        for depends in dependencies:
+            self.dependant.dependencies.append(
+                get_parameterless_sub_dependant(depends=depends, path=path)
+            )
+
+    def matches(self, scope: Scope) -> Tuple[Match, Scope]:
+        path = scope.get('path', '')
+        under = self.prefix and path.startswith(f'{self.path}/')
+        if scope['type'] == 'http' and (path == self.path or under):
+            return Match.FULL, {'route': self}
+        return Match.NONE, {}
+
+    def url_path_for(self, name: str, /, **path_params: Any):
+        raise NoMatchFound(name, path_params)
+
+    async def authorize(self, scope: Scope) -> None:
+        """Run the dependencies; their HTTPException (401) reaches the app's handlers."""
+        if not self.dependant.dependencies:
+            return
+        async with AsyncExitStack() as stack:
+            _, errors, *_ = await solve_dependencies(
+                request=Request(scope), dependant=self.dependant, async_exit_stack=stack
+            )
+        if errors:
+            raise RequestValidationError(errors)
+
+    async def handle(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.authorize(scope)
+        for name in self.names:
+            await self.registry.load_running(name)
+        if self in self.registry.app.router.routes:
+            self.registry.app.router.routes.remove(self)
+        del scope['route']
+        await self.registry.app.router(scope, receive, send)
+
+
+class ProviderRegistry:
+    """
+    Class ProviderRegistry
+    :param endpoints: api.config.ENDPOINTS
+    :param prefix: path prefix of every endpoint, e.g. /api/v1
+    """
+
+    def __init__(self, endpoints: List[EndpointConfig], prefix: str = ''):
+        self.endpoints = {endpoint['prefix']: endpoint for endpoint in endpoints}
+        self.prefix = prefix
+        self.app: Optional[FastAPI] = None
+        # Provider routes without the prefix and the app's dependencies, for
+        # in-process dispatch (batch)
+        self.router = APIRouter()
+        self.started = False
+        # provider prefix -> seconds its import and mount took
+        self.loaded: Dict[str, float] = {}
+        self._placeholders: Dict[str, LazyRoute] = {}
+        # Startup handlers of providers loaded after the application started
+        self._pending: List[Callable] = []
+        self._lock = threading.Lock()
+
+    def mount(self, app: FastAPI, eager: bool = PROVIDERS_EAGER) -> None:
+        """
+        Function Mount
+        :param app: application the provider routes are added to
+        :param eager: import every provider now instead of on first use
+        """
+        self.app = app
+        for name, endpoint in self.endpoints.items():
+            if eager or endpoint.get('eager'):
+                self.load(name)
+            else:
+                self._placeholders[name] = LazyRoute(
+                    self, f'{self.prefix}/{name}', [name], dependencies=app.router.dependencies
+                )
+                app.router.routes.append(self._placeholders[name])
+        app.add_event_handler('startup', self._startup)
+
+        # The schema lists every provider: /openapi.json (public) loads them first
+        if app.openapi_url and self._placeholders:
+            app.router.routes.insert(
+                0, LazyRoute(self, app.openapi_url, list(self.endpoints), prefix=False)
+            )
+        openapi = app.openapi
+
+        def openapi_all() -> Dict[str, Any]:
+            self.load_all()
+            return openapi()
+
+        app.openapi = openapi_all
+
+    def _startup(self) -> None:
+        self.started = True
+
+    def load(self, name: str) -> None:
+        """
+        Function Load
+        Import a provider's router and add its routes (and event handlers).
+        :param name: endpoint prefix
+        """
+        with self._lock:
+            if name in self.loaded:
+                return
+            endpoint = self.endpoints[name]
+            start = time.perf_counter()
+            router = importlib.import_module(endpoint['module']).router
+            self.router.include_router(router, prefix=f'/{name}', tags=[endpoint['tag']])
+            routes = self.app.router.routes
+            count = len(routes)
+            self.app.include_router(router, prefix=f'{self.prefix}/{name}', tags=[endpoint['tag']])
+            placeholder = self._placeholders.pop(name, None)
+            if placeholder is not None:
+                # In the placeholder's place, keeping the ENDPOINTS order (openapi tags)
+                added = routes[count:]
+                del routes[count:]
+                index = routes.index(placeholder)
+                routes[index:index + 1] = added
+            self.app.openapi_schema = None
+            self.loaded[name] = time.perf_counter() - start
+            logger.info(f"Loaded provider {name} in {self.loaded[name] * 1000:.0f} ms")
+            if self.started:
+                # Too late for the application's startup event
+                self._pending.extend(router.on_startup)
+
+    async def load_running(self, name: str) -> None:
+        """Load a provider while the application runs and run the startup handlers it missed."""
+        self.load(name)
+        while self._pending:
+            result = self._pending.pop(0)()
+            if inspect.isawaitable(result):
+                await result
+
+    def load_all(self) -> None:
+        for name in self.endpoints:
+            self.load(name)
@@ -0,0 +1,88 @@
+""" Router """
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from loguru import logger
+
+from core.util.concurrency import host_semaphore
+from core.util.dispatch import dispatch
+from models.batch.batch import (BatchHeader, BatchJobModel, BatchRequestModel,
+                                BatchResultModel)
+
+router = APIRouter()
+
+# Maximum jobs of the same provider running at once, across all batches
+PROVIDER_CONCURRENCY = int(os.getenv('BATCH_PROVIDER_CONCURRENCY', '4'))
+
+
+def providers() -> set:
+    """Provider prefixes a batch job may target."""
+    from api.config import ENDPOINTS  # pylint: disable=import-outside-toplevel
+    return {endpoint.get('prefix') for endpoint in ENDPOINTS} - {'batch', 'jobs', 'snapshots'}
+
+
+async def run_job(request: Request, index: int, job: BatchJobModel) -> BatchResultModel:
+    """Run one job through the provider's own route handler."""
+    from api.api import registry  # pylint: disable=import-outside-toplevel
+
+    path = f"/{job.provider}/{job.endpoint.strip('/')}"
+    async with host_semaphore(f"batch:{job.provider}", PROVIDER_CONCURRENCY):
+        logger.info(f"Batch job {index}: {path}")
+        try:
+            await registry.load_running(job.provider)
+            status_code, data = await dispatch(registry.router, path, job.params, request.scope)
+        except Exception as e:
+            logger.exception(f"Batch job {index} failed: {path}")
+            status_code, data = status.HTTP_500_INTERNAL_SERVER_ERROR, {'detail': str(e)}
+
+    return BatchResultModel(
+        index=index,
+        provider=job.provider,
+        endpoint=job.endpoint,
+        status_code=status_code,
+        data=data
+    )
+
+
+@router.post(
+    "",
+    summary="Batch Scrape",
+    status_code=status.HTTP_200_OK,
+    response_model=BatchHeader
+)
+async def batch(request: Request, body: BatchRequestModel):
+    """
+    Run many provider jobs in one call. Each job names a provider prefix
+    (e.g. vtex), an endpoint path under it (e.g. market/department) and the
+    query parameters of that endpoint.
+    """
+    unknown = {job.provider for job in body.jobs} - providers()
+    if unknown:
+        raise HTTPException(
+            detail=f"Unknown provider(s): {', '.join(sorted(unknown))}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    tasks = [
+        asyncio.create_task(run_job(request, index, job))
+        for index, job in enumerate(body.jobs)
+    ]
+
+    if body.mode == "completed":
+        async def lines():
+            try:
+                for task in asyncio.as_completed(tasks):
+                    result = await task
+                    yield json.dumps(jsonable_encoder(result)) + "\n"
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    result = BatchHeader(data=await asyncio.gather(*tasks))
+    return JSONResponse(content=jsonable_encoder(result))
@@ -1,11 +1,16 @@
 """ Router """
-import httpx
-from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from loguru import logger
 
-from models.ifood.assortment import AssortmentHeader
+from core.util.fields import parse_fields
+from core.http.client import create_client
+from core.util.ndjson import accepts_ndjson, ndjson_response
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
+from models.ifood.assortment import AssortmentHeader, AssortmentModel
 from models.ifood.department import DepartmentHeader
 from models.ifood.postal_code import PostalCodeHeader
 from models.ifood.segment import SegmentHeader
@@ -19,7 +24,7 @@ from src.delivery.ifood.domain.web.store import Store
 from src.delivery.ifood.domain.web.store_info import StoreInfo
 
 router = APIRouter()
-client = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+client = create_client(provider='ifood')
 
 
 @router.get(
@@ -329,6 +334,7 @@ async def department(
     response_model=AssortmentHeader
 )
 async def assortment(
+    request: Request,
     segment_type: str = Query(
         ..., example='MERCADOS',
         description="""(Inform the segment.)"""
@@ -372,8 +378,18 @@ async def assortment(
         ..., example=2,
         ge=2,
         description="""(Inform the request waiting.)"""
+    ),
+    format: str = Query(
+        JSON, example=COLUMNAR,
+        pattern=FORMAT_PATTERN,
+        description="""(Inform the response format: json, columnar, arrow or parquet.)"""
+    ),
+    fields: Optional[str] = Query(
+        None, example="ean,sku,price_from,price_to,availability",
+        description="""(Inform the fields to return, comma separated. All when empty.)"""
     )
 ):
+    projection = parse_fields(fields, AssortmentModel)
     a = Assortment()
     response = await a.request(
         client,
@@ -392,12 +408,31 @@ async def assortment(
         )
 
     if not data:
+        if accepts_ndjson(request):
+            return ndjson_response([], lambda: {'records_per_page': 0, 'items': 0, 'pages': 0})
         result = {
             'records_per_page': 0,
             'items': 0,
             'pages': 0,
             'data': []
         }
+    elif accepts_ndjson(request):
+        return ndjson_response(
+            a.iter_rows(
+                client=client,
+                segment_type=segment_type,
+                region=region,
+                store_slug=store_slug,
+                store_id=store_id,
+                department_id=department_id,
+                search_term=search_term,
+                latitude=latitude,
+                longitude=longitude,
+                data=data,
+                projection=projection
+            ),
+            lambda: a.pagination(data)
+        )
     else:
         try:
             result = await a.get_data(
@@ -410,14 +445,15 @@ async def assortment(
                 search_term=search_term,
                 latitude=latitude,
                 longitude=longitude,
-                data=data
+                data=data,
+                projection=projection
             )
         except Exception as e:
             raise HTTPException(
                 detail=str(e),
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
             ) from e
-    return JSONResponse(content=jsonable_encoder(result))
+    return render(result, format)
 
 
 @router.on_event("startup")
@@ -0,0 +1,192 @@
+""" Router """
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from loguru import logger
+
+from core.jobs.crawlers import CRAWLERS
+from core.jobs.scheduler import scheduler
+from core.jobs.store import CANCELLED, FAILED
+from core.jobs.worker import pool
+from models.jobs.job import JobHeader, JobModel, JobRequestModel, JobResultHeader
+from models.jobs.schedule import ScheduleHeader
+
+router = APIRouter()
+
+
+async def get_job(job_id: str) -> dict:
+    """Job by id or 404. The store (sqlite) is read from a thread, off the event loop."""
+    job = await asyncio.to_thread(pool.store.get, job_id)
+    if job is None:
+        raise HTTPException(
+            detail=f"Job {job_id} not found",
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    return job
+
+
+@router.post(
+    "",
+    summary="Submit Crawl Job",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobModel
+)
+async def submit(body: JobRequestModel):
+    """
+    Queue a crawl and return immediately. Poll the job for progress and read
+    its results while it runs.
+    """
+    if body.kind not in CRAWLERS:
+        raise HTTPException(
+            detail=f"Unknown kind {body.kind}. Available: {', '.join(sorted(CRAWLERS))}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    try:
+        job = await pool.submit(body.kind, body.params)
+    except TypeError as e:
+        raise HTTPException(
+            detail=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        ) from e
+    return JSONResponse(
+        content=jsonable_encoder(JobModel(**job)),
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@router.get(
+    "",
+    summary="Job List",
+    status_code=status.HTTP_200_OK,
+    response_model=JobHeader
+)
+async def jobs(
+    job_status: Optional[str] = Query(
+        None, alias="status", example="running",
+        description="""(Inform the status: queued, running, done, failed or cancelled.)"""
+    ),
+    limit: int = Query(
+        100, example=100,
+        ge=1,
+        le=1000,
+        description="""(Inform the maximum number of jobs.)"""
+    )
+):
+    result = JobHeader(data=await asyncio.to_thread(pool.store.list, job_status, limit))
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.get(
+    "/schedules",
+    summary="Schedule List",
+    status_code=status.HTTP_200_OK,
+    response_model=ScheduleHeader
+)
+async def schedules():
+    """Recurring crawls loaded from the schedules file and their next run."""
+    result = ScheduleHeader(data=scheduler.entries)
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.get(
+    "/{job_id}",
+    summary="Job Status",
+    status_code=status.HTTP_200_OK,
+    response_model=JobModel
+)
+async def job(job_id: str):
+    result = JobModel(**await get_job(job_id))
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.get(
+    "/{job_id}/results",
+    summary="Job Results",
+    status_code=status.HTTP_200_OK,
+    response_model=JobResultHeader
+)
+async def results(
+    job_id: str,
+    offset: int = Query(
+        0, example=0,
+        ge=0,
+        description="""(Inform the first row.)"""
+    ),
+    limit: int = Query(
+        1000, example=1000,
+        ge=1,
+        le=10000,
+        description="""(Inform the maximum number of rows.)"""
+    )
+):
+    current = await get_job(job_id)
+    rows = await asyncio.to_thread(pool.store.results, job_id, offset, limit)
+    result = JobResultHeader(
+        job_id=job_id,
+        status=current['status'],
+        offset=offset,
+        items=current['rows'],
+        data=rows
+    )
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.delete(
+    "/{job_id}",
+    summary="Cancel Job",
+    status_code=status.HTTP_200_OK,
+    response_model=JobModel
+)
+async def cancel(job_id: str):
+    await get_job(job_id)
+    result = JobModel(**await pool.cancel(job_id))
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.post(
+    "/{job_id}/retry",
+    summary="Retry Job",
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=JobModel
+)
+async def retry(job_id: str):
+    """
+    Queue a failed or cancelled job again. It resumes from its last
+    checkpoint, so pages already written are not fetched again.
+    """
+    current = await get_job(job_id)
+    if current['status'] not in (FAILED, CANCELLED):
+        raise HTTPException(
+            detail=f"Job {job_id} is {current['status']}",
+            status_code=status.HTTP_409_CONFLICT
+        )
+    result = JobModel(**await pool.retry(job_id))
+    return JSONResponse(
+        content=jsonable_encoder(result),
+        status_code=status.HTTP_202_ACCEPTED
+    )
+
+
+@router.on_event("startup")
+async def app_startup():
+    """
+    Application startup event.
+    Starts the job workers and the scheduler.
+    """
+    logger.info("Starting job workers.")
+    await pool.start()
+    await scheduler.start()
+
+
+@router.on_event("shutdown")
+async def app_shutdown():
+    """
+    Application shutdown event.
+    Stops the scheduler and the job workers.
+    """
+    logger.info("Stopping job workers.")
+    await scheduler.stop()
+    await pool.stop()
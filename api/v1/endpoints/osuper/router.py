@@ -1,18 +1,22 @@
 """Router module for O'Super market API endpoints."""
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from loguru import logger
 from cachetools import TTLCache
 from functools import lru_cache
 
+from core.http.client import create_client
+from core.metrics.instruments import MeteredTTLCache
+from core.util.ndjson import accepts_ndjson, ndjson_response
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
 from models.osuper.assortment import AssortmentHeader
 from models.osuper.category import CategoryHeader
 from models.osuper.department import DepartmentHeader
 from models.osuper.store import StoreHeader
-from src.market.osuper.domain.web.assortment import Assortment
+from src.market.osuper.domain.web.assortment import RECORDS_PER_PAGE, Assortment
 from src.market.osuper.domain.web.category import Category
 from src.market.osuper.domain.web.department import Department
 from src.market.osuper.domain.web.store import Store
@@ -20,7 +24,7 @@ from src.market.osuper.domain.web.store import Store
 router = APIRouter()
 
 # Create a TTLCache with a maximum of 1000 items and a 5-minute TTL
-cache = TTLCache(maxsize=1000, ttl=300)
+cache = MeteredTTLCache('osuper', maxsize=1000, ttl=300)
 
 
 @lru_cache()
@@ -29,10 +33,14 @@ def get_cache():
     return cache
 
 
+# Shared HTTP client: a streamed (NDJSON) response keeps using it after the
+# endpoint returns, when a per-request client would already be closed
+client = None
+
+
 async def get_client():
-    """Dependency to create and manage the HTTP client."""
-    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0)) as client:
-        yield client
+    """Dependency to get the HTTP client."""
+    return client
 
 
 def validate_request_waiting(request_waiting: int = Query(..., ge=3)):
@@ -142,43 +150,51 @@ async def get_category(
     response_model=AssortmentHeader
 )
 async def get_assortment(
+    request: Request,
     domain: str = Query(..., example="viladasfrutas.com.br", description="Inform the domain."),
     account_id: int = Query(..., ge=1, example=100, description="Inform the account id."),
     store_id: int = Query(..., ge=1, example=253, description="Inform the store id."),
     category_id: int = Query(..., ge=1, example=571970, description="Inform the category id."),
     search_term: str = Query(..., example="Bebidas > Refrigerantes", description="Inform the search term."),
+    records_per_page: int = Query(
+        RECORDS_PER_PAGE, ge=1, le=100, example=RECORDS_PER_PAGE,
+        description="Inform the page size used to walk the search cursor."
+    ),
     request_waiting: int = Depends(validate_request_waiting),
     client: httpx.AsyncClient = Depends(get_client),
-    cache: TTLCache = Depends(get_cache)
+    cache: TTLCache = Depends(get_cache),
+    format: str = Query(
+        JSON, example=COLUMNAR, pattern=FORMAT_PATTERN,
+        description="Inform the response format: json, columnar, arrow or parquet."
+    )
 ):
     """Endpoint to get assortment list."""
     cache_key = f"assortment:{domain}:{account_id}:{store_id}:{category_id}:{search_term}"
     if cache_key in cache:
-        return JSONResponse(content=jsonable_encoder(cache[cache_key]))
+        if accepts_ndjson(request):
+            return ndjson_response(
+                cache[cache_key].data, lambda: {'records_per_page': records_per_page}
+            )
+        return render(cache[cache_key], format)
+
+    stream = Assortment.stream(
+        client=client,
+        domain=domain,
+        account_id=account_id,
+        store_id=store_id,
+        category_id=category_id,
+        search_term=search_term,
+        request_waiting=request_waiting,
+        records_per_page=records_per_page
+    )
+    if accepts_ndjson(request):
+        return ndjson_response(stream, lambda: {'records_per_page': records_per_page})
 
-    assortment = Assortment()
     try:
-        response = await assortment.request(
-            client=client,
-            domain=domain,
-            page='',
-            account_id=account_id,
-            store_id=store_id,
-            search_term=search_term,
-            products=[],
-            request_waiting=request_waiting
-        )
-        if not response:
-            result = {'data': []}
-        else:
-            result = await assortment.get_data(
-                store_id=store_id,
-                category_id=category_id,
-                search_term=search_term,
-                data=response
-            )
+        rows = [row async for row in stream]
+        result = AssortmentHeader(data=rows)
         cache[cache_key] = result
-        return JSONResponse(content=jsonable_encoder(result))
+        return render(result, format)
     except Exception as e:
         logger.error(f"Error in get_assortment: {str(e)}")
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)) from e
@@ -187,6 +203,8 @@ async def get_assortment(
 @router.on_event("startup")
 async def app_startup():
     """Application startup event."""
+    global client
+    client = create_client(provider='osuper')
     logger.info("Starting application with TTLCache.")
 
 
@@ -195,3 +213,4 @@ async def app_shutdown():
     """Application shutdown event."""
     logger.info("Shutting down application and clearing cache.")
     cache.clear()
+    await client.aclose()
@@ -0,0 +1,170 @@
+""" Router """
+import asyncio
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from core.snapshots.normalize import NORMALIZERS
+from core.snapshots.store import snapshots
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
+from models.snapshots.snapshot import DeltaHeader, SnapshotHeader, SnapshotRowHeader
+
+router = APIRouter()
+
+
+def check_provider(provider: Optional[str]) -> None:
+    """422 for providers without snapshots."""
+    if provider is not None and provider not in NORMALIZERS:
+        raise HTTPException(
+            detail=f"Unknown provider {provider}. Available: {', '.join(sorted(NORMALIZERS))}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+
+@router.get(
+    "",
+    summary="Snapshot List",
+    status_code=status.HTTP_200_OK,
+    response_model=SnapshotHeader
+)
+async def snapshot_list(
+    provider: Optional[str] = Query(
+        None, example="vtex",
+        description="""(Inform the provider.)"""
+    ),
+    date_from: Optional[str] = Query(
+        None, example="2024-05-01",
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="""(Inform the first date.)"""
+    ),
+    date_to: Optional[str] = Query(
+        None, example="2024-05-31",
+        pattern=r"^\d{4}-\d{2}-\d{2}$",
+        description="""(Inform the last date.)"""
+    )
+):
+    check_provider(provider)
+    data = await asyncio.to_thread(snapshots.list, provider, date_from, date_to)
+    result = SnapshotHeader(data=data)
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.get(
+    "/delta",
+    summary="Price Change Delta",
+    status_code=status.HTTP_200_OK,
+    response_model=DeltaHeader
+)
+async def delta(
+    provider: str = Query(
+        ..., example="vtex",
+        description="""(Inform the provider.)"""
+    ),
+    store: str = Query(
+        ..., example="mambodelivery",
+        description="""(Inform the store.)"""
+    ),
+    category: Optional[str] = Query(
+        None, example="731/732",
+        description="""(Inform the category.)"""
+    ),
+    since: Optional[float] = Query(
+        None, example=1714561200,
+        description="""(Inform the epoch seconds of the last sync.)"""
+    ),
+    snapshot_id: Optional[str] = Query(
+        None, example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60",
+        description="""(Inform the last snapshot already consumed.)"""
+    ),
+    offset: int = Query(
+        0, example=0,
+        ge=0,
+        description="""(Inform the first row.)"""
+    ),
+    limit: int = Query(
+        1000, example=1000,
+        ge=1,
+        le=10000,
+        description="""(Inform the maximum number of rows.)"""
+    )
+):
+    """
+    Rows whose price, discount or availability changed (or that first
+    appeared) after the given time or snapshot.
+    """
+    check_provider(provider)
+    if (since is None) == (snapshot_id is None):
+        raise HTTPException(
+            detail="Inform exactly one of since or snapshot_id",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    index = await asyncio.to_thread(lambda: snapshots.index)
+    after_seq = None
+    if snapshot_id is not None:
+        after_seq = index.seq(snapshot_id)
+        if after_seq is None:
+            raise HTTPException(
+                detail=f"Snapshot {snapshot_id} not found",
+                status_code=status.HTTP_404_NOT_FOUND
+            )
+
+    changes = await asyncio.to_thread(
+        index.delta, provider, store, category, since, after_seq, offset, limit
+    )
+    result = {
+        'provider': provider,
+        'store': store,
+        'offset': offset,
+        **changes
+    }
+    return JSONResponse(content=jsonable_encoder(result))
+
+
+@router.get(
+    "/{provider}/{snapshot_id}",
+    summary="Snapshot Rows",
+    status_code=status.HTTP_200_OK,
+    response_model=SnapshotRowHeader
+)
+async def snapshot_rows(
+    provider: str,
+    snapshot_id: str,
+    store: Optional[str] = Query(
+        None, example="mambodelivery",
+        description="""(Inform the store.)"""
+    ),
+    offset: int = Query(
+        0, example=0,
+        ge=0,
+        description="""(Inform the first row.)"""
+    ),
+    limit: int = Query(
+        1000, example=1000,
+        ge=1,
+        le=10000,
+        description="""(Inform the maximum number of rows.)"""
+    ),
+    format: str = Query(
+        JSON, example=COLUMNAR,
+        pattern=FORMAT_PATTERN,
+        description="""(Inform the response format: json, columnar, arrow or parquet.)"""
+    )
+):
+    check_provider(provider)
+    if snapshots.get(provider, snapshot_id) is None:
+        raise HTTPException(
+            detail=f"Snapshot {provider}/{snapshot_id} not found",
+            status_code=status.HTTP_404_NOT_FOUND
+        )
+    rows = await asyncio.to_thread(snapshots.read, provider, snapshot_id, store)
+    result = {
+        'snapshot_id': snapshot_id,
+        'provider': provider,
+        'items': len(rows),
+        'offset': offset,
+        'data': rows[offset:offset + limit]
+    }
+    return render(result, format)
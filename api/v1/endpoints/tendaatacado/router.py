@@ -1,18 +1,23 @@
-import httpx
-from fastapi import APIRouter, HTTPException, Query, status
+from math import ceil
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from loguru import logger
 
+from core.http.client import create_client
+from core.util.ndjson import accepts_ndjson, json_rows_response, ndjson_response
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
 from models.tendaatacado.assortment import AssortmentHeader
 from models.tendaatacado.category import CategoryHeader
 from models.tendaatacado.department import DepartmentHeader
 from src.wholesale.tendaatacado.domain.web.assortment import Assortment
 from src.wholesale.tendaatacado.domain.web.category import Category
+from src.wholesale.tendaatacado.domain.web.crawl import CRAWL_CONCURRENCY, Crawl
 from src.wholesale.tendaatacado.domain.web.department import Department
 
 router = APIRouter()
-client = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+client = create_client(provider='tendaatacado')
 
 
 async def fetch_data(model_instance, *args):
@@ -75,6 +80,7 @@ async def category(
     response_model=AssortmentHeader
 )
 async def assortment(
+    request: Request,
     category_id: int = Query(
         ..., example=126,
         ge=1,
@@ -92,6 +98,10 @@ async def assortment(
         ..., example=5,
         ge=3,
         description="(Inform the request waiting.)"
+    ),
+    format: str = Query(
+        JSON, example=COLUMNAR, pattern=FORMAT_PATTERN,
+        description="(Inform the response format: json, columnar, arrow or parquet.)"
     )
 ):
     """Fetch and return the assortment based on category and search term."""
@@ -101,17 +111,23 @@ async def assortment(
     try:
         data = await assortment_instance.request(client, category_id, search_term, page, request_waiting)
 
+        if accepts_ndjson(request):
+            return ndjson_response(
+                assortment_instance.iter_rows(category_id, search_term, data),
+                lambda: assortment_instance.pagination(data)
+            )
+
         if not data.get("products"):
-            return JSONResponse(content=jsonable_encoder({
+            return render({
                 'records_per_page': 0,
                 'items': 0,
                 'pages': 0,
                 'data': []
-            }))
+            }, format)
 
         result = await assortment_instance.process_data(category_id, search_term, data)
 
-        return JSONResponse(content=jsonable_encoder(result))
+        return render(result, format)
 
     except Exception as e:
         logger.error(f"Error processing assortment data: {str(e)}")
@@ -121,6 +137,64 @@ async def assortment(
         )
 
 
+@router.get(
+    "/wholesale/crawl",
+    summary="Full Assortment Crawl",
+    status_code=status.HTTP_200_OK,
+    response_model=AssortmentHeader
+)
+async def crawl(
+    request: Request,
+    concurrency: int = Query(
+        CRAWL_CONCURRENCY, example=CRAWL_CONCURRENCY,
+        ge=1,
+        le=10,
+        description="(Inform the maximum concurrent requests.)"
+    ),
+    request_waiting: int = Query(
+        ..., example=5,
+        ge=3,
+        description="(Inform the request waiting.)"
+    ),
+    format: str = Query(
+        JSON, example=COLUMNAR, pattern=FORMAT_PATTERN,
+        description="(Inform the response format: json, columnar, arrow or parquet.)"
+    )
+):
+    """Crawl every category and page and return the deduplicated assortment."""
+    items = 0
+
+    async def counted():
+        nonlocal items
+        async for row in Crawl.stream(client, request_waiting, concurrency):
+            items += 1
+            yield row
+
+    def pagination():
+        return {
+            'records_per_page': Assortment.records_per_page,
+            'items': items,
+            'pages': ceil(items / Assortment.records_per_page)
+        }
+
+    if accepts_ndjson(request):
+        return ndjson_response(counted(), pagination)
+
+    try:
+        if format == JSON:
+            return await json_rows_response(counted(), pagination)
+        # The columnar layouts need every row before the first byte
+        rows = [row async for row in counted()]
+    except Exception as e:
+        logger.error(f"Error crawling assortment data: {str(e)}")
+        raise HTTPException(
+            detail=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    return render(AssortmentHeader(**pagination(), data=rows), format)
+
+
 @router.on_event("startup")
 async def app_startup():
     """Application startup event. Initializes the HTTP client."""
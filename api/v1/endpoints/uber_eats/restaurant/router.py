@@ -1,11 +1,12 @@
 """ Router """
 import httpx
-from fastapi import APIRouter, HTTPException, Query, status
-from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from loguru import logger
-from cachetools import TTLCache
 
+from core.http.client import create_client
+from core.metrics.instruments import MeteredTTLCache
+from core.util.ndjson import accepts_ndjson, json_rows_response, ndjson_response
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
 from models.uber_eats.restaurant.assortment import AssortmentHeader
 from models.uber_eats.restaurant.store_info import StoreInfoHeader
 from src.delivery.uber_eats.restaurant.domain.web.assortment import Assortment
@@ -15,13 +16,13 @@ router = APIRouter()
 
 # Global HTTP client and cache configuration
 client = None
-cache = TTLCache(maxsize=100, ttl=300)  # Cache with a time-to-live of 5 minutes
+cache = MeteredTTLCache('uber_eats', maxsize=100, ttl=300)  # Cache with a time-to-live of 5 minutes
 
 
 @router.on_event("startup")
 async def app_startup():
     global client
-    client = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+    client = create_client(provider='uber_eats')
     logger.info("Starting application and initializing HTTP client.")
 
 
@@ -31,20 +32,21 @@ async def app_shutdown():
     logger.info("Shutting down application and closing HTTP client.")
 
 
-async def fetch_data(service, store_id: str, request_waiting: int):
+async def fetch_data(service, store_id: str, request_waiting: int, format: str = JSON):
     """
     Helper function to fetch data from a specific service.
 
     :param service: Service to be used (StoreInfo or Assortment)
     :param store_id: Store ID to fetch the data
     :param request_waiting: Time to wait before processing the request
+    :param format: Response format (json, columnar, arrow or parquet)
     :return: Processed data as JSON response
     """
 
     # Check if the result is in the cache
     if store_id in cache:
         logger.info(f"Cache hit for store: {store_id}")
-        return JSONResponse(content=jsonable_encoder(cache[store_id]), status_code=status.HTTP_200_OK)
+        return render(cache[store_id], format)
 
     logger.info(f"Fetching data for store: {store_id}")
 
@@ -58,14 +60,14 @@ async def fetch_data(service, store_id: str, request_waiting: int):
         data = response.get('data', [])
         if not data:
             logger.warning(f"No data found for store: {store_id}")
-            return JSONResponse(content={"data": []}, status_code=status.HTTP_200_OK)
+            return render({"data": []}, format)
 
         result = await service.get_data(store_id, data)
 
         # Store the result in cache
         cache[store_id] = result
 
-        return JSONResponse(content=jsonable_encoder(result), status_code=status.HTTP_200_OK)
+        return render(result, format)
 
     except httpx.HTTPStatusError as http_exc:
         logger.error(f"HTTP error occurred: {http_exc.response.status_code} - {http_exc.response.text}")
@@ -79,6 +81,60 @@ async def fetch_data(service, store_id: str, request_waiting: int):
         ) from e
 
 
+async def stream_assortment(
+    store_id: str,
+    request_waiting: int,
+    ndjson: bool = False,
+    format: str = JSON
+):
+    """
+    Helper function to build the assortment through the streaming parser.
+
+    :param store_id: Store ID to fetch the data
+    :param request_waiting: Time to wait before processing the request
+    :param ndjson: Send each row as it is decoded, one JSON object per line
+    :param format: Response format (json, columnar, arrow or parquet)
+    :return: Processed data as JSON response
+    """
+    cache_key = f"assortment:stream:{store_id}"
+    if cache_key in cache:
+        logger.info(f"Cache hit for store: {store_id}")
+        if ndjson:
+            rows = cache[cache_key].data
+            return ndjson_response(rows, lambda: {'items': len(rows)})
+        return render(cache[cache_key], format)
+
+    logger.info(f"Streaming data for store: {store_id}")
+    rows = []
+
+    async def collected():
+        async for row in Assortment.stream(
+            client=client,
+            store_id=store_id,
+            request_waiting=request_waiting
+        ):
+            rows.append(row)
+            yield row
+        # Only a stream that reached the end of the catalog is cached
+        cache[cache_key] = AssortmentHeader(data=rows)
+
+    if ndjson:
+        return ndjson_response(collected(), lambda: {'items': len(rows)})
+
+    try:
+        if format == JSON:
+            return await json_rows_response(collected())
+        # The columnar layouts need every row before the first byte
+        return render(AssortmentHeader(data=[row async for row in collected()]), format)
+
+    except Exception as e:
+        logger.exception(f"Unexpected error while streaming data for store: {store_id}")
+        raise HTTPException(
+            detail=f"Internal server error: {str(e)}",
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR
+        ) from e
+
+
 @router.get(
     "/delivery/store-info",
     summary="Store Info",
@@ -109,6 +165,7 @@ async def get_store_info(
     response_model=AssortmentHeader,
 )
 async def get_assortment(
+        request: Request,
         store_id: str = Query(
             ...,
             example="a6961a93-7682-40a0-8e05-ce4bb8bfbfe4", description="(Provide the store ID.)"
@@ -116,10 +173,21 @@ async def get_assortment(
         request_waiting: int = Query(
             ...,
             example=5, ge=3, description="(Time to wait between requests in seconds.)"
+        ),
+        stream: bool = Query(
+            False,
+            example=True, description="(Decode the upstream payload incrementally.)"
+        ),
+        format: str = Query(
+            JSON,
+            example=COLUMNAR, pattern=FORMAT_PATTERN,
+            description="(Provide the response format: json, columnar, arrow or parquet.)"
         )
 ):
     """
     Endpoint to retrieve product assortment for a given store.
     """
+    if stream or accepts_ndjson(request):
+        return await stream_assortment(store_id, request_waiting, accepts_ndjson(request), format)
     assortment_service = Assortment()
-    return await fetch_data(assortment_service, store_id, request_waiting)
+    return await fetch_data(assortment_service, store_id, request_waiting, format)
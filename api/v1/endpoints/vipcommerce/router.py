@@ -3,27 +3,33 @@
 from typing import Any, Dict
 
 import httpx
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from loguru import logger
 
+from core.http.client import create_client
+from core.util.ndjson import accepts_ndjson, json_rows_response, ndjson_response
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
 from models.vipcommerce.assortment import AssortmentHeader
 from models.vipcommerce.category import CategoryHeader
 from models.vipcommerce.department import DepartmentHeader
 from models.vipcommerce.distribution_center import DistributionCenterHeader
-from src.market.vipcommerce.domain.web.assortment import Assortment
+from src.market.vipcommerce.domain.web.assortment import CRAWL_CONCURRENCY, Assortment
 from src.market.vipcommerce.domain.web.category import Category
 from src.market.vipcommerce.domain.web.department import Department
 from src.market.vipcommerce.domain.web.distribution_center import DistributionCenter
 
 router = APIRouter()
 
+# Shared HTTP client: a streamed response keeps using it after the endpoint
+# returns, when a per-request client would already be closed
+client = None
+
 
 async def get_client() -> httpx.AsyncClient:
     """Dependency to get the HTTP client."""
-    async with httpx.AsyncClient(timeout=httpx.Timeout(10.0)) as client:
-        yield client
+    return client
 
 
 async def process_request(
@@ -132,25 +138,37 @@ async def category(
     response_model=AssortmentHeader
 )
 async def assortment(
+    request: Request,
     domain: str = Query(..., example="supermercadosmais.com.br", description="Inform the domain."),
     branch_id: int = Query(..., example=1, ge=1, description="Inform the branch."),
     distribution_center_id: int = Query(..., example=1, ge=1, description="Inform the distribution center."),
     category_id: int = Query(..., example=61, ge=1, description="Inform the category id."),
     page: str = Query(..., example='1', description="Inform the page."),
     request_waiting: int = Query(..., example=5, ge=3, description="Inform the request waiting."),
-    client: httpx.AsyncClient = Depends(get_client)
+    client: httpx.AsyncClient = Depends(get_client),
+    format: str = Query(
+        JSON, example=COLUMNAR, pattern=FORMAT_PATTERN,
+        description="Inform the response format: json, columnar, arrow or parquet."
+    )
 ):
     """Endpoint to get assortment information."""
     a = Assortment()
     data = await a.request(client, domain, branch_id, distribution_center_id, category_id, page, request_waiting)
 
     if not data.get('data'):
+        if accepts_ndjson(request):
+            return ndjson_response([], lambda: {'records_per_page': 0, 'items': 0, 'pages': 0})
         result = {
             'records_per_page': 0,
             'items': 0,
             'pages': 0,
             'data': []
         }
+    elif accepts_ndjson(request):
+        return ndjson_response(
+            a.iter_rows(domain, branch_id, distribution_center_id, category_id, data),
+            lambda: a.pagination(data)
+        )
     else:
         try:
             result = await a.get_data(domain, branch_id, distribution_center_id, category_id, data)
@@ -160,16 +178,78 @@ async def assortment(
                 detail=str(e),
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
             ) from e
-    return JSONResponse(content=jsonable_encoder(result))
+    return render(result, format)
+
+
+@router.get(
+    "/market/assortment/crawl",
+    summary="Assortment Crawl (all pages)",
+    status_code=status.HTTP_200_OK,
+    response_model=AssortmentHeader
+)
+async def assortment_crawl(
+    request: Request,
+    domain: str = Query(..., example="supermercadosmais.com.br", description="Inform the domain."),
+    branch_id: int = Query(..., example=1, ge=1, description="Inform the branch."),
+    distribution_center_id: int = Query(
+        ..., example=1, ge=1,
+        description="Inform the distribution center."
+    ),
+    category_id: int = Query(..., example=61, ge=1, description="Inform the category id."),
+    concurrency: int = Query(
+        CRAWL_CONCURRENCY, example=CRAWL_CONCURRENCY, ge=1, le=10,
+        description="Inform the maximum concurrent requests against the domain."
+    ),
+    request_waiting: int = Query(..., example=5, ge=3, description="Inform the request waiting."),
+    client: httpx.AsyncClient = Depends(get_client),
+    format: str = Query(
+        JSON, example=COLUMNAR, pattern=FORMAT_PATTERN,
+        description="Inform the response format: json, columnar, arrow or parquet."
+    )
+):
+    """Endpoint to get every page of a category's assortment."""
+    pagination = {'records_per_page': 0, 'items': 0, 'pages': 0}
+    pages = Assortment.crawl(
+        client, domain, branch_id, distribution_center_id, category_id,
+        request_waiting, concurrency
+    )
+
+    async def page_rows():
+        async for page in pages:
+            pagination['records_per_page'] = pagination['records_per_page'] or page.records_per_page
+            pagination['items'], pagination['pages'] = page.items, page.pages
+            for row in page.data:
+                yield row
+
+    if accepts_ndjson(request):
+        return ndjson_response(page_rows(), lambda: pagination)
+
+    try:
+        if format == JSON:
+            return await json_rows_response(page_rows(), lambda: pagination)
+        # The columnar layouts need every row before the first byte
+        rows = [row async for row in page_rows()]
+    except Exception as e:
+        logger.error(f"Error crawling assortment data: {str(e)}")
+        raise HTTPException(
+            detail=str(e),
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        ) from e
+
+    result = AssortmentHeader(**pagination, data=rows)
+    return render(result, format)
 
 
 @router.on_event("startup")
 async def app_startup():
-    """Application startup event."""
-    logger.info("Starting application.")
+    """Application startup event. Initializes the HTTP client."""
+    global client
+    client = create_client(provider='vipcommerce')
+    logger.info("Starting application and initializing HTTP client.")
 
 
 @router.on_event("shutdown")
 async def app_shutdown():
-    """Application shutdown event."""
-    logger.info("Shutting down application.")
+    """Application shutdown event. Cleans up the HTTP client."""
+    await client.aclose()
+    logger.info("Shutting down application and closing HTTP client.")
@@ -1,11 +1,16 @@
 """ Router """
-import httpx
-from fastapi import APIRouter, HTTPException, Query, status
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query, Request, status
 from fastapi.encoders import jsonable_encoder
 from fastapi.responses import JSONResponse
 from loguru import logger
 
-from models.vtex.assortment import AssortmentHeader
+from core.util.fields import parse_fields
+from core.http.client import create_client
+from core.util.ndjson import accepts_ndjson, ndjson_response
+from core.util.tabular import COLUMNAR, FORMAT_PATTERN, JSON, render
+from models.vtex.assortment import AssortmentHeader, AssortmentModel
 from models.vtex.brand import BrandHeader
 from models.vtex.category import CategoryHeader
 from models.vtex.department import DepartmentHeader
@@ -21,7 +26,7 @@ from src.market.vtex.domain.web.search_term import SearchTerm
 from src.market.vtex.domain.web.subcategory import SubCategory
 
 router = APIRouter()
-client = httpx.AsyncClient(timeout=httpx.Timeout(10.0))
+client = create_client(provider='vtex')
 
 
 @router.get(
@@ -231,6 +236,7 @@ async def brand(
     response_model=AssortmentHeader
 )
 async def assortment(
+    request: Request,
     domain: str = Query(
         ..., example="mambo.com.br",
         description="""(Inform the domain.)"""
@@ -265,8 +271,18 @@ async def assortment(
         ..., example=5,
         ge=3,
         description="""(Inform the request waiting.)"""
+    ),
+    format: str = Query(
+        JSON, example=COLUMNAR,
+        pattern=FORMAT_PATTERN,
+        description="""(Inform the response format: json, columnar, arrow or parquet.)"""
+    ),
+    fields: Optional[str] = Query(
+        None, example="ean,sku,price_from,price_to,available",
+        description="""(Inform the fields to return, comma separated. All when empty.)"""
     )
 ):
+    projection = parse_fields(fields, AssortmentModel)
     a = Assortment()
     data = await a.request(
         client,
@@ -279,6 +295,8 @@ async def assortment(
     )
 
     if not data:
+        if accepts_ndjson(request):
+            return ndjson_response([], lambda: {'records_per_page': 0, 'items': 0, 'pages': 0})
         result = {
             'records_per_page': 0,
             'items': 0,
@@ -290,6 +308,16 @@ async def assortment(
             detail='Too Many Requests.',
             status_code=status.HTTP_429_TOO_MANY_REQUESTS
         )
+    elif data[0].get('status_code'):
+        raise HTTPException(
+            detail=f"Upstream responded with status {data[0]['status_code']}.",
+            status_code=status.HTTP_502_BAD_GATEWAY
+        )
+    elif accepts_ndjson(request):
+        return ndjson_response(
+            a.iter_rows(domain, subdomain, department_id, category_id, data, projection),
+            lambda: a.pagination(_from, _to)
+        )
     else:
         try:
             result = await a.get_data(
@@ -299,14 +327,15 @@ async def assortment(
                 category_id,
                 _from,
                 _to,
-                data
+                data,
+                projection
             )
         except Exception as e:
             raise HTTPException(
                 detail=str(e),
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
             ) from e
-    return JSONResponse(content=jsonable_encoder(result))
+    return render(result, format)
 
 
 @router.get(
@@ -368,6 +397,11 @@ async def search_term(
             detail='Too Many Requests.',
             status_code=status.HTTP_429_TOO_MANY_REQUESTS
         )
+    elif data[0].get('status_code'):
+        raise HTTPException(
+            detail=f"Upstream responded with status {data[0]['status_code']}.",
+            status_code=status.HTTP_502_BAD_GATEWAY
+        )
     else:
         try:
             result = await s.get_data(
@@ -1,10 +1,13 @@
 """ Authorizer """
 import os
+import time
 import typing
 
 from dotenv import find_dotenv, load_dotenv
 from fastapi import Header, HTTPException
 
+from core.metrics import timing
+
 
 def api_keys_in_env(
     key_pattern: typing.Optional[str] = None,
@@ -29,6 +32,10 @@ class AuthorizerDependency:
         self.key_pattern = key_pattern
 
     def __call__(self, x_api_key: typing.Optional[str] = Header(...)):
-        if x_api_key not in api_keys_in_env(self.key_pattern):
-            raise HTTPException(status_code=401, detail="Unauthorized")
-        return x_api_key
+        start = time.perf_counter()
+        try:
+            if x_api_key not in api_keys_in_env(self.key_pattern):
+                raise HTTPException(status_code=401, detail="Unauthorized")
+            return x_api_key
+        finally:
+            timing.record(timing.AUTH, time.perf_counter() - start)
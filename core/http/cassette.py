@@ -0,0 +1,180 @@
+""" Cassette """
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import random
+from typing import Any, Dict, Iterable, Optional
+from urllib.parse import urlencode
+
+import httpx
+from loguru import logger as log
+
+# Response headers never written to a cassette
+SKIP_HEADERS = {'set-cookie', 'date', 'transfer-encoding', 'connection', 'keep-alive'}
+
+
+class CassetteMissing(httpx.TransportError):
+    """ Replay mode got a request that was never recorded. """
+
+
+def normalize(
+    method: str, url: httpx.URL, body: bytes, ignore_params: Iterable[str] = ()
+) -> Dict[str, str]:
+    """
+    Function Normalize
+    The parts of a request that identify its recording: method, URL without
+    query, sorted query params (minus ignore_params) and the body, with JSON
+    bodies re-serialized with sorted keys.
+    :param method:
+    :param url:
+    :param body:
+    :param ignore_params: params that change on every call (timestamps, nonces)
+    :return: dict
+    """
+    ignore = set(ignore_params)
+    params = sorted((key, value) for key, value in url.params.multi_items() if key not in ignore)
+    try:
+        text = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')) if body else ''
+    except (ValueError, UnicodeDecodeError):
+        text = base64.b64encode(body).decode()
+    return {
+        'method': method.upper(),
+        'url': str(url.copy_with(query=None, fragment=None)),
+        'params': urlencode(params),
+        'body': text,
+    }
+
+
+def cassette_key(request: Dict[str, str]) -> str:
+    return hashlib.sha1(json.dumps(request, sort_keys=True).encode()).hexdigest()
+
+
+class Cassettes:
+    """
+    Class Cassettes
+
+    One JSON file per recorded request under <directory>/<host>/<key>.json.
+    Bodies are stored as sent on the wire (still content-encoded), so
+    replayed responses decode exactly like live ones.
+    """
+
+    def __init__(self, directory: str, ignore_params: Iterable[str] = ()):
+        self.directory = directory
+        self.ignore_params = tuple(ignore_params)
+
+    async def identify(self, request: httpx.Request) -> Dict[str, str]:
+        body = await request.aread()
+        return normalize(request.method, request.url, body, self.ignore_params)
+
+    def path(self, host: str, key: str) -> str:
+        return os.path.join(self.directory, host, f'{key}.json')
+
+    def load(self, host: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self.path(host, key), encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def save(
+        self, host: str, key: str, request: Dict[str, str], response: httpx.Response, body: bytes
+    ) -> None:
+        path = self.path(host, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        record = {
+            'request': request,
+            'response': {
+                'status_code': response.status_code,
+                'headers': [
+                    [name, value] for name, value in response.headers.multi_items()
+                    if name.lower() not in SKIP_HEADERS
+                ],
+                'body': base64.b64encode(body).decode(),
+            },
+        }
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(record, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, path)
+
+
+class RecordTransport(httpx.AsyncBaseTransport):
+    """
+    Class RecordTransport
+
+    Sends every request upstream and writes the request/response pair to
+    its cassette, overwriting an older recording of the same request.
+    """
+
+    def __init__(self, cassettes: Cassettes, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.cassettes = cassettes
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        identity = await self.cassettes.identify(request)
+        response = await self.transport.handle_async_request(request)
+        try:
+            body = b''.join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        self.cassettes.save(request.url.host, cassette_key(identity), identity, response, body)
+        return httpx.Response(
+            status_code=response.status_code,
+            headers=response.headers,
+            content=body,
+            extensions=response.extensions,
+        )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """
+    Class ReplayTransport
+
+    Serves recorded responses without touching the network, after
+    latency + uniform(0, jitter) seconds. With error_rate > 0 that share of
+    requests fails: with error_status when set, else as a connection error.
+    Unrecorded requests raise CassetteMissing.
+    """
+
+    def __init__(
+        self,
+        cassettes: Cassettes,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 503
+    ):
+        self.cassettes = cassettes
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        identity = await self.cassettes.identify(request)
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and random.random() < self.error_rate:
+            if not self.error_status:
+                raise httpx.ConnectError('Injected connection error', request=request)
+            return httpx.Response(self.error_status, request=request)
+
+        record = self.cassettes.load(request.url.host, cassette_key(identity))
+        if record is None:
+            missing = f"No cassette for {identity['method']} {identity['url']}"
+            log.warning(f"{missing}?{identity['params']}")
+            raise CassetteMissing(missing, request=request)
+        response = record['response']
+        return httpx.Response(
+            status_code=response['status_code'],
+            headers=response['headers'],
+            content=base64.b64decode(response['body']),
+            request=request,
+        )
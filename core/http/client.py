@@ -0,0 +1,80 @@
+""" Client """
+import os
+
+import httpx
+
+from core.http.cassette import Cassettes, RecordTransport, ReplayTransport
+from core.http.metrics import MetricsTransport
+from core.http.override import UpstreamOverrideTransport
+from core.metrics.instruments import watch_pool
+from core.util.persistent_cache import CACHE_DIR
+
+LIVE = 'live'
+RECORD = 'record'
+REPLAY = 'replay'
+
+HTTP_MODE = os.getenv('HTTP_MODE', LIVE).lower()
+HTTP_CASSETTE_DIR = os.getenv('HTTP_CASSETTE_DIR', os.path.join(CACHE_DIR, 'cassettes'))
+HTTP_CASSETTE_IGNORE_PARAMS = [
+    name.strip() for name in os.getenv('HTTP_CASSETTE_IGNORE_PARAMS', '').split(',') if name.strip()
+]
+HTTP_REPLAY_LATENCY = float(os.getenv('HTTP_REPLAY_LATENCY', '0'))
+HTTP_REPLAY_JITTER = float(os.getenv('HTTP_REPLAY_JITTER', '0'))
+HTTP_REPLAY_ERROR_RATE = float(os.getenv('HTTP_REPLAY_ERROR_RATE', '0'))
+HTTP_REPLAY_ERROR_STATUS = int(os.getenv('HTTP_REPLAY_ERROR_STATUS', '503'))
+# Base URL every upstream request is sent to instead (load tests, local stand-ins)
+HTTP_UPSTREAM_OVERRIDE = os.getenv('HTTP_UPSTREAM_OVERRIDE', '')
+
+
+def create_transport(
+    mode: str = HTTP_MODE,
+    verify: bool = True,
+    provider: str = ''
+) -> httpx.AsyncBaseTransport:
+    """
+    Function Create Transport
+    :param mode: live, record or replay
+    :param verify: verify upstream TLS certificates (live and record)
+    :param provider: metrics label; its connection pool is reported too
+    :return: transport
+    """
+    if mode == REPLAY:
+        return ReplayTransport(
+            Cassettes(HTTP_CASSETTE_DIR, HTTP_CASSETTE_IGNORE_PARAMS),
+            latency=HTTP_REPLAY_LATENCY,
+            jitter=HTTP_REPLAY_JITTER,
+            error_rate=HTTP_REPLAY_ERROR_RATE,
+            error_status=HTTP_REPLAY_ERROR_STATUS
+        )
+    if mode not in (LIVE, RECORD):
+        raise ValueError(f"Unknown HTTP_MODE {mode}. Use {LIVE}, {RECORD} or {REPLAY}")
+
+    network = httpx.AsyncHTTPTransport(verify=verify)
+    watch_pool(provider, network)
+    upstream = network
+    if HTTP_UPSTREAM_OVERRIDE:
+        upstream = UpstreamOverrideTransport(HTTP_UPSTREAM_OVERRIDE, network)
+    if mode == RECORD:
+        return RecordTransport(Cassettes(HTTP_CASSETTE_DIR, HTTP_CASSETTE_IGNORE_PARAMS), upstream)
+    return upstream
+
+
+def create_client(
+    timeout: float = 10.0, verify: bool = True, provider: str = '', **kwargs
+) -> httpx.AsyncClient:
+    """
+    Function Create Client
+    Shared factory for the upstream httpx clients; HTTP_MODE selects live
+    requests, recording to cassettes or replaying them offline.
+    :param timeout: seconds
+    :param verify: verify upstream TLS certificates
+    :param provider: provider name used to label the upstream metrics
+    :param kwargs: other httpx.AsyncClient arguments
+    :return: httpx.AsyncClient
+    """
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout),
+        verify=verify,
+        transport=MetricsTransport(create_transport(verify=verify, provider=provider), provider),
+        **kwargs
+    )
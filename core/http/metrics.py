@@ -0,0 +1,47 @@
+""" Metrics """
+import time
+
+import httpx
+import sentry_sdk
+
+from core.metrics import timing
+from core.metrics.instruments import UPSTREAM_IN_FLIGHT, UPSTREAM_SECONDS, current_provider
+
+
+class MetricsTransport(httpx.AsyncBaseTransport):
+    """
+    Class MetricsTransport
+
+    Records the latency (until the response headers) and the in-flight count
+    of every upstream request, labelled with the client's provider, or the
+    provider of the current job for the shared worker client.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, provider: str):
+        self.transport = transport
+        self.provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        provider = current_provider.get() or self.provider
+        # The Sentry httpx span of this request
+        span = sentry_sdk.get_current_span()
+        if span is not None:
+            span.set_data('provider', provider)
+        status = 'error'
+        UPSTREAM_IN_FLIGHT.inc(provider=provider)
+        start = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            UPSTREAM_IN_FLIGHT.dec(provider=provider)
+            timing.record(timing.UPSTREAM, elapsed)
+            UPSTREAM_SECONDS.observe(
+                elapsed,
+                provider=provider, host=request.url.host, method=request.method, status=status
+            )
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
@@ -0,0 +1,34 @@
+""" Override """
+import httpx
+
+
+class UpstreamOverrideTransport(httpx.AsyncBaseTransport):
+    """
+    Class UpstreamOverrideTransport
+
+    Sends every request to a single base URL (a local stand-in upstream)
+    instead of the provider host. Path, query and body are kept, and so is
+    the original Host header, which the stand-in routes on.
+    """
+
+    def __init__(self, base_url: str, transport: httpx.AsyncBaseTransport = None):
+        self.base_url = httpx.URL(base_url)
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        url = request.url.copy_with(
+            scheme=self.base_url.scheme,
+            host=self.base_url.host,
+            port=self.base_url.port
+        )
+        overridden = httpx.Request(
+            request.method,
+            url,
+            headers=request.headers,
+            stream=request.stream,
+            extensions=request.extensions
+        )
+        return await self.transport.handle_async_request(overridden)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
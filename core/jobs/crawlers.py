@@ -0,0 +1,317 @@
+""" Crawlers """
+import asyncio
+import inspect
+import os
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, NamedTuple, Optional
+
+from httpx import AsyncClient
+from loguru import logger as log
+from pydantic import BaseModel
+
+from core.metrics.instruments import MeteredTTLCache
+from core.util.strings import clean_html
+
+# Provider modules are imported by their crawler on first run, so loading the
+# jobs router (at startup) does not load every provider
+
+
+class Page(NamedTuple):
+    """
+    One unit of crawl progress: the rows of an upstream page and the
+    checkpoint to resume right after them (None when the crawler cannot
+    resume and has to start over).
+    """
+    rows: List[BaseModel]
+    checkpoint: Optional[Dict[str, Any]] = None
+
+
+# A crawler is called as crawler(client, checkpoint, **params), where
+# checkpoint is the last saved Page.checkpoint (None on a fresh run).
+Crawler = Callable[..., AsyncIterator[Page]]
+
+CRAWLERS: Dict[str, Crawler] = {}
+
+# Rows per page for crawlers whose upstream has no page boundaries
+BATCH_SIZE = 100
+# VTEX catalog search refuses _to beyond this offset
+VTEX_MAX_OFFSET = 2500
+VTEX_WINDOW = 50
+VTEX_RETRIES = 3
+
+# Department/category trees change rarely; keep them warm across runs so
+# recurring crawls of the same store only fetch assortment pages
+trees = MeteredTTLCache('crawl_trees', maxsize=1024, ttl=int(os.getenv('CRAWL_TREE_TTL', '21600')))
+
+
+def crawler(kind: str) -> Callable[[Crawler], Crawler]:
+    """Register a crawler under a job kind."""
+    def register(func: Crawler) -> Crawler:
+        CRAWLERS[kind] = func
+        return func
+    return register
+
+
+def bind(kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Function Bind
+    Check the job parameters against the crawler signature.
+    :param kind: crawler kind
+    :param params: job parameters
+    :return: parameters with defaults applied
+    :raises KeyError: unknown kind
+    :raises TypeError: missing or unexpected parameters
+    """
+    signature = inspect.signature(CRAWLERS[kind])
+    bound = signature.bind(None, None, **params)
+    bound.apply_defaults()
+    return {
+        key: value for key, value in bound.arguments.items()
+        if key not in ('client', 'checkpoint')
+    }
+
+
+async def batched(rows: AsyncIterator[BaseModel], size: int = BATCH_SIZE) -> AsyncIterator[Page]:
+    """Group a row stream into pages of size rows, without checkpoints."""
+    page: List[BaseModel] = []
+    async for row in rows:
+        page.append(row)
+        if len(page) >= size:
+            yield Page(page)
+            page = []
+    if page:
+        yield Page(page)
+
+
+@crawler('vtex.assortment')
+async def vtex_assortment(
+    client: AsyncClient,
+    checkpoint: Optional[Dict[str, Any]],
+    domain: str,
+    alias: str,
+    department_id: int,
+    category_id: int = 0,
+    subdomain: str = '',
+    request_waiting: int = 3,
+    window: int = VTEX_WINDOW
+) -> AsyncIterator[Page]:
+    """
+    Walk the _from/_to windows of a VTEX category until it runs dry.
+    Checkpoint: {'_from': next window offset}.
+    """
+    from src.market.vtex.domain.web.assortment import Assortment as VtexAssortment
+
+    _from, retries = (checkpoint or {}).get('_from', 0), 0
+    while _from < VTEX_MAX_OFFSET:
+        _to = min(_from + window, VTEX_MAX_OFFSET) - 1
+        data = await VtexAssortment.request(
+            client, alias, department_id, category_id, _from, _to, request_waiting
+        )
+        if data and data[0].get('status_code') == 429:
+            retries += 1
+            if retries > VTEX_RETRIES:
+                raise RuntimeError(f"{alias}: too many requests at _from={_from}")
+            log.warning(f"{alias}: throttled at _from={_from}, retry {retries}")
+            await asyncio.sleep(request_waiting * 2 ** retries)
+            continue
+        if data and data[0].get('status_code'):
+            raise RuntimeError(f"{alias}: status {data[0]['status_code']} at _from={_from}")
+        if not data:
+            # An empty window: the category ran dry
+            return
+
+        retries = 0
+        header = await VtexAssortment.get_data(
+            domain, subdomain, department_id, category_id, _from, _to, data
+        )
+        if getattr(header, 'data', None) is None:
+            raise ValueError(f"{alias}: could not parse _from={_from}")
+        last = len(data) < _to - _from + 1
+        _from = VTEX_MAX_OFFSET if last else _to + 1
+        yield Page(header.data, {'_from': _from})
+
+
+async def ifood_departments(
+    client: AsyncClient,
+    store_id: str,
+    request_waiting: int
+) -> List[Dict[str, Any]]:
+    """Department tree of an iFood store, from the tree cache when warm."""
+    from src.delivery.ifood.domain.web.department import Department as IfoodDepartment
+
+    departments = trees.get(('ifood', store_id))
+    if departments is None:
+        response = await IfoodDepartment.request(client, store_id, request_waiting)
+        if response.get('code') == '102':
+            raise PermissionError('Acesso não permitido.')
+        if response.get('error'):
+            raise RuntimeError(f"{store_id}: departments: {response['error']}")
+        departments = (response.get('data') or {}).get('categories') or []
+        if departments:
+            trees[('ifood', store_id)] = departments
+    return departments
+
+
+@crawler('ifood.assortment')
+async def ifood_assortment(
+    client: AsyncClient,
+    checkpoint: Optional[Dict[str, Any]],
+    segment_type: str,
+    region: str,
+    store_slug: str,
+    store_id: str,
+    latitude: str,
+    longitude: str,
+    request_waiting: int = 2,
+    department_ids: Optional[List[str]] = None
+) -> AsyncIterator[Page]:
+    """
+    Fan out over the store departments and page through each one.
+    Checkpoint: {'done': [[department_id, page], ...], 'pages': {department_id: pages}}.
+    """
+    from src.delivery.ifood.domain.web.assortment import Assortment as IfoodAssortment
+
+    checkpoint = checkpoint or {}
+    done = {tuple(pair) for pair in checkpoint.get('done', [])}
+    total_pages: Dict[str, int] = dict(checkpoint.get('pages', {}))
+
+    def state() -> Dict[str, Any]:
+        return {'done': sorted(list(pair) for pair in done), 'pages': total_pages}
+
+    for department in await ifood_departments(client, store_id, request_waiting):
+        department_id = department.get('id')
+        if not department_id or (department_ids and department_id not in department_ids):
+            continue
+
+        page = 1
+        while page <= total_pages.get(department_id, page):
+            if (department_id, page) in done:
+                page += 1
+                continue
+            response = await IfoodAssortment.request(
+                client, store_id, department_id, str(page), request_waiting
+            )
+            if response.get('error'):
+                raise RuntimeError(
+                    f"{store_id}: department {department_id} page {page}: {response['error']}"
+                )
+            if not response.get('data'):
+                break
+            header = await IfoodAssortment.get_data(
+                client=client,
+                segment_type=segment_type,
+                region=region,
+                store_slug=store_slug,
+                store_id=store_id,
+                department_id=department_id,
+                search_term=clean_html(department.get('name', 'NA')),
+                latitude=latitude,
+                longitude=longitude,
+                data=response.get('data')
+            )
+            total_pages[department_id] = header.pages
+            done.add((department_id, page))
+            yield Page(header.data, state())
+            page += 1
+
+
+@crawler('osuper.assortment')
+async def osuper_assortment(
+    client: AsyncClient,
+    checkpoint: Optional[Dict[str, Any]],
+    domain: str,
+    account_id: int,
+    store_id: int,
+    category_id: int,
+    search_term: str,
+    request_waiting: int = 3,
+    records_per_page: Optional[int] = None
+) -> AsyncIterator[Page]:
+    """
+    Follow the OSuper search cursor of a category; records_per_page defaults
+    to the provider's RECORDS_PER_PAGE.
+    Checkpoint: {'cursor': endCursor of the next page, None when finished}.
+    """
+    from src.market.osuper.domain.web.assortment import RECORDS_PER_PAGE
+    from src.market.osuper.domain.web.assortment import Assortment as OSuperAssortment
+
+    checkpoint = checkpoint or {'cursor': ''}
+    if checkpoint['cursor'] is None:
+        return
+
+    async for edges, cursor in OSuperAssortment.iter_cursor(
+        client, domain, account_id, store_id, search_term,
+        request_waiting, records_per_page or RECORDS_PER_PAGE, checkpoint['cursor']
+    ):
+        now = datetime.now()
+        page = []
+        for row in edges:
+            try:
+                if assortment_model := OSuperAssortment.parse_node(
+                    row, store_id, category_id, search_term, now
+                ):
+                    page.append(assortment_model)
+            except ValueError as e:
+                log.info(e.args)
+        yield Page(page, {'cursor': cursor})
+
+
+@crawler('vipcommerce.assortment')
+async def vipcommerce_assortment(
+    client: AsyncClient,
+    checkpoint: Optional[Dict[str, Any]],
+    domain: str,
+    branch_id: int,
+    distribution_center_id: int,
+    category_id: int,
+    request_waiting: int = 3,
+    concurrency: Optional[int] = None
+) -> AsyncIterator[Page]:
+    """Every page of a VipCommerce category; concurrency defaults to CRAWL_CONCURRENCY."""
+    from src.market.vipcommerce.domain.web.assortment import CRAWL_CONCURRENCY
+    from src.market.vipcommerce.domain.web.assortment import Assortment as VipCommerceAssortment
+
+    async for header in VipCommerceAssortment.crawl(
+        client, domain, branch_id, distribution_center_id, category_id,
+        request_waiting, concurrency or CRAWL_CONCURRENCY
+    ):
+        yield Page(header.data)
+
+
+@crawler('tendaatacado.crawl')
+async def tendaatacado_crawl(
+    client: AsyncClient,
+    checkpoint: Optional[Dict[str, Any]],
+    request_waiting: int = 3,
+    concurrency: Optional[int] = None
+) -> AsyncIterator[Page]:
+    """The whole Tenda Atacado category tree; concurrency defaults to CRAWL_CONCURRENCY."""
+    from src.wholesale.tendaatacado.domain.web.crawl import CRAWL_CONCURRENCY
+    from src.wholesale.tendaatacado.domain.web.crawl import Crawl as TendaAtacadoCrawl
+
+    categories = trees.get(('tendaatacado',))
+    if categories is None:
+        categories = await TendaAtacadoCrawl.categories(client, request_waiting)
+        if categories:
+            trees[('tendaatacado',)] = categories
+    async for page in batched(
+        TendaAtacadoCrawl.stream(
+            client, request_waiting, concurrency or CRAWL_CONCURRENCY, categories
+        )
+    ):
+        yield page
+
+
+@crawler('uber_eats.assortment')
+async def uber_eats_assortment(
+    client: AsyncClient,
+    checkpoint: Optional[Dict[str, Any]],
+    store_id: str,
+    request_waiting: int = 3
+) -> AsyncIterator[Page]:
+    """The catalog of an Uber Eats store."""
+    from src.delivery.uber_eats.restaurant.domain.web.assortment import \
+        Assortment as UberEatsAssortment
+
+    async for page in batched(UberEatsAssortment.stream(client, store_id, request_waiting)):
+        yield page
@@ -0,0 +1,137 @@
+""" Scheduler """
+import asyncio
+import json
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger as log
+
+from core.jobs.crawlers import CRAWLERS, bind
+from core.jobs.store import QUEUED, RUNNING
+from core.jobs.worker import WorkerPool, pool
+
+SCHEDULES_FILE = os.getenv('SCHEDULES_FILE', 'schedules.json')
+# Longest the loop sleeps, so edits to the clock or late submissions are picked up
+TICK = 60
+
+
+class Scheduler:
+    """
+    Class Scheduler
+
+    Submits recurring crawl jobs to the worker pool, as defined in a JSON
+    file:
+
+        {"schedules": [{
+            "name": "mambo-bebidas",
+            "kind": "vtex.assortment",
+            "every": 14400,
+            "jitter": 900,
+            "params": {"domain": "mambo.com.br", "alias": "mambodelivery", "request_waiting": 3},
+            "targets": [{"department_id": 731, "category_id": 732}, ...]
+        }]}
+
+    Every target (params merged with one entry of targets) is an entry with
+    its own timer. The first run and every following one are delayed by a
+    random 0..jitter seconds, so entries of the same host drift apart instead
+    of firing together. An entry whose previous job is still queued or running
+    is skipped for that round. Jobs run on the pool's shared client and warm
+    tree cache, so recurring runs reuse connections and category trees.
+    """
+
+    def __init__(self, worker_pool: WorkerPool, path: Optional[str] = None):
+        self.pool = worker_pool
+        self.path = path or SCHEDULES_FILE
+        self.entries: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def load(self) -> List[Dict[str, Any]]:
+        """
+        Read the schedules file; invalid schedules are logged and skipped.
+        :return: entries
+        """
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                schedules = json.load(file).get('schedules', [])
+        except FileNotFoundError:
+            return []
+        except (OSError, ValueError) as e:
+            log.error(f"Ignoring unreadable schedules file {self.path}: {e}")
+            return []
+
+        now = time.time()
+        entries = []
+        for schedule in schedules:
+            name = schedule.get('name') or schedule.get('kind')
+            kind = schedule.get('kind')
+            if kind not in CRAWLERS:
+                log.error(f"Schedule {name}: unknown kind {kind}")
+                continue
+            if not float(schedule.get('every') or 0) > 0:
+                log.error(f"Schedule {name}: 'every' must be a positive number of seconds")
+                continue
+            jitter = float(schedule.get('jitter', 0))
+            for target in schedule.get('targets') or [{}]:
+                try:
+                    params = bind(kind, {**schedule.get('params', {}), **target})
+                except TypeError as e:
+                    log.error(f"Schedule {name}: {e}")
+                    continue
+                entries.append({
+                    'name': name,
+                    'kind': kind,
+                    'params': params,
+                    'every': float(schedule['every']),
+                    'jitter': jitter,
+                    'next_run': now + random.uniform(0, jitter),
+                    'job_id': None,
+                })
+        return entries
+
+    async def start(self) -> None:
+        """Load the schedules and start the loop (nothing to do without schedules)."""
+        if self._task is not None:
+            return
+        self.entries = self.load()
+        if not self.entries:
+            return
+        self._task = asyncio.create_task(self._loop())
+        log.info(f"Scheduled {len(self.entries)} recurring crawl(s) from {self.path}")
+
+    async def stop(self) -> None:
+        """Stop the loop."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def _fire(self, entry: Dict[str, Any], now: float) -> None:
+        entry['next_run'] = now + entry['every'] + random.uniform(0, entry['jitter'])
+        if entry['job_id']:
+            job = await asyncio.to_thread(self.pool.store.get, entry['job_id'])
+            if job and job['status'] in (QUEUED, RUNNING):
+                log.warning(
+                    f"Schedule {entry['name']}: job {entry['job_id']} still {job['status']}"
+                )
+                return
+        job = await self.pool.submit(entry['kind'], entry['params'])
+        entry['job_id'] = job['job_id']
+        log.info(f"Schedule {entry['name']}: submitted job {job['job_id']}")
+
+    async def _loop(self) -> None:
+        while True:
+            now = time.time()
+            for entry in self.entries:
+                if entry['next_run'] <= now:
+                    try:
+                        await self._fire(entry, now)
+                    except Exception:
+                        log.exception(f"Schedule {entry['name']} failed to submit")
+            wake = min(entry['next_run'] for entry in self.entries)
+            await asyncio.sleep(min(max(wake - time.time(), 0), TICK))
+
+
+scheduler = Scheduler(pool)
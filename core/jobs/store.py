@@ -0,0 +1,266 @@
+""" Job Store """
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional
+
+from core.util.persistent_cache import CACHE_DIR
+
+JOBS_DB = os.getenv('JOBS_DB', os.path.join(CACHE_DIR, 'jobs.sqlite3'))
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (DONE, FAILED, CANCELLED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pages INTEGER NOT NULL DEFAULT 0,
+    rows INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    checkpoint TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS results (
+    job_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    row TEXT NOT NULL,
+    PRIMARY KEY (job_id, seq)
+) WITHOUT ROWID;
+"""
+
+
+class JobStore:
+    """
+    Class JobStore
+
+    Jobs and their result rows in a local sqlite file. Rows are appended in
+    the same transaction as the progress counters and the crawl checkpoint,
+    so they always agree, and they are readable while the job still runs.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or JOBS_DB
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        columns = {row['name'] for row in self._db.execute('PRAGMA table_info(jobs)')}
+        if 'checkpoint' not in columns:
+            self._db.execute('ALTER TABLE jobs ADD COLUMN checkpoint TEXT')
+
+    @staticmethod
+    def _job(row: Optional[sqlite3.Row]) -> Optional[Dict[str, Any]]:
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['checkpoint'] = json.loads(job['checkpoint']) if job['checkpoint'] else None
+        return job
+
+    def create(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Function Create
+        :param kind: crawler kind
+        :param params: crawler parameters
+        :return: job
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO jobs (job_id, kind, params, status, created_at) '
+                'VALUES (?, ?, ?, ?, ?)',
+                (job_id, kind, json.dumps(params), QUEUED, time.time())
+            )
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Function Get
+        :param job_id:
+        :return: job or None
+        """
+        with self._lock:
+            row = self._db.execute('SELECT * FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+        return self._job(row)
+
+    def list(self, status: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Function List
+        :param status: filter by status
+        :param limit: maximum jobs, newest first
+        :return: jobs
+        """
+        query = 'SELECT * FROM jobs'
+        args: list = []
+        if status:
+            query += ' WHERE status = ?'
+            args.append(status)
+        query += ' ORDER BY created_at DESC LIMIT ?'
+        args.append(limit)
+        with self._lock:
+            rows = self._db.execute(query, args).fetchall()
+        return [self._job(row) for row in rows]
+
+    def queued(self) -> List[str]:
+        """ Ids of jobs waiting to run, oldest first. """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT job_id FROM jobs WHERE status = ? ORDER BY created_at', (QUEUED,)
+            ).fetchall()
+        return [row['job_id'] for row in rows]
+
+    def _requeue(self, job_id: str) -> None:
+        """
+        Queue a job again. It resumes from its checkpoint; a job without one
+        starts over, so its partial results are dropped.
+        """
+        self._db.execute('BEGIN')
+        self._db.execute(
+            'DELETE FROM results WHERE job_id = ? AND '
+            '(SELECT checkpoint FROM jobs WHERE job_id = ?) IS NULL',
+            (job_id, job_id)
+        )
+        self._db.execute(
+            'UPDATE jobs SET status = ?, error = NULL, finished_at = NULL, '
+            'pages = CASE WHEN checkpoint IS NULL THEN 0 ELSE pages END, '
+            'rows = CASE WHEN checkpoint IS NULL THEN 0 ELSE rows END '
+            'WHERE job_id = ?',
+            (QUEUED, job_id)
+        )
+        self._db.execute('COMMIT')
+
+    def requeue_interrupted(self) -> List[str]:
+        """
+        Put jobs left running by a previous process back in the queue.
+        :return: requeued job ids
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT job_id FROM jobs WHERE status = ?', (RUNNING,)
+            ).fetchall()
+            job_ids = [row['job_id'] for row in rows]
+            for job_id in job_ids:
+                self._requeue(job_id)
+        return job_ids
+
+    def retry(self, job_id: str) -> bool:
+        """
+        Queue a failed or cancelled job again, from its last checkpoint.
+        :param job_id:
+        :return: False when the job is not failed/cancelled
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT status FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+            if row is None or row['status'] not in (FAILED, CANCELLED):
+                return False
+            self._requeue(job_id)
+        return True
+
+    def start(self, job_id: str) -> bool:
+        """
+        Mark a queued job as running.
+        :param job_id:
+        :return: False when the job is no longer queued (e.g. cancelled)
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                'UPDATE jobs SET status = ?, started_at = ? WHERE job_id = ? AND status = ?',
+                (RUNNING, time.time(), job_id, QUEUED)
+            )
+        return cursor.rowcount == 1
+
+    def append(
+        self,
+        job_id: str,
+        rows: List[Dict[str, Any]],
+        pages: int = 1,
+        checkpoint: Optional[Dict[str, Any]] = None
+    ) -> None:
+        """
+        Append result rows, advance the progress counters and save the crawl
+        checkpoint in one transaction, so a resumed job never refetches a
+        page whose rows were written nor loses one that was not.
+        :param job_id:
+        :param rows: JSON serializable rows
+        :param pages: upstream pages the rows came from
+        :param checkpoint: crawler state to resume after these rows
+        """
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                offset = self._db.execute(
+                    'SELECT rows FROM jobs WHERE job_id = ?', (job_id,)
+                ).fetchone()['rows']
+                self._db.executemany(
+                    'INSERT INTO results (job_id, seq, row) VALUES (?, ?, ?)',
+                    (
+                        (job_id, offset + seq, json.dumps(row, separators=(',', ':')))
+                        for seq, row in enumerate(rows)
+                    )
+                )
+                self._db.execute(
+                    'UPDATE jobs SET pages = pages + ?, rows = rows + ?, checkpoint = ? '
+                    'WHERE job_id = ?',
+                    (
+                        pages,
+                        len(rows),
+                        json.dumps(checkpoint) if checkpoint is not None else None,
+                        job_id
+                    )
+                )
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def finish(self, job_id: str, status: str, error: Optional[str] = None) -> None:
+        """
+        Function Finish
+        :param job_id:
+        :param status: done, failed or cancelled
+        :param error: failure reason
+        """
+        with self._lock:
+            self._db.execute(
+                'UPDATE jobs SET status = ?, error = ?, finished_at = ? '
+                'WHERE job_id = ? AND status NOT IN (?, ?, ?)',
+                (status, error, time.time(), job_id, *FINISHED)
+            )
+
+    def results(self, job_id: str, offset: int = 0, limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        Function Results
+        :param job_id:
+        :param offset: first row
+        :param limit: maximum rows
+        :return: rows in the order they were produced
+        """
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT row FROM results WHERE job_id = ? AND seq >= ? ORDER BY seq LIMIT ?',
+                (job_id, offset, limit)
+            ).fetchall()
+        return [json.loads(row['row']) for row in rows]
+
+    def close(self) -> None:
+        """ Close the database. """
+        with self._lock:
+            self._db.close()
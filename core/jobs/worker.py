@@ -0,0 +1,203 @@
+""" Worker """
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from loguru import logger as log
+
+from core.http.client import create_client
+from core.jobs.crawlers import CRAWLERS, bind
+from core.jobs.store import CANCELLED, DONE, FAILED, FINISHED, JobStore
+from core.metrics.instruments import current_provider
+from core.snapshots.normalize import NORMALIZERS
+from core.snapshots.store import snapshots
+
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', '2'))
+# Seconds between checkpoints; pages are buffered in memory in between
+JOB_CHECKPOINT_INTERVAL = float(os.getenv('JOB_CHECKPOINT_INTERVAL', '5'))
+# Keep the rows of every finished crawl in the snapshot store
+JOB_SNAPSHOTS = os.getenv('JOB_SNAPSHOTS', 'true').lower() in ('1', 'true', 'yes')
+
+
+class WorkerPool:
+    """
+    Class WorkerPool
+
+    Runs crawl jobs in the background of the service. Jobs are persisted in
+    the JobStore before they are queued, so a restart picks up whatever was
+    queued or running. Pages a crawler yields are written together with its
+    checkpoint every checkpoint_interval seconds, and a requeued or retried
+    job resumes from the last one.
+    """
+
+    def __init__(
+        self,
+        size: int = JOB_WORKERS,
+        store: Optional[JobStore] = None,
+        checkpoint_interval: float = JOB_CHECKPOINT_INTERVAL
+    ):
+        self.size = size
+        self.checkpoint_interval = checkpoint_interval
+        self._store = store
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._running: Dict[str, asyncio.Task] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def store(self) -> JobStore:
+        """Job store, opened on first use."""
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    async def start(self) -> None:
+        """Start the workers and queue the jobs left over by a previous process."""
+        if self._workers:
+            return
+        self._queue = asyncio.Queue()
+        self._client = create_client(timeout=30.0, provider='jobs')
+
+        interrupted = self.store.requeue_interrupted()
+        if interrupted:
+            log.warning(f"Requeued {len(interrupted)} interrupted job(s)")
+        for job_id in self.store.queued():
+            self._queue.put_nowait(job_id)
+
+        self._workers = [
+            asyncio.create_task(self._work(number)) for number in range(self.size)
+        ]
+        log.info(f"Started {self.size} job worker(s)")
+
+    async def stop(self) -> None:
+        """
+        Stop the workers. Running jobs stay 'running' in the store and are
+        requeued on the next start.
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def submit(self, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Function Submit
+        The store is written from a thread, off the event loop.
+        :param kind: crawler kind
+        :param params: crawler parameters
+        :return: job
+        :raises KeyError: unknown kind
+        :raises TypeError: invalid parameters
+        """
+        params = bind(kind, params)
+        job = await asyncio.to_thread(self.store.create, kind, params)
+        if self._queue is not None:
+            self._queue.put_nowait(job['job_id'])
+        return job
+
+    async def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Function Cancel
+        Queued jobs are dropped when a worker reaches them; a running job is
+        interrupted between pages. Results written so far are kept.
+        :param job_id:
+        :return: job or None when unknown
+        """
+        job = await asyncio.to_thread(self.store.get, job_id)
+        if job is None or job['status'] in FINISHED:
+            return job
+        # A no-op when the job finished in the meantime
+        await asyncio.to_thread(self.store.finish, job_id, CANCELLED)
+        if task := self._running.get(job_id):
+            task.cancel()
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def retry(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Function Retry
+        Queue a failed or cancelled job again; it resumes from its checkpoint.
+        :param job_id:
+        :return: job or None when unknown
+        """
+        if await asyncio.to_thread(self.store.retry, job_id) and self._queue is not None:
+            self._queue.put_nowait(job_id)
+        return await asyncio.to_thread(self.store.get, job_id)
+
+    async def _work(self, number: int) -> None:
+        while True:
+            job_id = await self._queue.get()
+            try:
+                if not self.store.start(job_id):
+                    continue
+                task = asyncio.create_task(self._run(job_id))
+                self._running[job_id] = task
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    # Shutdown cancels the worker itself; only swallow a job cancel
+                    if self.store.get(job_id)['status'] != CANCELLED:
+                        raise
+                    log.info(f"Worker {number}: job {job_id} cancelled")
+            finally:
+                self._running.pop(job_id, None)
+                self._queue.task_done()
+
+    async def _run(self, job_id: str) -> None:
+        job = self.store.get(job_id)
+        checkpoint = job['checkpoint']
+        current_provider.set(job['kind'].split('.')[0])
+        log.info(f"Job {job_id}: {job['kind']} {job['params']} from {checkpoint}")
+
+        rows: List[Dict[str, Any]] = []
+        pages = 0
+        saved_at = time.monotonic()
+
+        def save() -> None:
+            nonlocal rows, pages, saved_at
+            if pages:
+                self.store.append(job_id, rows, pages, checkpoint)
+            rows, pages, saved_at = [], 0, time.monotonic()
+
+        try:
+            async for page in CRAWLERS[job['kind']](self._client, checkpoint, **job['params']):
+                rows.extend(jsonable_encoder(page.rows))
+                pages += 1
+                checkpoint = page.checkpoint
+                if time.monotonic() - saved_at >= self.checkpoint_interval:
+                    save()
+        except asyncio.CancelledError:
+            save()
+            raise
+        except Exception as e:
+            log.exception(f"Job {job_id} failed")
+            save()
+            self.store.finish(job_id, FAILED, f"{type(e).__name__}: {e}")
+            return
+        save()
+        self.store.finish(job_id, DONE)
+        log.info(f"Job {job_id} done")
+        if JOB_SNAPSHOTS:
+            await self._snapshot(job_id)
+
+    async def _snapshot(self, job_id: str) -> None:
+        """Write the rows of a finished job to the snapshot store."""
+        job = self.store.get(job_id)
+        provider = job['kind'].split('.')[0]
+        if provider not in NORMALIZERS or not job['rows']:
+            return
+        try:
+            rows = self.store.results(job_id, 0, job['rows'])
+            await asyncio.to_thread(
+                snapshots.write, provider, rows, job['params'], job_id, job['finished_at']
+            )
+        except Exception:
+            log.exception(f"Job {job_id}: could not write snapshot")
+
+
+pool = WorkerPool()
@@ -0,0 +1,296 @@
+""" Instruments
+
+The API's metrics and the helpers that record them.
+"""
+import asyncio
+import functools
+import inspect
+import time
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+import sentry_sdk
+from cachetools import TTLCache
+
+from core.metrics import timing
+from core.metrics.registry import BYTES_BUCKETS, Counter, Gauge, Histogram, LabelValues
+
+# Provider of the work running in this context (a job of the shared worker client)
+current_provider: ContextVar[str] = ContextVar('current_provider', default='')
+
+# Requests
+
+REQUEST_SECONDS = Histogram(
+    'scraper_request_seconds', 'API request duration until the last body byte.',
+    ['route', 'method', 'status']
+)
+RESPONSE_BYTES = Histogram(
+    'scraper_response_bytes', 'API response body size as sent (after compression).',
+    ['route'], buckets=BYTES_BUCKETS
+)
+REQUESTS_IN_FLIGHT = Gauge('scraper_requests_in_flight', 'API requests being served.')
+
+# Pipeline
+
+UPSTREAM_SECONDS = Histogram(
+    'scraper_upstream_request_seconds', 'Upstream request latency until the response headers.',
+    ['provider', 'host', 'method', 'status']
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    'scraper_upstream_requests_in_flight', 'Upstream requests waiting on a response.',
+    ['provider']
+)
+RATE_LIMIT_SECONDS = Histogram(
+    'scraper_rate_limit_sleep_seconds',
+    'Time slept before upstream requests (request_waiting, jitter).',
+    ['provider']
+)
+PARSE_SECONDS = Histogram(
+    'scraper_parse_seconds',
+    'Time spent turning upstream data into rows, excluding awaited I/O, sleeps and validation.',
+    ['provider']
+)
+VALIDATION_SECONDS = Histogram(
+    'scraper_validation_seconds',
+    'Time spent validating upstream items against the provider models.',
+    ['provider', 'model']
+)
+SERIALIZATION_SECONDS = Histogram(
+    'scraper_serialization_seconds', 'Time spent encoding response bodies.', ['format']
+)
+
+# Caches
+
+CACHE_REQUESTS = Counter('scraper_cache_requests_total', 'Cache lookups.', ['cache', 'result'])
+
+
+def cache_hit_ratio() -> Dict[LabelValues, float]:
+    lookups: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in CACHE_REQUESTS.items():
+        lookups.setdefault(cache, {})[result] = value
+    return {
+        (cache, ): counts.get('hit', 0.0) / sum(counts.values())
+        for cache, counts in lookups.items() if sum(counts.values())
+    }
+
+
+CACHE_HIT_RATIO = Gauge(
+    'scraper_cache_hit_ratio', 'Cache hits / lookups since startup.', ['cache'],
+    collect=cache_hit_ratio
+)
+
+
+def record_cache(name: str, hit: bool) -> None:
+    CACHE_REQUESTS.inc(cache=name, result='hit' if hit else 'miss')
+
+
+class MeteredTTLCache(TTLCache):
+    """ cachetools.TTLCache counting `key in cache` (and get) as hits and misses. """
+
+    def __init__(self, name: str, maxsize: int, ttl: float, **kwargs):
+        super().__init__(maxsize, ttl, **kwargs)
+        self.name = name
+
+    def __contains__(self, key: Any) -> bool:
+        hit = super().__contains__(key)
+        record_cache(self.name, hit)
+        return hit
+
+
+# Connection pools
+
+_pools: 'weakref.WeakValueDictionary[Tuple[str, int], Any]' = weakref.WeakValueDictionary()
+
+
+def watch_pool(provider: str, transport: Any) -> None:
+    """Report the connection pool of an httpx.AsyncHTTPTransport while it is alive."""
+    pool = getattr(transport, '_pool', None)
+    if pool is not None:
+        _pools[(provider, id(pool))] = pool
+
+
+def pool_connections() -> Dict[LabelValues, float]:
+    values: Dict[LabelValues, float] = {}
+    for (provider, _), pool in list(_pools.items()):
+        for connection in pool.connections:
+            state = 'idle' if connection.is_idle() else 'active'
+            values[(provider, state)] = values.get((provider, state), 0) + 1
+    return values
+
+
+def pool_max_connections() -> Dict[LabelValues, float]:
+    values: Dict[LabelValues, float] = {}
+    for (provider, _), pool in list(_pools.items()):
+        limit = getattr(pool, '_max_connections', None)
+        if limit is not None:
+            values[(provider, )] = values.get((provider, ), 0) + limit
+    return values
+
+
+POOL_CONNECTIONS = Gauge(
+    'scraper_upstream_pool_connections', 'Open upstream connections by state.',
+    ['provider', 'state'], collect=pool_connections
+)
+POOL_MAX_CONNECTIONS = Gauge(
+    'scraper_upstream_pool_max_connections', 'Upstream connection pool size limit.',
+    ['provider'], collect=pool_max_connections
+)
+
+
+# Helpers
+
+@contextmanager
+def timed(histogram: Histogram, phase: Optional[str] = None, **labels: str) -> Iterator[None]:
+    """
+    Observe the duration of the block; with phase, also report it to the
+    request's Server-Timing.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, **labels)
+        if phase is not None:
+            timing.record(phase, elapsed)
+            timing.add_nested(elapsed)
+
+
+def _own_time(start: float, nested: float) -> float:
+    """Time since start minus the timed phases run inside it, which is then
+    itself nested time for an enclosing phase."""
+    own = time.perf_counter() - start - (timing.nested_total() - nested)
+    timing.add_nested(own)
+    return own
+
+
+class _OwnTime:
+    """
+    Awaitable running a coroutine and adding to spent[0] only the time its
+    steps run, not the time it is suspended on I/O, sleeps or other tasks.
+    """
+
+    def __init__(self, coroutine, spent: list):
+        self.coroutine = coroutine
+        self.spent = spent
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            start, nested = time.perf_counter(), timing.nested_total()
+            try:
+                if error is not None:
+                    yielded = self.coroutine.throw(error)
+                else:
+                    yielded = self.coroutine.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                self.spent[0] += _own_time(start, nested)
+            try:
+                value, error = (yield yielded), None
+            except BaseException as e:  # pylint: disable=broad-except
+                value, error = None, e
+
+
+def _async_generator(function: Callable, observe: Callable[[float], None]) -> Callable:
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        spent = [0.0]
+        rows = function(*args, **kwargs)
+        try:
+            while True:
+                try:
+                    row = await _OwnTime(rows.__anext__(), spent)
+                except StopAsyncIteration:
+                    return
+                yield row
+        finally:
+            await rows.aclose()
+            observe(spent[0])
+    return wrapper
+
+
+def _coroutine(function: Callable, observe: Callable[[float], None]) -> Callable:
+    @functools.wraps(function)
+    async def wrapper(*args, **kwargs):
+        spent = [0.0]
+        try:
+            return await _OwnTime(function(*args, **kwargs), spent)
+        finally:
+            observe(spent[0])
+    return wrapper
+
+
+def _generator(function: Callable, observe: Callable[[float], None]) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        spent = 0.0
+        rows = function(*args, **kwargs)
+        try:
+            while True:
+                start, nested = time.perf_counter(), timing.nested_total()
+                try:
+                    row = next(rows)
+                except StopIteration:
+                    return
+                finally:
+                    spent += _own_time(start, nested)
+                yield row
+        finally:
+            rows.close()
+            observe(spent)
+    return wrapper
+
+
+def _call(function: Callable, observe: Callable[[float], None]) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start, nested = time.perf_counter(), timing.nested_total()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            observe(_own_time(start, nested))
+    return wrapper
+
+
+def measure(histogram: Histogram, phase: Optional[str] = None, **labels: str) -> Callable:
+    """
+    Decorator observing the time a function spends running: the call of a
+    function, every step of a generator, and for coroutines and async
+    generators only the time they run between awaits. Time in timed phases
+    called from it (validation) is left out. One observation per call (per
+    generator, once exhausted or closed), also reported to the request's
+    Server-Timing when phase is given.
+    """
+    def observe(spent: float) -> None:
+        histogram.observe(spent, **labels)
+        if phase is not None:
+            timing.record(phase, spent)
+
+    def decorator(function: Callable) -> Callable:
+        if inspect.isasyncgenfunction(function):
+            return _async_generator(function, observe)
+        if inspect.iscoroutinefunction(function):
+            return _coroutine(function, observe)
+        if inspect.isgeneratorfunction(function):
+            return _generator(function, observe)
+        return _call(function, observe)
+    return decorator
+
+
+async def rate_limit_wait(seconds: float, provider: str) -> None:
+    """
+    Function Rate Limit Wait
+    Sleep before an upstream request and record it.
+    :param seconds: request_waiting or jitter
+    :param provider: provider name
+    """
+    start = time.perf_counter()
+    with sentry_sdk.start_span(op='rate_limit.wait', name=provider):
+        await asyncio.sleep(seconds)
+    elapsed = time.perf_counter() - start
+    RATE_LIMIT_SECONDS.observe(elapsed, provider=provider)
+    timing.record(timing.WAIT, elapsed)
@@ -0,0 +1,182 @@
+""" Registry
+
+Minimal Prometheus metrics (counter, gauge, histogram) rendered in the text
+exposition format, so /metrics needs no client library.
+"""
+import math
+import threading
+from bisect import bisect_left
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Sequence[Tuple[str, str]], float]
+Collect = Callable[[], Dict[LabelValues, float]]
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+BYTES_BUCKETS = tuple(float(4 ** power) for power in range(4, 13))  # 256 B .. 16 MB
+
+
+def escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """ Base class: one metric family with a fixed set of label names. """
+    kind = 'untyped'
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), registry=None
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} takes labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        for name, labels, value in self.samples():
+            pairs = ','.join(f'{label}="{escape(text)}"' for label, text in labels)
+            series = f"{name}{{{pairs}}}" if pairs else name
+            lines.append(f"{series} {number(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """
+    Monotonic count; the name should end in _total. With collect, the values
+    are read from elsewhere when /metrics is scraped: collect() returns
+    {label values: value}.
+    """
+    kind = 'counter'
+
+    def __init__(self, *args, collect: Optional[Collect] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self.key(labels), 0.0)
+
+    def items(self) -> List[Tuple[LabelValues, float]]:
+        with self._lock:
+            return list(self._values.items())
+
+    def samples(self) -> Iterator[Sample]:
+        values = self._collect().items() if self._collect is not None else self.items()
+        for key, value in values:
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Gauge(Metric):
+    """ Value that goes up and down; collect works as for Counter. """
+    kind = 'gauge'
+
+    def __init__(self, *args, collect: Optional[Collect] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+        self._collect = collect
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self.key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self.key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self.key(labels), 0.0)
+
+    def samples(self) -> Iterator[Sample]:
+        if self._collect is not None:
+            values = self._collect()
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, list(zip(self.labelnames, key)), value
+
+
+class Histogram(Metric):
+    """ Cumulative buckets plus _sum and _count per label set. """
+    kind = 'histogram'
+
+    def __init__(self, *args, buckets: Sequence[float] = LATENCY_BUCKETS, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> [count per bucket (not cumulative), sum]
+        self._values: Dict[LabelValues, List] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self.key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            item = self._values.get(key)
+            if item is None:
+                item = self._values[key] = [[0] * len(self.buckets), 0.0]
+            item[0][index] += 1
+            item[1] += value
+
+    def count(self, **labels: str) -> int:
+        item = self._values.get(self.key(labels))
+        return 0 if item is None else sum(item[0])
+
+    def total(self, **labels: str) -> float:
+        item = self._values.get(self.key(labels))
+        return 0.0 if item is None else item[1]
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in values:
+            labels = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f'{self.name}_bucket', [*labels, ('le', number(bound))], cumulative
+            yield f'{self.name}_sum', labels, total
+            yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    """ Metrics rendered by /metrics, in registration order. """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> None:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        return '\n'.join(metric.render() for metric in self._metrics.values()) + '\n'
+
+
+REGISTRY = Registry()
@@ -0,0 +1,32 @@
+""" Router """
+from typing import Dict
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from core.metrics.registry import Counter, LabelValues, REGISTRY
+from core.middleware.compression import stats
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+router = APIRouter()
+
+
+def compression_bytes() -> Dict[LabelValues, float]:
+    values: Dict[LabelValues, float] = {}
+    for encoding, item in stats.snapshot().items():
+        values[(encoding, 'in')] = item['bytes_in']
+        values[(encoding, 'out')] = item['bytes_out']
+    return values
+
+
+COMPRESSION_BYTES = Counter(
+    'scraper_compression_bytes_total', 'Response bytes before (in) and after (out) compression.',
+    ['encoding', 'stage'], collect=compression_bytes
+)
+
+
+@router.get('/metrics', include_in_schema=False)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of every registered metric."""
+    return PlainTextResponse(REGISTRY.render(), media_type=CONTENT_TYPE)
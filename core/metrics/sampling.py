@@ -0,0 +1,123 @@
+""" Sampling
+
+Sentry trace sampling policy. Every error and every slow transaction is sent,
+plus a small random share of the normal traffic, with the rate and the slow
+threshold tunable per route prefix. Latency and status are only known when a
+transaction ends, so routes with a rate above 0 are recorded in process
+(traces_sampler) and the decision to send is taken in before_send_transaction;
+routes with rate 0 (/metrics, docs) are not traced at all.
+"""
+import json
+import os
+import random
+from datetime import datetime
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+from loguru import logger
+
+SENTRY_TRACES_SAMPLE_RATE = 'SENTRY_TRACES_SAMPLE_RATE'
+SENTRY_TRACES_SLOW_SECONDS = 'SENTRY_TRACES_SLOW_SECONDS'
+SENTRY_TRACES_ROUTES = 'SENTRY_TRACES_ROUTES'
+
+# Assortment requests sleep request_waiting (2-3 s) per upstream page
+DEFAULT_RATE = 0.05
+DEFAULT_SLOW = 15.0
+
+
+class Policy(NamedTuple):
+    rate: float
+    slow: float
+
+
+NOT_TRACED = Policy(rate=0.0, slow=0.0)
+DEFAULT_ROUTES: Dict[str, Policy] = {
+    '/metrics': NOT_TRACED,
+    '/docs': NOT_TRACED,
+    '/redoc': NOT_TRACED,
+    '/openapi.json': NOT_TRACED,
+}
+
+
+def seconds(value: Union[datetime, float, str, None]) -> Optional[float]:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    return value
+
+
+class TraceSampler:
+    """
+    Class TraceSampler
+    :param rate: share of normal transactions sent
+    :param slow: transactions at least this long (seconds) are always sent
+    :param routes: {path prefix: Policy}, the longest matching prefix wins
+    """
+
+    def __init__(
+        self, rate: float = DEFAULT_RATE, slow: float = DEFAULT_SLOW,
+        routes: Optional[Dict[str, Policy]] = None
+    ):
+        self.default = Policy(rate=rate, slow=slow)
+        self.routes = {**DEFAULT_ROUTES, **(routes or {})}
+        self.prefixes = sorted(self.routes, key=len, reverse=True)
+
+    @classmethod
+    def from_env(cls) -> 'TraceSampler':
+        """
+        SENTRY_TRACES_ROUTES is JSON, e.g. {"/api/v1/ifood": {"rate": 0.2, "slow": 30}};
+        missing fields take the global values. An invalid value is logged and
+        ignored (the default routes apply).
+        """
+        rate = float(os.getenv(SENTRY_TRACES_SAMPLE_RATE, str(DEFAULT_RATE)))
+        slow = float(os.getenv(SENTRY_TRACES_SLOW_SECONDS, str(DEFAULT_SLOW)))
+        try:
+            configured = json.loads(os.getenv(SENTRY_TRACES_ROUTES) or '{}')
+            routes = {
+                prefix: Policy(
+                    rate=float(item.get('rate', rate)), slow=float(item.get('slow', slow))
+                )
+                for prefix, item in configured.items()
+            }
+        except (ValueError, TypeError, AttributeError) as e:
+            logger.error(f"Invalid {SENTRY_TRACES_ROUTES}, using the default routes: {e}")
+            routes = {}
+        return cls(rate, slow, routes)
+
+    def policy(self, path: str) -> Policy:
+        for prefix in self.prefixes:
+            if path.startswith(prefix):
+                return self.routes[prefix]
+        return self.default
+
+    def traces_sampler(self, sampling_context: Dict[str, Any]) -> float:
+        """Record every transaction of a traced route; sending is decided at the end."""
+        scope = sampling_context.get('asgi_scope') or {}
+        path = scope.get('path') or sampling_context.get('transaction_context', {}).get('name', '')
+        return 1.0 if self.policy(path).rate > 0 else 0.0
+
+    def before_send_transaction(
+        self, event: Dict[str, Any], hint: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """Send errors and slow transactions; sample the rest at the route's rate."""
+        policy = self.policy(event.get('transaction') or '')
+        contexts = event.get('contexts', {})
+        status_code = contexts.get('response', {}).get('status_code')
+        if status_code is not None:
+            error = status_code >= 500
+        else:
+            error = contexts.get('trace', {}).get('status') not in (None, 'ok')
+
+        start, end = seconds(event.get('start_timestamp')), seconds(event.get('timestamp'))
+        slow = start is not None and end is not None and end - start >= policy.slow
+
+        if error:
+            reason = 'error'
+        elif slow:
+            reason = 'slow'
+        elif random.random() < policy.rate:
+            reason = 'sampled'
+        else:
+            return None
+        event.setdefault('tags', {})['sampling'] = reason
+        return event
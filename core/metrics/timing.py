@@ -0,0 +1,67 @@
+""" Timing
+
+Request-scoped phase timings for the Server-Timing header. The middleware
+opens a context per request; the instruments (auth, rate-limit wait,
+upstream, parse, validate, serialize) report into it. Tasks and threadpool
+calls started by the request inherit it.
+"""
+import threading
+from contextvars import ContextVar, Token
+from typing import Dict, List, Optional
+
+AUTH = 'auth'
+WAIT = 'wait'
+UPSTREAM = 'upstream'
+PARSE = 'parse'
+VALIDATE = 'validate'
+SERIALIZE = 'serialize'
+
+PHASES = (AUTH, WAIT, UPSTREAM, PARSE, VALIDATE, SERIALIZE)
+
+# phase -> [seconds, count] of the current request
+_phases: ContextVar[Optional[Dict[str, List[float]]]] = ContextVar('server_timing', default=None)
+
+# Seconds spent in timed leaf phases on this thread, so an enclosing phase
+# (parse around validate) can report its own time only
+_nested = threading.local()
+
+
+def begin() -> Token:
+    return _phases.set({})
+
+
+def end(token: Token) -> None:
+    _phases.reset(token)
+
+
+def record(phase: str, seconds: float) -> None:
+    phases = _phases.get()
+    if phases is not None:
+        item = phases.setdefault(phase, [0.0, 0])
+        item[0] += seconds
+        item[1] += 1
+
+
+def nested_total() -> float:
+    return getattr(_nested, 'total', 0.0)
+
+
+def add_nested(seconds: float) -> None:
+    _nested.total = nested_total() + seconds
+
+
+def header(total: float) -> str:
+    """
+    Function Header
+    :param total: seconds since the request started
+    :return: Server-Timing value, durations in milliseconds
+    """
+    phases = _phases.get() or {}
+    metrics = [
+        f'{phase};dur={phases[phase][0] * 1000:.1f}' + (
+            f';desc="{phases[phase][1]} calls"' if phases[phase][1] > 1 else ''
+        )
+        for phase in PHASES if phase in phases
+    ]
+    metrics.append(f'total;dur={total * 1000:.1f}')
+    return ', '.join(metrics)
@@ -0,0 +1,240 @@
+""" Compression """
+import json
+import os
+import zlib
+from typing import Dict, List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+
+ZSTD = 'zstd'
+BROTLI = 'br'
+GZIP = 'gzip'
+
+# Server preference when the client accepts several with the same q
+ENCODINGS: List[str] = [
+    encoding for encoding, available in (
+        (ZSTD, zstandard is not None),
+        (BROTLI, brotli is not None),
+        (GZIP, True),
+    ) if available
+]
+
+COMPRESSIBLE = (
+    'application/json',
+    'application/x-ndjson',
+    'application/vnd.apache.arrow.stream',
+    'application/javascript',
+    'application/xml',
+    'text/',
+)
+
+# Per content type levels; streamed types trade ratio for latency
+LEVELS: Dict[str, Dict[str, int]] = {
+    '*': {ZSTD: 3, BROTLI: 4, GZIP: 6},
+    'application/json': {ZSTD: 6, BROTLI: 5, GZIP: 6},
+    'application/x-ndjson': {ZSTD: 3, BROTLI: 2, GZIP: 4},
+}
+for content_type, levels in json.loads(os.getenv('COMPRESSION_LEVELS') or '{}').items():
+    LEVELS.setdefault(content_type, dict(LEVELS['*'])).update(levels)
+
+
+class CompressionStats:
+    """
+    Class CompressionStats
+
+    Bytes before and after compression per encoding, since startup.
+    """
+
+    def __init__(self):
+        self.encodings: Dict[str, Dict[str, int]] = {}
+
+    def record(self, encoding: str, bytes_in: int, bytes_out: int) -> None:
+        item = self.encodings.setdefault(encoding, {'responses': 0, 'bytes_in': 0, 'bytes_out': 0})
+        item['responses'] += 1
+        item['bytes_in'] += bytes_in
+        item['bytes_out'] += bytes_out
+
+    def snapshot(self) -> Dict[str, Dict[str, int]]:
+        return {
+            encoding: {**item, 'bytes_saved': item['bytes_in'] - item['bytes_out']}
+            for encoding, item in self.encodings.items()
+        }
+
+
+stats = CompressionStats()
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    Function Negotiate
+    :param accept_encoding: Accept-Encoding request header
+    :return: best available encoding or None for identity
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        weights[name.strip()] = q
+
+    best, best_q = None, 0.0
+    for encoding in ENCODINGS:
+        q = weights.get(encoding, weights.get('*', 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def level(encoding: str, content_type: str) -> int:
+    """Configured level of an encoding for a content type."""
+    media_type = content_type.split(';')[0].strip().lower()
+    return LEVELS.get(media_type, LEVELS['*']).get(encoding, LEVELS['*'][encoding])
+
+
+class Encoder:
+    """ Incremental compressor; flush() emits everything compressed so far. """
+
+    def __init__(self, encoding: str, level: int):
+        self.encoding = encoding
+        if encoding == ZSTD:
+            self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+        elif encoding == BROTLI:
+            self._compressor = brotli.Compressor(quality=level)
+        else:
+            self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == BROTLI:
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == ZSTD:
+            return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        if self.encoding == BROTLI:
+            return self._compressor.flush()
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == BROTLI:
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+class CompressionMiddleware:
+    """
+    Class CompressionMiddleware
+
+    Pure ASGI response compression negotiated from Accept-Encoding (zstd,
+    br or gzip). Body chunks are held back until min_size bytes arrive, so
+    small responses go out untouched even when sent in several chunks; past
+    that every chunk is compressed and flushed at once, so streamed (NDJSON)
+    rows still reach the client as they are produced.
+    """
+
+    def __init__(self, app: ASGIApp, min_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.min_size = min_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get('accept-encoding', ''))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self.app, encoding, self.min_size)(scope, receive, send)
+
+
+class CompressionResponder:
+    """ Compression state of one response. """
+
+    def __init__(self, app: ASGIApp, encoding: str, min_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.min_size = min_size
+        self.send: Send = None
+        self.start: Optional[Message] = None
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.encoder: Optional[Encoder] = None
+        self.passthrough = False
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.wrapped_send)
+
+    async def wrapped_send(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            headers = Headers(raw=message['headers'])
+            compressible = headers.get('content-type', '').startswith(COMPRESSIBLE)
+            self.passthrough = any((
+                message['status'] in (204, 304),
+                'content-encoding' in headers,
+                not compressible,
+            ))
+            if self.passthrough:
+                await self.send(message)
+            else:
+                self.start = message
+            return
+
+        if self.passthrough or message['type'] != 'http.response.body':
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+
+        if self.encoder is None:
+            self.buffer.append(body)
+            self.buffered += len(body)
+            if self.buffered < self.min_size:
+                if not more_body:
+                    await self._send_identity(b''.join(self.buffer))
+                return
+            await self._start_encoding()
+            body = b''.join(self.buffer)
+            self.buffer = []
+
+        self.bytes_in += len(body)
+        data = self.encoder.compress(body)
+        data += self.encoder.flush() if more_body else self.encoder.finish()
+        self.bytes_out += len(data)
+        await self.send({'type': 'http.response.body', 'body': data, 'more_body': more_body})
+        if not more_body:
+            stats.record(self.encoding, self.bytes_in, self.bytes_out)
+
+    async def _send_identity(self, body: bytes) -> None:
+        """ Whole body below min_size: send it as it is. """
+        MutableHeaders(raw=self.start['headers']).add_vary_header('accept-encoding')
+        await self.send(self.start)
+        await self.send({'type': 'http.response.body', 'body': body})
+
+    async def _start_encoding(self) -> None:
+        headers = MutableHeaders(raw=self.start['headers'])
+        self.encoder = Encoder(self.encoding, level(self.encoding, headers.get('content-type', '')))
+        del headers['content-length']
+        headers['content-encoding'] = self.encoding
+        headers.add_vary_header('accept-encoding')
+        await self.send(self.start)
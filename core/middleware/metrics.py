@@ -0,0 +1,50 @@
+""" Metrics """
+import time
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics.instruments import REQUEST_SECONDS, REQUESTS_IN_FLIGHT, RESPONSE_BYTES
+
+UNMATCHED = 'unmatched'
+
+
+class MetricsMiddleware:
+    """
+    Class MetricsMiddleware
+
+    Pure ASGI middleware recording in-flight requests, request duration and
+    response bytes per route template (the matched path, never the raw URL,
+    to keep the label set small).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        size = 0
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body':
+                size += len(message.get('body', b''))
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the (shared) scope
+            route = getattr(scope.get('route'), 'path', UNMATCHED)
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - start, route=route, method=scope['method'], status=str(status)
+            )
+            RESPONSE_BYTES.observe(size, route=route)
@@ -0,0 +1,57 @@
+""" Profiling """
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.profiling.profiler import Profile, acquire, authorized, current_profile, release
+
+PROFILE_HEADER = 'x-profile'
+DENIED = 'denied'
+RATE_LIMITED = 'rate-limited'
+
+
+class ProfilingMiddleware:
+    """
+    Class ProfilingMiddleware
+
+    Pure ASGI middleware running a request under the sampling profiler when it
+    carries X-Profile: <PROFILE_TOKEN>. The response's X-Profile header holds
+    the profile id, downloadable from /profiles/{id} once the body is sent, or
+    denied / rate-limited, in which case the request runs unprofiled.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        token = Headers(scope=scope).get(PROFILE_HEADER) if scope['type'] == 'http' else None
+        if token is None:
+            await self.app(scope, receive, send)
+            return
+
+        if not authorized(token):
+            await self.app(scope, receive, self.sender(send, DENIED))
+            return
+        if not acquire():
+            await self.app(scope, receive, self.sender(send, RATE_LIMITED))
+            return
+
+        profile = Profile()
+        context = current_profile.set(profile)
+        try:
+            profile.start()
+            try:
+                await self.app(scope, receive, self.sender(send, profile.id))
+            finally:
+                profile.stop()
+                profile.save()
+        finally:
+            current_profile.reset(context)
+            release()
+
+    @staticmethod
+    def sender(send: Send, value: str) -> Send:
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                MutableHeaders(scope=message)['X-Profile'] = value
+            await send(message)
+        return send_wrapper
@@ -0,0 +1,42 @@
+""" Timing """
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core.metrics import timing
+
+
+class ServerTimingMiddleware:
+    """
+    Class ServerTimingMiddleware
+
+    Pure ASGI middleware opening the request's phase timing context and adding
+    Server-Timing (auth, wait, upstream, parse, validate, serialize, total)
+    and X-Process-Time to the response headers. The headers leave before a
+    streamed body, so for streams they cover the work done until then.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            if message['type'] == 'http.response.start':
+                process_time = time.perf_counter() - start
+                headers = MutableHeaders(scope=message)
+                headers.append('Server-Timing', timing.header(process_time))
+                headers['X-Process-Time'] = f'{process_time:0.4f} sec'
+            await send(message)
+
+        token = timing.begin()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            timing.end(token)
@@ -0,0 +1,240 @@
+""" Profiler
+
+Sampling profiler for a single request, stdlib only. A thread samples the
+request's asyncio tasks every PROFILE_INTERVAL seconds: the real stack of the
+event loop thread while one of them runs, otherwise the chain of coroutines
+each task is suspended in (awaiting upstream, a rate-limit sleep, gather).
+The samples are written as collapsed stacks ("frame;frame;frame count"),
+the input of flamegraph.pl, speedscope and inferno. A task counts once per
+sample, so n gathered tasks weigh n times one task.
+"""
+import asyncio
+import gc
+import hmac
+import inspect
+import os
+import re
+import secrets
+import sys
+import sysconfig
+import threading
+import time
+import weakref
+from collections import Counter
+from contextvars import ContextVar
+from types import CodeType, FrameType
+from typing import Any, List, Optional
+
+from loguru import logger as log
+
+from core.util.persistent_cache import CACHE_DIR
+
+# Secret of the X-Profile header; profiling is disabled while unset
+PROFILE_TOKEN = os.getenv('PROFILE_TOKEN', '')
+PROFILE_DIR = os.getenv('PROFILE_DIR', os.path.join(CACHE_DIR, 'profiles'))
+PROFILE_INTERVAL = float(os.getenv('PROFILE_INTERVAL', '0.005'))
+PROFILE_MAX_SECONDS = float(os.getenv('PROFILE_MAX_SECONDS', '120'))
+# Seconds between the start of two profiles; one runs at a time
+PROFILE_MIN_INTERVAL = float(os.getenv('PROFILE_MIN_INTERVAL', '60'))
+PROFILE_KEEP = int(os.getenv('PROFILE_KEEP', '20'))
+
+PROFILE_ID = re.compile(r'^[0-9a-f]{16}$')
+EXTENSION = '.folded'
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+STDLIB = sysconfig.get_paths()['stdlib']
+ASYNC_GENERATOR_AWAITABLES = ('async_generator_asend', 'async_generator_athrow')
+
+# Profile of the request running in this context, inherited by its tasks
+current_profile: ContextVar[Optional['Profile']] = ContextVar('current_profile', default=None)
+
+_lock = threading.Lock()
+_running = False
+_last_start = 0.0
+
+
+def authorized(token: str) -> bool:
+    return bool(PROFILE_TOKEN) and hmac.compare_digest(token.encode(), PROFILE_TOKEN.encode())
+
+
+def acquire() -> bool:
+    """Allow one profile at a time and at most one per PROFILE_MIN_INTERVAL."""
+    global _running, _last_start  # pylint: disable=global-statement
+    with _lock:
+        now = time.monotonic()
+        if _running or (_last_start and now - _last_start < PROFILE_MIN_INTERVAL):
+            return False
+        _running, _last_start = True, now
+        return True
+
+
+def release() -> None:
+    global _running  # pylint: disable=global-statement
+    with _lock:
+        _running = False
+
+
+def label(code: CodeType) -> str:
+    path = code.co_filename
+    if 'site-packages' + os.sep in path:
+        path = path.split('site-packages' + os.sep)[-1]
+    elif path.startswith(STDLIB):
+        path = os.path.relpath(path, STDLIB)
+    elif path.startswith(ROOT):
+        path = os.path.relpath(path, ROOT)
+    return f'{code.co_qualname} ({path}:{code.co_firstlineno})'.replace(';', ',')
+
+
+def await_chain(awaitable: Any) -> List[str]:
+    """Frames of a suspended coroutine and of everything it awaits, outermost first."""
+    stack = []
+    while awaitable is not None:
+        frame = next((
+            getattr(awaitable, name) for name in ('cr_frame', 'gi_frame', 'ag_frame')
+            if getattr(awaitable, name, None) is not None
+        ), None)
+        if frame is not None:
+            stack.append(label(frame.f_code))
+        awaited = next((
+            getattr(awaitable, name) for name in ('cr_await', 'gi_yieldfrom', 'ag_await')
+            if getattr(awaitable, name, None) is not None
+        ), None)
+        if awaited is None and type(awaitable).__name__ in ASYNC_GENERATOR_AWAITABLES:
+            # `async for` awaits an asend object, which only the GC knows the generator of
+            awaited = next(
+                (item for item in gc.get_referents(awaitable) if inspect.isasyncgen(item)), None
+            )
+        if awaited is None and frame is None:
+            # A future's __await__ iterator: the task waits on I/O, a timer or another task
+            name = type(awaitable).__name__
+            stack.append(f"[await {'Future' if name == 'FutureIter' else name}]")
+        awaitable = awaited
+    return stack
+
+
+def thread_stack(frame: FrameType, root: Optional[CodeType]) -> List[str]:
+    """Frames of a running thread, from the task's coroutine (when found) down."""
+    frames = []
+    while frame is not None:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    start = next((index for index, item in enumerate(frames) if item.f_code is root), 0)
+    return [label(item.f_code) for item in frames[start:]]
+
+
+class Profile:
+    """
+    Class Profile
+    :param interval: seconds between samples
+    :param max_seconds: sampling stops after this long
+    """
+
+    def __init__(
+        self, interval: float = PROFILE_INTERVAL, max_seconds: float = PROFILE_MAX_SECONDS
+    ):
+        self.id = secrets.token_hex(8)
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._tasks: 'weakref.WeakSet[asyncio.Task]' = weakref.WeakSet()
+        self._tasks_lock = threading.Lock()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'profile-{self.id}', daemon=True)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id = 0
+        self._factory = None
+
+    @property
+    def path(self) -> str:
+        return os.path.join(PROFILE_DIR, f'{self.id}{EXTENSION}')
+
+    def start(self) -> None:
+        """Profile the current task and the tasks it creates; call from the request task."""
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._add(asyncio.current_task())
+        self._factory = self._loop.get_task_factory()
+        self._loop.set_task_factory(self._create_task)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._done.set()
+        self._thread.join()
+        if self._loop.get_task_factory() == self._create_task:
+            self._loop.set_task_factory(self._factory)
+
+    def _add(self, task: asyncio.Task) -> None:
+        with self._tasks_lock:
+            self._tasks.add(task)
+
+    def _create_task(self, loop, coro, context=None):
+        if self._factory is not None:
+            if context is None:
+                task = self._factory(loop, coro)
+            else:
+                task = self._factory(loop, coro, context=context)
+        else:
+            task = asyncio.Task(coro, loop=loop, context=context)
+        profile = context.get(current_profile) if context is not None else current_profile.get()
+        if profile is self:
+            self._add(task)
+        return task
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.max_seconds
+        while not self._done.wait(self.interval) and time.monotonic() < deadline:
+            self.sample()
+
+    def sample(self) -> None:
+        with self._tasks_lock:
+            tasks = list(self._tasks)
+        running = asyncio.current_task(self._loop)
+        frame = sys._current_frames().get(self._thread_id)  # pylint: disable=protected-access
+        for task in tasks:
+            if task.done():
+                continue
+            coro = task.get_coro()
+            try:
+                if task is running and frame is not None:
+                    stack = thread_stack(frame, getattr(coro, 'cr_code', None))
+                else:
+                    stack = await_chain(coro)
+            except (AttributeError, ValueError):
+                # The task moved on while it was being read
+                continue
+            if stack:
+                self.stacks[';'.join(stack)] += 1
+        self.samples += 1
+
+    def save(self) -> str:
+        """Write the collapsed stacks and drop the oldest profiles beyond PROFILE_KEEP."""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            for stack, count in sorted(self.stacks.items()):
+                file.write(f'{stack} {count}\n')
+        os.replace(tmp_path, self.path)
+
+        profiles = sorted(
+            (entry for entry in os.scandir(PROFILE_DIR) if entry.name.endswith(EXTENSION)),
+            key=lambda entry: entry.stat().st_mtime, reverse=True
+        )
+        for entry in profiles[PROFILE_KEEP:]:
+            try:
+                os.remove(entry.path)
+            except OSError as e:
+                log.warning(f"Could not remove profile {entry.path}: {e}")
+        log.info(
+            f"Profile {self.id}: {self.samples} samples, {len(self.stacks)} stacks in {self.path}"
+        )
+        return self.path
+
+
+def profile_path(profile_id: str) -> Optional[str]:
+    """Path of a stored profile, None for an unknown or malformed id."""
+    if not PROFILE_ID.match(profile_id):
+        return None
+    path = os.path.join(PROFILE_DIR, f'{profile_id}{EXTENSION}')
+    return path if os.path.exists(path) else None
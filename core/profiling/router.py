@@ -0,0 +1,16 @@
+""" Router """
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse
+
+from core.profiling.profiler import profile_path
+
+router = APIRouter()
+
+
+@router.get('/profiles/{profile_id}', include_in_schema=False)
+async def profile(profile_id: str) -> FileResponse:
+    """Collapsed stacks of a profiled request (flamegraph.pl, speedscope)."""
+    path = profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type='text/plain', filename=f'{profile_id}.folded')
@@ -0,0 +1,158 @@
+""" Columnar """
+import json
+import struct
+import sys
+import zlib
+from array import array
+from typing import Any, Dict, List, Tuple
+
+MAGIC = b'SNP1'
+LEVEL = 6
+
+# Column kinds:
+#   int    integers (array 'q')
+#   cents  money, stored as integer cents
+#   delta  integers stored as differences from the previous value (timestamps)
+#   bool   0/1 flags (array 'b')
+#   dict   repeated strings: a table of distinct values plus one code per row
+INT, CENTS, DELTA, BOOL, DICT = 'int', 'cents', 'delta', 'bool', 'dict'
+
+
+def _pack(values: array) -> bytes:
+    return zlib.compress(values.tobytes(), LEVEL)
+
+
+def _unpack(typecode: str, blob: bytes, byteorder: str) -> array:
+    values = array(typecode)
+    values.frombytes(zlib.decompress(blob))
+    if byteorder != sys.byteorder:
+        values.byteswap()
+    return values
+
+
+def _codes_typecode(size: int) -> str:
+    """Smallest unsigned array type able to index a dictionary of size values."""
+    if size <= 0xFF:
+        return 'B'
+    if size <= 0xFFFF:
+        return 'H'
+    return 'I'
+
+
+def encode_column(kind: str, values: List[Any]) -> Tuple[Dict[str, Any], List[bytes]]:
+    """
+    Function Encode Column
+    :param kind: column kind
+    :param values: one value per row
+    :return: (column header, blobs)
+    """
+    if kind == DICT:
+        table: Dict[str, int] = {}
+        codes = [
+            table.setdefault('' if value is None else str(value), len(table)) for value in values
+        ]
+        typecode = _codes_typecode(len(table))
+        blobs = [
+            zlib.compress(json.dumps(list(table), ensure_ascii=False).encode(), LEVEL),
+            _pack(array(typecode, codes)),
+        ]
+        return {'typecode': typecode, 'distinct': len(table)}, blobs
+
+    if kind == BOOL:
+        return {'typecode': 'b'}, [_pack(array('b', (1 if value else 0 for value in values)))]
+
+    if kind == CENTS:
+        ints = [round((value or 0) * 100) for value in values]
+    else:
+        ints = [int(value or 0) for value in values]
+    if kind == DELTA:
+        ints = [value - previous for value, previous in zip(ints, [0] + ints[:-1])]
+    return {'typecode': 'q'}, [_pack(array('q', ints))]
+
+
+def decode_column(column: Dict[str, Any], blobs: List[bytes], byteorder: str) -> List[Any]:
+    """
+    Function Decode Column
+    :param column: column header
+    :param blobs: column blobs
+    :param byteorder: byte order of the writer
+    :return: one value per row
+    """
+    kind = column['kind']
+    if kind == DICT:
+        table = json.loads(zlib.decompress(blobs[0]))
+        return [table[code] for code in _unpack(column['typecode'], blobs[1], byteorder)]
+
+    values = _unpack(column['typecode'], blobs[0], byteorder)
+    if kind == BOOL:
+        return [bool(value) for value in values]
+    if kind == CENTS:
+        return [value / 100 for value in values]
+    if kind == DELTA:
+        total, decoded = 0, []
+        for value in values:
+            total += value
+            decoded.append(total)
+        return decoded
+    return values.tolist()
+
+
+def dumps(schema: Dict[str, str], rows: List[Dict[str, Any]], meta: Dict[str, Any] = None) -> bytes:
+    """
+    Function Dumps
+    Layout: MAGIC, uint32 header length, JSON header, column blobs.
+    :param schema: column name -> kind
+    :param rows: records with every schema column
+    :param meta: free-form metadata stored in the header
+    :return: encoded partition file
+    """
+    columns, body = [], []
+    for name, kind in schema.items():
+        column, blobs = encode_column(kind, [row.get(name) for row in rows])
+        column.update(name=name, kind=kind, sizes=[len(blob) for blob in blobs])
+        columns.append(column)
+        body.extend(blobs)
+
+    header = json.dumps({
+        'rows': len(rows),
+        'byteorder': sys.byteorder,
+        'columns': columns,
+        'meta': meta or {},
+    }).encode()
+    return MAGIC + struct.pack('<I', len(header)) + header + b''.join(body)
+
+
+def read_header(data: bytes) -> Tuple[Dict[str, Any], int]:
+    """
+    Function Read Header
+    :param data: encoded partition file
+    :return: (header, offset of the first blob)
+    """
+    if data[:4] != MAGIC:
+        raise ValueError('Not a snapshot file')
+    (size,) = struct.unpack('<I', data[4:8])
+    return json.loads(data[8:8 + size]), 8 + size
+
+
+def loads(data: bytes, columns: List[str] = None) -> List[Dict[str, Any]]:
+    """
+    Function Loads
+    :param data: encoded partition file
+    :param columns: only decode these columns (all when omitted)
+    :return: records
+    """
+    header, offset = read_header(data)
+    decoded: Dict[str, List[Any]] = {}
+    for column in header['columns']:
+        blobs = []
+        for size in column['sizes']:
+            blobs.append(data[offset:offset + size])
+            offset += size
+        if columns is None or column['name'] in columns:
+            decoded[column['name']] = decode_column(column, blobs, header['byteorder'])
+
+    names = list(decoded)
+    return [
+        dict(zip(names, values))
+        for values in zip(*(decoded[name] for name in names))
+    ] if names else [{} for _ in range(header['rows'])]
@@ -0,0 +1,198 @@
+""" Delta Index """
+import os
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    snapshot_id TEXT NOT NULL UNIQUE,
+    provider TEXT NOT NULL,
+    taken_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS latest (
+    provider TEXT NOT NULL,
+    store TEXT NOT NULL,
+    sku TEXT NOT NULL,
+    seller TEXT NOT NULL,
+    ean INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    price_from INTEGER NOT NULL,
+    price_to INTEGER NOT NULL,
+    discount INTEGER NOT NULL,
+    available INTEGER NOT NULL,
+    previous_price_from INTEGER,
+    previous_price_to INTEGER,
+    previous_available INTEGER,
+    seen_seq INTEGER NOT NULL,
+    changed_seq INTEGER NOT NULL,
+    changed_at REAL NOT NULL,
+    PRIMARY KEY (provider, store, sku, seller)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS latest_changed_seq ON latest (provider, store, changed_seq);
+CREATE INDEX IF NOT EXISTS latest_changed_at ON latest (provider, store, changed_at);
+"""
+
+# An existing row only moves its changed_* columns when a tracked value differs
+UPSERT = """
+INSERT INTO latest (
+    provider, store, sku, seller, ean, category, price_from, price_to, discount,
+    available, seen_seq, changed_seq, changed_at
+) VALUES (
+    :provider, :store, :sku, :seller, :ean, :category, :price_from, :price_to, :discount,
+    :available, :seq, :seq, :timestamp
+)
+ON CONFLICT (provider, store, sku, seller) DO UPDATE SET
+    previous_price_from = CASE WHEN {changed} THEN price_from ELSE previous_price_from END,
+    previous_price_to = CASE WHEN {changed} THEN price_to ELSE previous_price_to END,
+    previous_available = CASE WHEN {changed} THEN available ELSE previous_available END,
+    changed_seq = CASE WHEN {changed} THEN excluded.changed_seq ELSE changed_seq END,
+    changed_at = CASE WHEN {changed} THEN excluded.changed_at ELSE changed_at END,
+    price_from = excluded.price_from,
+    price_to = excluded.price_to,
+    discount = excluded.discount,
+    available = excluded.available,
+    ean = excluded.ean,
+    category = excluded.category,
+    seen_seq = excluded.seen_seq
+WHERE excluded.seen_seq > latest.seen_seq
+""".format(changed=(
+    "(price_from != excluded.price_from OR price_to != excluded.price_to "
+    "OR discount != excluded.discount OR available != excluded.available)"
+))
+
+
+class DeltaIndex:
+    """
+    Class DeltaIndex
+
+    Latest known price of every (provider, store, sku, seller) in sqlite, with
+    the snapshot and time it last changed. Loading a snapshot is one primary
+    key upsert per row; a delta query reads the (provider, store, changed_*)
+    index instead of comparing snapshot files.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+
+    def empty(self) -> bool:
+        """ True when no snapshot was indexed yet. """
+        with self._lock:
+            return self._db.execute('SELECT 1 FROM snapshots LIMIT 1').fetchone() is None
+
+    def seq(self, snapshot_id: str) -> Optional[int]:
+        """
+        Function Seq
+        :param snapshot_id:
+        :return: load order of the snapshot or None when unknown
+        """
+        with self._lock:
+            row = self._db.execute(
+                'SELECT seq FROM snapshots WHERE snapshot_id = ?', (snapshot_id,)
+            ).fetchone()
+        return row['seq'] if row else None
+
+    def add(
+        self,
+        provider: str,
+        snapshot_id: str,
+        taken_at: float,
+        records: List[Dict[str, Any]]
+    ) -> None:
+        """
+        Load the records of a snapshot. Snapshots loaded twice are ignored.
+        :param provider:
+        :param snapshot_id:
+        :param taken_at: epoch seconds
+        :param records: normalized records (prices in currency units)
+        """
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                cursor = self._db.execute(
+                    'INSERT OR IGNORE INTO snapshots (snapshot_id, provider, taken_at) '
+                    'VALUES (?, ?, ?)',
+                    (snapshot_id, provider, taken_at)
+                )
+                if cursor.rowcount == 0:
+                    self._db.execute('ROLLBACK')
+                    return
+                seq = cursor.lastrowid
+                self._db.executemany(UPSERT, (
+                    {
+                        **record,
+                        'provider': provider,
+                        'seq': seq,
+                        'price_from': round(record['price_from'] * 100),
+                        'price_to': round(record['price_to'] * 100),
+                        'available': 1 if record['available'] else 0,
+                    }
+                    for record in records
+                ))
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def delta(
+        self,
+        provider: str,
+        store: str,
+        category: Optional[str] = None,
+        since: Optional[float] = None,
+        after_seq: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 1000
+    ) -> Dict[str, Any]:
+        """
+        Rows of a store whose price, discount or availability changed after
+        a point in time or after a snapshot.
+        :param provider:
+        :param store:
+        :param category: only this category
+        :param since: epoch seconds
+        :param after_seq: load order of a snapshot (see seq)
+        :param offset: first row
+        :param limit: maximum rows
+        :return: {'items': total changed rows, 'data': rows}
+        """
+        column, value = ('changed_seq', after_seq) if after_seq is not None \
+            else ('changed_at', since or 0)
+        where = f'latest.provider = ? AND latest.store = ? AND latest.{column} > ?'
+        args: list = [provider, store, value]
+        if category is not None:
+            where += ' AND latest.category = ?'
+            args.append(category)
+
+        with self._lock:
+            items = self._db.execute(
+                f'SELECT COUNT(*) FROM latest WHERE {where}', args
+            ).fetchone()[0]
+            rows = self._db.execute(
+                f'SELECT latest.*, snapshots.snapshot_id FROM latest '
+                f'JOIN snapshots ON snapshots.seq = latest.changed_seq '
+                f'WHERE {where} ORDER BY latest.{column}, latest.sku, latest.seller '
+                f'LIMIT ? OFFSET ?',
+                [*args, limit, offset]
+            ).fetchall()
+
+        data = []
+        for row in rows:
+            item = dict(row)
+            for key in ('price_from', 'price_to', 'previous_price_from', 'previous_price_to'):
+                if item[key] is not None:
+                    item[key] = item[key] / 100
+            for key in ('available', 'previous_available'):
+                if item[key] is not None:
+                    item[key] = bool(item[key])
+            del item['seen_seq'], item['changed_seq']
+            data.append(item)
+        return {'items': items, 'data': data}
@@ -0,0 +1,112 @@
+""" Normalize """
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from core.snapshots.columnar import BOOL, CENTS, DELTA, DICT, INT
+
+# Columns kept for every provider, in file order
+SCHEMA: Dict[str, str] = {
+    'timestamp': DELTA,
+    'store': DICT,
+    'sku': DICT,
+    'ean': INT,
+    'category': DICT,
+    'seller': DICT,
+    'price_from': CENTS,
+    'price_to': CENTS,
+    'discount': INT,
+    'available': BOOL,
+}
+
+Normalizer = Callable[[Dict[str, Any], Dict[str, Any]], Dict[str, Any]]
+
+NORMALIZERS: Dict[str, Normalizer] = {}
+
+
+def normalizer(provider: str) -> Callable[[Normalizer], Normalizer]:
+    """Register the row normalizer of a provider."""
+    def register(func: Normalizer) -> Normalizer:
+        NORMALIZERS[provider] = func
+        return func
+    return register
+
+
+def timestamp(row: Dict[str, Any]) -> int:
+    """Epoch seconds of the created_at/hour pair every assortment row carries."""
+    try:
+        return int(datetime.fromisoformat(f"{row['created_at']}T{row['hour']}").timestamp())
+    except (KeyError, TypeError, ValueError):
+        return int(datetime.now().timestamp())
+
+
+def record(row: Dict[str, Any], **fields) -> Dict[str, Any]:
+    """Snapshot record with the fields shared by every provider."""
+    return {
+        'timestamp': timestamp(row),
+        'sku': str(row.get('sku') or ''),
+        'ean': int(row.get('ean') or 0),
+        'seller': '',
+        'price_from': float(row.get('price_from') or 0),
+        'price_to': float(row.get('price_to') or 0),
+        'discount': int(row.get('discount') or 0),
+        'available': row.get('available') == 'S',
+        **fields
+    }
+
+
+@normalizer('vtex')
+def vtex(row: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    return record(
+        row,
+        store=params.get('alias', ''),
+        category=f"{row.get('department_id')}/{row.get('category_id')}",
+        seller=row.get('seller_name') or '',
+    )
+
+
+@normalizer('ifood')
+def ifood(row: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    return record(
+        row,
+        store=row.get('store_id') or params.get('store_id', ''),
+        category=row.get('department') or '',
+        available=row.get('availability') == 'S',
+    )
+
+
+@normalizer('osuper')
+def osuper(row: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    return record(
+        row,
+        store=f"{params.get('domain', '')}/{row.get('store_id')}",
+        category=row.get('search_term') or '',
+    )
+
+
+@normalizer('vipcommerce')
+def vipcommerce(row: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    return record(
+        row,
+        store=f"{params.get('domain', '')}/{row.get('branch_id')}/"
+              f"{row.get('distribution_center_id')}",
+        category=str(row.get('category_id') or ''),
+    )
+
+
+@normalizer('tendaatacado')
+def tendaatacado(row: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    return record(
+        row,
+        store='tendaatacado',
+        category=row.get('search_term') or '',
+    )
+
+
+@normalizer('uber_eats')
+def uber_eats(row: Dict[str, Any], params: Dict[str, Any]) -> Dict[str, Any]:
+    return record(
+        row,
+        store=row.get('store_id') or params.get('store_id', ''),
+        sku=str(row.get('product_id') or ''),
+        category=row.get('category') or '',
+    )
@@ -0,0 +1,186 @@
+""" Snapshot Store """
+import os
+import struct
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from loguru import logger as log
+
+from core.snapshots import columnar
+from core.snapshots.index import DeltaIndex
+from core.snapshots.normalize import NORMALIZERS, SCHEMA
+from core.util.persistent_cache import CACHE_DIR
+
+SNAPSHOT_DIR = os.getenv('SNAPSHOT_DIR', os.path.join(CACHE_DIR, 'snapshots'))
+EXTENSION = '.snp'
+
+
+class SnapshotStore:
+    """
+    Class SnapshotStore
+
+    Price snapshots on local disk, one columnar file per crawl, partitioned
+    as <directory>/<provider>/<YYYY-MM-DD>/<snapshot_id>.snp. Rows are
+    normalized to SCHEMA; store, sku, category and seller are dictionary
+    encoded and prices are kept as integer cents. Every snapshot written is
+    also loaded into the DeltaIndex, which answers price-change queries.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or SNAPSHOT_DIR
+        self._index: Optional[DeltaIndex] = None
+
+    @property
+    def index(self) -> DeltaIndex:
+        """Delta index, opened on first use and rebuilt from the files when empty."""
+        if self._index is None:
+            self._index = DeltaIndex(os.path.join(self.directory, 'index.sqlite3'))
+            if self._index.empty():
+                self.reindex()
+        return self._index
+
+    def reindex(self) -> None:
+        """Load every snapshot file into the delta index, oldest first."""
+        for meta in self.list():
+            path = self._path(meta['provider'], meta['date'], meta['snapshot_id'])
+            with open(path, 'rb') as file:
+                records = columnar.loads(file.read())
+            self._index.add(meta['provider'], meta['snapshot_id'], meta['taken_at'], records)
+
+    def _path(self, provider: str, date: str, snapshot_id: str) -> str:
+        return os.path.join(self.directory, provider, date, f'{snapshot_id}{EXTENSION}')
+
+    def write(
+        self,
+        provider: str,
+        rows: List[Dict[str, Any]],
+        params: Optional[Dict[str, Any]] = None,
+        snapshot_id: Optional[str] = None,
+        taken_at: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Function Write
+        :param provider: provider key (see normalize.NORMALIZERS)
+        :param rows: assortment rows as produced by the provider
+        :param params: crawl parameters (fill in fields some rows lack, e.g. the store)
+        :param snapshot_id: defaults to a new uuid
+        :param taken_at: epoch seconds of the snapshot, defaults to now
+        :return: snapshot metadata
+        """
+        normalize = NORMALIZERS[provider]
+        params = params or {}
+        records = sorted(
+            (normalize(row, params) for row in rows),
+            key=lambda item: (item['store'], item['sku'], item['seller'])
+        )
+        snapshot_id = snapshot_id or uuid.uuid4().hex
+        taken_at = taken_at or time.time()
+        date = datetime.fromtimestamp(taken_at).strftime('%Y-%m-%d')
+        meta = {
+            'snapshot_id': snapshot_id,
+            'provider': provider,
+            'date': date,
+            'taken_at': taken_at,
+        }
+
+        data = columnar.dumps(SCHEMA, records, meta)
+        path = self._path(provider, date, snapshot_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as file:
+            file.write(data)
+        os.replace(tmp_path, path)
+        self.index.add(provider, snapshot_id, taken_at, records)
+        log.info(
+            f"Snapshot {provider}/{date}/{snapshot_id}: {len(records)} rows, {len(data)} bytes"
+        )
+        return {**meta, 'rows': len(records), 'size': len(data)}
+
+    @staticmethod
+    def _header(path: str) -> Dict[str, Any]:
+        with open(path, 'rb') as file:
+            prefix = file.read(8)
+            (size,) = struct.unpack('<I', prefix[4:8])
+            header, _ = columnar.read_header(prefix + file.read(size))
+        return {**header['meta'], 'rows': header['rows'], 'size': os.path.getsize(path)}
+
+    def list(
+        self,
+        provider: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Function List
+        :param provider: only this provider
+        :param date_from: first partition date (YYYY-MM-DD)
+        :param date_to: last partition date (YYYY-MM-DD)
+        :return: snapshot metadata, oldest first
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        providers = [provider] if provider else sorted(os.listdir(self.directory))
+        found = []
+        for name in providers:
+            base = os.path.join(self.directory, name)
+            if not os.path.isdir(base):
+                continue
+            for date in sorted(os.listdir(base)):
+                if (date_from and date < date_from) or (date_to and date > date_to):
+                    continue
+                for file_name in os.listdir(os.path.join(base, date)):
+                    if file_name.endswith(EXTENSION):
+                        found.append(self._header(os.path.join(base, date, file_name)))
+        return sorted(found, key=lambda item: item['taken_at'])
+
+    def get(self, provider: str, snapshot_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Function Get
+        :param provider:
+        :param snapshot_id:
+        :return: snapshot metadata or None
+        """
+        if provider not in NORMALIZERS or not snapshot_id.isalnum():
+            return None
+        base = os.path.join(self.directory, provider)
+        if not os.path.isdir(base):
+            return None
+        for date in os.listdir(base):
+            path = self._path(provider, date, snapshot_id)
+            if os.path.exists(path):
+                return self._header(path)
+        return None
+
+    def read(
+        self,
+        provider: str,
+        snapshot_id: str,
+        store: Optional[str] = None,
+        columns: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Function Read
+        :param provider:
+        :param snapshot_id:
+        :param store: only rows of this store
+        :param columns: only these columns
+        :return: records
+        """
+        meta = self.get(provider, snapshot_id)
+        if meta is None:
+            return []
+        with open(self._path(provider, meta['date'], snapshot_id), 'rb') as file:
+            data = file.read()
+        wanted = None if columns is None else list({*columns, 'store'})
+        rows = columnar.loads(data, wanted)
+        if store is not None:
+            rows = [row for row in rows if row['store'] == store]
+        if columns is not None and 'store' not in columns:
+            for row in rows:
+                del row['store']
+        return rows
+
+
+snapshots = SnapshotStore()
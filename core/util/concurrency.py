@@ -0,0 +1,26 @@
+""" Concurrency """
+import asyncio
+import os
+from typing import Dict, Optional
+
+# Maximum concurrent requests against one upstream host, across every crawl
+HOST_CONCURRENCY = int(os.getenv('HOST_CONCURRENCY', '8'))
+
+_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def host_semaphore(host: str, limit: Optional[int] = None) -> asyncio.Semaphore:
+    """
+    Function Host Semaphore
+    Shared per-host request budget: every caller naming the same host draws
+    from one semaphore, so the load on the host stays bounded however many
+    crawls run. The size is fixed by configuration when the semaphore is
+    created; a crawl's own concurrency is a separate semaphore acquired
+    alongside this one.
+    :param host: upstream host (or any budget key, e.g. a provider name)
+    :param limit: budget size, HOST_CONCURRENCY when not given
+    :return: asyncio.Semaphore
+    """
+    if host not in _semaphores:
+        _semaphores[host] = asyncio.Semaphore(max(1, limit or HOST_CONCURRENCY))
+    return _semaphores[host]
@@ -0,0 +1,87 @@
+""" Dispatch """
+import json
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import status
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from starlette.exceptions import HTTPException
+from starlette.types import ASGIApp
+
+
+def request_scope(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    scope: Optional[dict] = None
+) -> dict:
+    """
+    Function Request Scope
+    :param path: route path
+    :param params: query parameters; None values are left out
+    :param scope: scope of the calling request (server/client/app are reused)
+    :return: ASGI scope of a GET request with a JSON Accept header
+    """
+    scope = scope or {}
+    query_string = urlencode(
+        {key: value for key, value in (params or {}).items() if value is not None},
+        doseq=True
+    ).encode()
+    result = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': scope.get('scheme', 'http'),
+        'server': scope.get('server'),
+        'client': scope.get('client'),
+        'root_path': '',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string,
+        'headers': [(b'accept', b'application/json')],
+    }
+    if 'app' in scope:
+        result['app'] = scope['app']
+    return result
+
+
+async def dispatch(
+    app: ASGIApp,
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    scope: Optional[dict] = None
+) -> Tuple[int, Any]:
+    """
+    Function Dispatch
+    Run a GET request against an ASGI router in-process, so the route's own
+    validation, dependencies and handler are reused without going through the
+    network, the HTTP middlewares or the API key check again.
+    :param app: router (or application) to dispatch into
+    :param path: route path, e.g. /vtex/market/department
+    :param params: query parameters
+    :param scope: scope of the calling request (server/client/app are reused)
+    :return: (status_code, decoded body)
+    """
+    response: Dict[str, Any] = {'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'body': b''}
+
+    async def receive() -> dict:
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message: dict) -> None:
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+        elif message['type'] == 'http.response.body':
+            response['body'] += message.get('body', b'')
+
+    try:
+        await app(request_scope(path, params, scope), receive, send)
+    except HTTPException as e:
+        return e.status_code, {'detail': e.detail}
+    except RequestValidationError as e:
+        return status.HTTP_422_UNPROCESSABLE_ENTITY, {'detail': jsonable_encoder(e.errors())}
+
+    try:
+        return response['status'], json.loads(response['body'] or b'null')
+    except ValueError:
+        return response['status'], response['body'].decode(errors='replace')
@@ -0,0 +1,58 @@
+""" Fields """
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, create_model
+
+Fields = Optional[FrozenSet[str]]
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Fields:
+    """
+    Function Parse Fields
+    :param fields: comma separated field names, e.g. "ean,sku,price_to"
+    :param model: row model the names must belong to
+    :return: the requested names or None for every field
+    """
+    if not fields:
+        return None
+    names = frozenset(name.strip() for name in fields.split(',') if name.strip())
+    unknown = names - set(model.model_fields)
+    if unknown:
+        raise HTTPException(
+            detail=f"Unknown fields: {', '.join(sorted(unknown))}. "
+                   f"Available: {', '.join(model.model_fields)}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+    return names
+
+
+def wants(fields: Fields, *names: str) -> bool:
+    """True when any of the names was requested (or every field was)."""
+    return fields is None or not fields.isdisjoint(names)
+
+
+@lru_cache(maxsize=256)
+def partial_model(model: Type[BaseModel], fields: FrozenSet[str]) -> Type[BaseModel]:
+    """Model with only the given fields of model, same types and order."""
+    return create_model(
+        f'{model.__name__}Partial',
+        **{
+            name: (info.annotation, info)
+            for name, info in model.model_fields.items() if name in fields
+        }
+    )
+
+
+def build(model: Type[BaseModel], fields: Fields, values: Dict[str, Any]) -> BaseModel:
+    """
+    Function Build
+    :param model: row model
+    :param fields: requested fields or None
+    :param values: row values; only the requested ones need to be present
+    :return: model, or its partial model when fields were requested
+    """
+    if fields is None:
+        return model(**values)
+    return partial_model(model, fields)(**{name: values[name] for name in fields if name in values})
@@ -4,6 +4,15 @@ from typing import Dict, List, Type, Union
 from schematics import Model
 from schematics.exceptions import DataError
 
+from core.metrics import timing
+from core.metrics.instruments import VALIDATION_SECONDS, timed
+
+
+def labels(cls: Type[Model]) -> Dict[str, str]:
+    """Metric labels of a provider model: src.<segment>.<provider>.models... -> provider."""
+    parts = cls.__module__.split('.')
+    return {'provider': parts[2] if len(parts) > 2 else parts[0], 'model': cls.__name__}
+
 
 def validate_and_parse_model(data: dict, cls: Type[Model]) -> Union[Dict, None]:
     """
@@ -12,12 +21,13 @@ def validate_and_parse_model(data: dict, cls: Type[Model]) -> Union[Dict, None]:
     :param cls:
     :return:
     """
-    try:
-        model = cls(data)
-        model.validate()
-        return model.to_primitive()
-    except DataError as e:
-        return e.messages
+    with timed(VALIDATION_SECONDS, phase=timing.VALIDATE, **labels(cls)):
+        try:
+            model = cls(data)
+            model.validate()
+            return model.to_primitive()
+        except DataError as e:
+            return e.messages
 
 
 def validate_and_parse_model_many(data: list, cls: Type[Model]) -> Union[List, None]:
@@ -27,12 +37,13 @@ def validate_and_parse_model_many(data: list, cls: Type[Model]) -> Union[List, N
     :param cls:
     :return:
     """
-    try:
-        data_list = []
-        for value in data:
-            model = cls(value)
-            model.validate()
-            data_list.append(model.to_primitive())
-        return data_list
-    except DataError as e:
-        return e.messages
+    with timed(VALIDATION_SECONDS, phase=timing.VALIDATE, **labels(cls)):
+        try:
+            data_list = []
+            for value in data:
+                model = cls(value)
+                model.validate()
+                data_list.append(model.to_primitive())
+            return data_list
+        except DataError as e:
+            return e.messages
@@ -0,0 +1,134 @@
+""" NDJSON """
+import json
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Iterable, List, Optional, Union
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
+from loguru import logger as log
+
+from core.metrics import timing
+from core.metrics.instruments import SERIALIZATION_SECONDS
+
+NDJSON = 'application/x-ndjson'
+
+Rows = Union[Iterable[Any], AsyncIterable[Any]]
+
+
+def accepts_ndjson(request: Request) -> bool:
+    """
+    Function Accepts NDJSON
+    :param request: incoming request
+    :return: True when the client asked for application/x-ndjson
+    """
+    return NDJSON in request.headers.get('accept', '')
+
+
+def encode(value: Any) -> str:
+    return json.dumps(jsonable_encoder(value), ensure_ascii=False, separators=(',', ':'))
+
+
+def dumps(value: Any) -> str:
+    """One NDJSON line."""
+    return encode(value) + '\n'
+
+
+def ndjson_response(
+    rows: Rows,
+    trailer: Optional[Callable[[], dict]] = None
+) -> StreamingResponse:
+    """
+    Function NDJSON Response
+    Stream one JSON row per line while the rows are produced, then a
+    {"pagination": {...}} trailer line. An error after the first byte can no
+    longer change the status code, so it is sent as a final {"error": ...} line.
+    :param rows: sync or async iterable of rows (pydantic models or dicts)
+    :param trailer: called after the last row; returns the pagination fields
+    :return: StreamingResponse
+    """
+    spent = 0.0
+
+    def line(value: Any) -> str:
+        nonlocal spent
+        start = time.perf_counter()
+        try:
+            return dumps(value)
+        finally:
+            spent += time.perf_counter() - start
+
+    async def lines():
+        try:
+            if hasattr(rows, '__aiter__'):
+                async for row in rows:
+                    yield line(row)
+            else:
+                for row in rows:
+                    yield line(row)
+            if trailer is not None:
+                yield line({'pagination': trailer()})
+        except Exception as e:
+            log.exception("Error while streaming rows")
+            yield dumps({'error': str(e)})
+        finally:
+            SERIALIZATION_SECONDS.observe(spent, format='ndjson')
+            # After the headers: only the ndjson metric sees it, not Server-Timing
+            timing.record(timing.SERIALIZE, spent)
+
+    return StreamingResponse(lines(), media_type=NDJSON)
+
+
+async def json_rows_response(
+    rows: AsyncIterable[Any],
+    trailer: Optional[Callable[[], dict]] = None,
+    key: str = 'data'
+) -> StreamingResponse:
+    """
+    Function JSON Rows Response
+    Stream the {"data": [...]} document render() builds, one row at a time
+    while the rows are produced; the trailer fields (pagination) follow the
+    rows. The first row is awaited before answering, so an error up to it
+    still raises here and sets the status code. A later error leaves the
+    document unterminated: it can not be read as a complete (short) list.
+    :param rows: async iterable of rows (pydantic models or dicts)
+    :param trailer: called after the last row; returns the fields sent after it
+    :param key: field holding the rows
+    :return: StreamingResponse
+    """
+    rows = rows.__aiter__()
+    try:
+        first = [await rows.__anext__()]
+    except StopAsyncIteration:
+        first = []
+    return StreamingResponse(json_chunks(first, rows, trailer, key), media_type='application/json')
+
+
+async def json_chunks(
+    first: List[Any],
+    rows: AsyncIterator[Any],
+    trailer: Optional[Callable[[], dict]],
+    key: str
+) -> AsyncIterator[str]:
+    """Body of json_rows_response: the first row (if any), then the rest of rows."""
+    spent = 0.0
+    yield f'{{"{key}":['
+    try:
+        if first:
+            start = time.perf_counter()
+            text = encode(first[0])
+            spent += time.perf_counter() - start
+            yield text
+            async for row in rows:
+                start = time.perf_counter()
+                text = ',' + encode(row)
+                spent += time.perf_counter() - start
+                yield text
+    except Exception:
+        log.exception("Error while streaming rows")
+        return
+    finally:
+        SERIALIZATION_SECONDS.observe(spent, format='json')
+        timing.record(timing.SERIALIZE, spent)
+    fields = trailer() if trailer is not None else {}
+    yield ']' + ''.join(f',{encode(name)}:{encode(value)}' for name, value in fields.items())
+    yield '}'
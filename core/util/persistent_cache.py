@@ -0,0 +1,82 @@
+""" Persistent Cache """
+import json
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from loguru import logger as log
+
+from core.metrics.instruments import record_cache
+
+CACHE_DIR = os.getenv('CACHE_DIR', '.cache')
+
+
+class PersistentTTLCache:
+    """
+    Class PersistentTTLCache
+
+    Small key/value cache with a per-entry TTL, persisted to a JSON file so
+    entries survive process restarts. Meant for slow-changing lookups, not
+    for hot response caching (use cachetools.TTLCache for that).
+    """
+
+    def __init__(self, name: str, ttl: int, directory: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.path = os.path.join(directory or CACHE_DIR, f'{name}.json')
+        self._lock = threading.Lock()
+        self._data = self._load()
+
+    def _load(self) -> dict:
+        """ Load entries from disk, ignoring a missing or corrupt file. """
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log.warning(f"Ignoring unreadable cache file {self.path}: {e}")
+            return {}
+
+    def _dump(self) -> None:
+        """ Write entries to disk atomically. """
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_path = f'{self.path}.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self._data, file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            log.warning(f"Could not persist cache file {self.path}: {e}")
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        Function Get
+        :param key:
+        :return: cached value or None when missing/expired
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and entry['expires_at'] < time.time():
+                del self._data[key]
+                self._dump()
+                entry = None
+            record_cache(self.name, entry is not None)
+            return entry['value'] if entry else None
+
+    def set(self, key: str, value: Any) -> None:
+        """
+        Function Set
+        :param key:
+        :param value: JSON serializable value
+        """
+        with self._lock:
+            self._data[key] = {
+                'value': value,
+                'expires_at': time.time() + self.ttl
+            }
+            self._dump()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
@@ -0,0 +1,34 @@
+""" Stream """
+from typing import AsyncIterator
+
+
+class AsyncByteReader:
+    """
+    Class AsyncByteReader
+
+    Adapts an async iterator of byte chunks (e.g. ``httpx.Response.aiter_bytes()``)
+    to the ``async read(size)`` file interface expected by incremental parsers.
+    """
+
+    def __init__(self, chunks: AsyncIterator[bytes]):
+        self._chunks = chunks.__aiter__()
+        self._buffer = b''
+        self._exhausted = False
+
+    async def read(self, size: int = -1) -> bytes:
+        """
+        Function Read
+        :param size: maximum number of bytes to return (-1 reads everything)
+        :return: bytes (empty when the stream is exhausted)
+        """
+        while not self._exhausted and (size < 0 or len(self._buffer) < size):
+            try:
+                self._buffer += await self._chunks.__anext__()
+            except StopAsyncIteration:
+                self._exhausted = True
+
+        if size < 0:
+            data, self._buffer = self._buffer, b''
+        else:
+            data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
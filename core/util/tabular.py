@@ -0,0 +1,108 @@
+""" Tabular """
+import io
+import json
+from typing import Any, Dict, List
+
+from fastapi import HTTPException, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from core.metrics import timing
+from core.metrics.instruments import SERIALIZATION_SECONDS, timed
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+JSON = 'json'
+COLUMNAR = 'columnar'
+ARROW = 'arrow'
+PARQUET = 'parquet'
+
+# arrow and parquet are only offered when pyarrow is installed
+FORMATS = [JSON, COLUMNAR] + ([ARROW, PARQUET] if pa is not None else [])
+FORMAT_PATTERN = rf"^({'|'.join(FORMATS)})$"
+
+MEDIA_TYPES = {
+    ARROW: 'application/vnd.apache.arrow.stream',
+    PARQUET: 'application/vnd.apache.parquet',
+}
+
+
+def columns(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Function Columns
+    Turn rows into one array per field. Fields holding the same value on
+    every row are sent once under 'constants' instead of as an array.
+    :param rows: JSON ready rows
+    :return: {'rows': n, 'constants': {...}, 'columns': {field: [...]}}
+    """
+    names: Dict[str, None] = {}
+    for row in rows:
+        names.update(dict.fromkeys(row))
+
+    constants, arrays = {}, {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        if all(value == values[0] for value in values):
+            constants[name] = values[0]
+        else:
+            arrays[name] = values
+    return {'rows': len(rows), 'constants': constants, 'columns': arrays}
+
+
+def table(rows: List[Dict[str, Any]], header: Dict[str, Any]) -> 'pa.Table':
+    """
+    Function Table
+    :param rows: JSON ready rows
+    :param header: response fields besides the rows, kept as schema metadata
+    :return: pyarrow Table
+    """
+    try:
+        result = pa.Table.from_pylist(rows)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise HTTPException(
+            detail=f"Rows can not be converted to Arrow: {str(e)}",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        ) from e
+    return result.replace_schema_metadata(
+        {key: json.dumps(value) for key, value in header.items()}
+    )
+
+
+def render(result: Any, format: str = JSON) -> Response:
+    """
+    Function Render
+    Encode a response with a 'data' list of rows in the requested format.
+    :param result: pydantic header or dict with a 'data' list
+    :param format: json, columnar, arrow (IPC stream) or parquet
+    :return: Response
+    """
+    with timed(SERIALIZATION_SECONDS, phase=timing.SERIALIZE, format=format):
+        return encode(result, format)
+
+
+def encode(result: Any, format: str) -> Response:
+    content = jsonable_encoder(result)
+    if format == JSON:
+        return JSONResponse(content=content)
+
+    rows = content.pop('data', [])
+    if format == COLUMNAR:
+        return JSONResponse(content={**content, **columns(rows)})
+
+    if pa is None:
+        raise HTTPException(
+            detail=f"Format {format} requires pyarrow (pip install pyarrow)",
+            status_code=status.HTTP_501_NOT_IMPLEMENTED
+        )
+    data = table(rows, content)
+    sink = io.BytesIO()
+    if format == ARROW:
+        with pa.ipc.new_stream(sink, data.schema) as writer:
+            writer.write_table(data)
+    else:
+        pq.write_table(data, sink, compression='zstd')
+    return Response(content=sink.getvalue(), media_type=MEDIA_TYPES[format])
@@ -1,24 +1,42 @@
 import os
-import time
 
 import sentry_sdk
 from dotenv import load_dotenv
 from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from sentry_sdk.integrations.fastapi import FastApiIntegration
+from sentry_sdk.integrations.httpx import HttpxIntegration
+from sentry_sdk.integrations.starlette import StarletteIntegration
 
-from api.api import api_router
+from api.api import registry
 from auth.dependency.authorizer import AuthorizerDependency
+from core.metrics.router import router as metrics_router
+from core.metrics.sampling import TraceSampler
+from core.middleware.compression import CompressionMiddleware
+from core.middleware.metrics import MetricsMiddleware
+from core.middleware.profiling import ProfilingMiddleware
+from core.middleware.timing import ServerTimingMiddleware
+from core.profiling.router import router as profiling_router
 
 load_dotenv()
 DSN_SENTRY = os.getenv('DSN_SENTRY')
 
+sampler = TraceSampler.from_env()
 sentry_sdk.init(
     dsn=DSN_SENTRY,
-    # Set traces_sample_rate to 1.0 to capture 100%
-    # of transactions for performance monitoring.
-    # We recommend adjusting this value in production,
-    traces_sample_rate=1.0,
+    # Errors and slow requests are always sent, a share of the rest per route
+    traces_sampler=sampler.traces_sampler,
+    before_send_transaction=sampler.before_send_transaction,
+    # Upstream requests as child spans of the request transaction; no span
+    # per middleware and per send
+    integrations=[
+        StarletteIntegration(middleware_spans=False),
+        FastApiIntegration(middleware_spans=False),
+        HttpxIntegration(),
+    ],
+    # Only the integrations above: probing for every supported library slows the cold start
+    auto_enabling_integrations=False,
 )
 
 authorizer = AuthorizerDependency(key_pattern="API_KEY")
@@ -34,15 +52,10 @@ app = FastAPI(
 )
 origins = ["service-scraping-kc2ppxkdgq-uc.a.run.app"]
 
-
-@app.middleware("http")
-async def add_process_time_header(request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(f'{process_time:0.4f} sec')
-    return response
-
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(MetricsMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -59,4 +72,6 @@ app.add_middleware(
     ]
 )
 
-app.include_router(api_router, prefix="/api/v1")
+registry.mount(app)
+app.include_router(metrics_router)
+app.include_router(profiling_router)
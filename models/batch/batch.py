@@ -0,0 +1,39 @@
+""" Batch """
+from typing import Any, Dict, List, Literal
+
+from pydantic import BaseModel, Field
+
+
+class BatchJobModel(BaseModel):
+    """ Class BatchJobModel """
+    provider: str = Field(example="vtex")
+    endpoint: str = Field(example="market/department")
+    params: Dict[str, Any] = Field(
+        default_factory=dict,
+        example={"subdomain": "mambodelivery", "request_waiting": 3}
+    )
+
+
+class BatchRequestModel(BaseModel):
+    """ Class BatchRequestModel """
+    jobs: List[BatchJobModel] = Field(min_length=1, max_length=500)
+    mode: Literal["ordered", "completed"] = Field(
+        "ordered",
+        example="ordered",
+        description="ordered: one JSON document in job order; "
+                    "completed: NDJSON lines as jobs finish"
+    )
+
+
+class BatchResultModel(BaseModel):
+    """ Class BatchResultModel """
+    index: int = Field(example=0)
+    provider: str = Field(example="vtex")
+    endpoint: str = Field(example="market/department")
+    status_code: int = Field(example=200)
+    data: Any = None
+
+
+class BatchHeader(BaseModel):
+    """ Class BatchHeader """
+    data: List[BatchResultModel]
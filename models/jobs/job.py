@@ -0,0 +1,48 @@
+""" Job """
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class JobRequestModel(BaseModel):
+    """ Class JobRequestModel """
+    kind: str = Field(example="vtex.assortment")
+    params: Dict[str, Any] = Field(
+        default_factory=dict,
+        example={
+            "domain": "mambo.com.br",
+            "alias": "mambodelivery",
+            "department_id": 731,
+            "category_id": 732,
+            "request_waiting": 3
+        }
+    )
+
+
+class JobModel(BaseModel):
+    """ Class JobModel """
+    job_id: str = Field(example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60")
+    kind: str = Field(example="vtex.assortment")
+    params: Dict[str, Any]
+    status: str = Field(example="running")
+    pages: int = Field(example=3)
+    rows: int = Field(example=150)
+    error: Optional[str] = Field(None, example=None)
+    checkpoint: Optional[Dict[str, Any]] = Field(None, example={"_from": 150})
+    created_at: float = Field(example=1714561200.0)
+    started_at: Optional[float] = Field(None, example=1714561201.0)
+    finished_at: Optional[float] = Field(None, example=None)
+
+
+class JobHeader(BaseModel):
+    """ Class JobHeader """
+    data: List[JobModel]
+
+
+class JobResultHeader(BaseModel):
+    """ Class JobResultHeader """
+    job_id: str = Field(example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60")
+    status: str = Field(example="running")
+    offset: int = Field(example=0)
+    items: int = Field(example=150)
+    data: List[Dict[str, Any]]
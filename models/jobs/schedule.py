@@ -0,0 +1,20 @@
+""" Schedule """
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ScheduleModel(BaseModel):
+    """ Class ScheduleModel """
+    name: str = Field(example="mambo-bebidas")
+    kind: str = Field(example="vtex.assortment")
+    params: Dict[str, Any]
+    every: float = Field(example=14400)
+    jitter: float = Field(example=900)
+    next_run: float = Field(example=1714561200.0)
+    job_id: Optional[str] = Field(None, example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60")
+
+
+class ScheduleHeader(BaseModel):
+    """ Class ScheduleHeader """
+    data: List[ScheduleModel]
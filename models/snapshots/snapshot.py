@@ -0,0 +1,70 @@
+""" Snapshot """
+from typing import List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class SnapshotModel(BaseModel):
+    """ Class SnapshotModel """
+    snapshot_id: str = Field(example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60")
+    provider: str = Field(example="vtex")
+    date: str = Field(example="2024-05-01")
+    taken_at: float = Field(example=1714561200.0)
+    rows: int = Field(example=1500)
+    size: int = Field(example=18432)
+
+
+class SnapshotHeader(BaseModel):
+    """ Class SnapshotHeader """
+    data: List[SnapshotModel]
+
+
+class SnapshotRowModel(BaseModel):
+    """ Class SnapshotRowModel """
+    timestamp: Optional[int] = Field(None, example=1714561200)
+    store: Optional[str] = Field(None, example="mambodelivery")
+    sku: Optional[str] = Field(None, example="1158")
+    ean: Optional[int] = Field(None, example=7891910000197)
+    category: Optional[str] = Field(None, example="731/732")
+    seller: Optional[str] = Field(None, example="SUPERMERCADOS MAMBO - BR")
+    price_from: Optional[float] = Field(None, example=5.09)
+    price_to: Optional[float] = Field(None, example=4.59)
+    discount: Optional[int] = Field(None, example=0)
+    available: Optional[bool] = Field(None, example=True)
+
+
+class SnapshotRowHeader(BaseModel):
+    """ Class SnapshotRowHeader """
+    snapshot_id: str = Field(example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60")
+    provider: str = Field(example="vtex")
+    items: int = Field(example=1500)
+    offset: int = Field(example=0)
+    data: List[SnapshotRowModel]
+
+
+class DeltaModel(BaseModel):
+    """ Class DeltaModel """
+    provider: str = Field(example="vtex")
+    store: str = Field(example="mambodelivery")
+    sku: str = Field(example="1158")
+    seller: str = Field(example="SUPERMERCADOS MAMBO - BR")
+    ean: int = Field(example=7891910000197)
+    category: str = Field(example="731/732")
+    price_from: float = Field(example=5.09)
+    price_to: float = Field(example=4.59)
+    discount: int = Field(example=0)
+    available: bool = Field(example=True)
+    previous_price_from: Optional[float] = Field(None, example=5.09)
+    previous_price_to: Optional[float] = Field(None, example=5.09)
+    previous_available: Optional[bool] = Field(None, example=True)
+    changed_at: float = Field(example=1714561200)
+    snapshot_id: str = Field(example="3f1c2a7e9b8d4c6e8f0a1b2c3d4e5f60")
+
+
+class DeltaHeader(BaseModel):
+    """ Class DeltaHeader """
+    provider: str = Field(example="vtex")
+    store: str = Field(example="mambodelivery")
+    offset: int = Field(example=0)
+    items: int = Field(example=42)
+    data: List[DeltaModel]
@@ -4,13 +4,16 @@ import json
 import re
 from datetime import datetime
 from math import ceil
-from typing import Dict, List, Optional, Any
+from typing import Dict, Optional, Any, AsyncIterator
 import random
 
 from fastapi import HTTPException, status
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics import timing
+from core.metrics.instruments import PARSE_SECONDS, measure, rate_limit_wait
+from core.util.fields import build, wants
 from core.util.model_validator import validate_and_parse_model
 from core.util.strings import clean_ean, clean_html
 from models.ifood.assortment import AssortmentHeader, AssortmentModel
@@ -70,7 +73,7 @@ class Assortment:
                 "items_size": "50"
             }
 
-            await asyncio.sleep(request_waiting)
+            await rate_limit_wait(request_waiting, 'ifood')
             response = await client.get(
                 url,
                 headers=cls._get_default_headers(),
@@ -83,7 +86,8 @@ class Assortment:
             
         except Exception as e:
             log.error(f"Erro ao buscar cardápio da loja {store_id}: {str(e)}")
-            return {}
+            # Tells a failed request from an empty page (crawlers stop on the latter)
+            return {'error': str(e)}
 
     @classmethod
     async def get_product(cls, **kwargs) -> Dict[str, str]:
@@ -97,7 +101,7 @@ class Assortment:
 
         try:
             # Reduz o tempo de espera entre requisições e adiciona jitter aleatório
-            await asyncio.sleep(random.uniform(0.5, 1.5))
+            await rate_limit_wait(random.uniform(0.5, 1.5), 'ifood')
             
             # Adiciona timeout e retry na requisição
             for attempt in range(3):
@@ -138,12 +142,7 @@ class Assortment:
                 return cls._get_empty_product()
 
             return {
-                'sku': row.get('posCode', 'NA'),
-                'availability': 'S' if re.search(
-                    r'AVAILABLE',
-                    row.get('availability', ''),
-                    re.IGNORECASE
-                ) else 'N',
+                **cls._get_item_fields(row),
                 'taxonomy_name': clean_html(row.get('taxonomyName', 'NA')),
                 'taxonomy_type': row.get('taxonomyType', 'NA'),
                 'category': clean_html(row.get('parentTaxonomyName', 'NA'))
@@ -164,6 +163,18 @@ class Assortment:
             'category': 'NA'
         }
 
+    @staticmethod
+    def _get_item_fields(item: Dict[str, Any]) -> Dict[str, str]:
+        """sku e disponibilidade, que o item do cardápio e o detalhe trazem iguais"""
+        return {
+            'sku': item.get('posCode') or 'NA',
+            'availability': 'S' if re.fullmatch(
+                r'AVAILABLE',
+                item.get('availability') or '',
+                re.IGNORECASE
+            ) else 'N'
+        }
+
     @staticmethod
     def _calculate_discount(price_to: float, unit_original_price: float) -> tuple[float, int]:
         """Calcula desconto e preço original"""
@@ -186,44 +197,62 @@ class Assortment:
             return ''
         return f"{cls.base_image_url}/image/upload/t_high/pratos/{slug}"
 
+    @staticmethod
+    def pagination(data: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Informações de paginação do cardápio
+        :param data: Dados brutos do cardápio
+        :return: records_per_page, items e pages
+        """
+        pagination = data.get('metadata', {}).get('pagination', {})
+        return {
+            'records_per_page': 50,
+            'items': pagination.get('items', 0),
+            'pages': pagination.get('pages', 0)
+        }
+
     @classmethod
-    async def get_data(cls, **kwargs) -> Optional[AssortmentHeader]:
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='ifood')
+    async def iter_rows(cls, **kwargs) -> AsyncIterator[AssortmentModel]:
         """
-        Processa dados do cardápio
-        :param kwargs: Parâmetros de processamento
-        :return: Dados processados do cardápio
+        Gera os produtos do cardápio à medida que são processados
+        :param kwargs: Parâmetros de processamento; projection limita os campos
+        :return: Produtos processados, na ordem do cardápio
         """
-        try:
-            now = datetime.now()
-            assortment_list = []
-            
-            category_menu = kwargs['data'].get('categoryMenu', {})
-            if not category_menu:
-                log.warning("Menu de categorias vazio")
-                return AssortmentHeader(records_per_page=50, items=0, pages=0, data=[])
+        now = datetime.now()
+        projection = kwargs.get('projection')
+        # Só a taxonomia vem do detalhe do item (get_product); sku e
+        # disponibilidade vêm do próprio cardápio, com ou sem projeção
+        with_detail = wants(projection, 'category', 'sub_category')
 
-            department = clean_html(category_menu.get('name', 'NA'))
-            items = category_menu.get('itens', [])
+        category_menu = kwargs['data'].get('categoryMenu', {})
+        if not category_menu:
+            return
 
-            # Processa produtos em paralelo
-            tasks = []
-            for product in items:
-                category_id = product.get('id', 'NA')
-                if category_id == 'NA':
-                    continue
+        department = clean_html(category_menu.get('name', 'NA'))
+        items = category_menu.get('itens', [])
+
+        # Processa produtos em paralelo
+        tasks = []
+        for product in items:
+            category_id = product.get('id', 'NA')
+            if category_id == 'NA':
+                continue
 
-                task = asyncio.create_task(cls.get_product(
-                    store_id=kwargs['store_id'],
-                    client=kwargs['client'],
-                    category_id=category_id
-                ))
-                tasks.append((product, task))
+            task = asyncio.create_task(cls.get_product(
+                store_id=kwargs['store_id'],
+                client=kwargs['client'],
+                category_id=category_id
+            )) if with_detail else None
+            tasks.append((product, task))
 
-            # Aguarda todos os produtos serem processados
+        try:
+            # Entrega cada produto assim que o seu detalhe estiver pronto
             for product, task in tasks:
                 try:
-                    product_info = await task
-                    
+                    product_info = await task if task else cls._get_empty_product()
+                    item = cls._get_item_fields(product)
+
                     # Processa preços e desconto
                     price_to = float(product.get('unitMinPrice', 0) or 0)
                     price_from = float(product.get('unitPrice', 0) or 0)
@@ -237,7 +266,7 @@ class Assortment:
                     fields = {
                         'name': clean_html(product.get('description', 'NA')),
                         'ean': clean_ean(product.get('ean', 0)),
-                        'sku': product_info.get('sku'),
+                        'sku': item['sku'],
                         'department': department,
                         'category': product_info.get('category'),
                         'sub_category': product_info.get('taxonomy_name'),
@@ -245,7 +274,7 @@ class Assortment:
                         'category_id': product.get('id', 'NA'),
                         'search_term': kwargs['search_term'],
                         'details': clean_html(product.get('details', 'NA')),
-                        'availability': product_info.get('availability'),
+                        'availability': item['availability'],
                         'price_from': price_from,
                         'price_to': price_to,
                         'discount': discount,
@@ -259,27 +288,40 @@ class Assortment:
                         'hour': now.strftime("%H:%M:%S")
                     }
 
-                    if product_model := validate_and_parse_model(fields, ProductModel):
-                        assortment = AssortmentModel(**fields)
-                        assortment_list.append(assortment)
+                    if validate_and_parse_model(fields, ProductModel):
+                        yield build(AssortmentModel, projection, fields)
                     else:
                         log.warning(f"Falha na validação do produto: {fields.get('sku')}")
 
                 except Exception as e:
                     log.error(f"Erro ao processar produto: {str(e)}")
                     continue
+        finally:
+            for _, task in tasks:
+                if task:
+                    task.cancel()
 
-            # Processa informações de paginação
-            metadata = kwargs['data'].get('metadata', {})
-            pagination = metadata.get('pagination', {})
-            
-            return AssortmentHeader(
-                records_per_page=50,
-                items=pagination.get('items', 0),
-                pages=pagination.get('pages', 0),
+    @classmethod
+    async def get_data(cls, **kwargs) -> Optional[AssortmentHeader]:
+        """
+        Processa dados do cardápio
+        :param kwargs: Parâmetros de processamento
+        :return: Dados processados do cardápio
+        """
+        try:
+            if not kwargs['data'].get('categoryMenu', {}):
+                log.warning("Menu de categorias vazio")
+                return AssortmentHeader(records_per_page=50, items=0, pages=0, data=[])
+
+            assortment_list = [row async for row in cls.iter_rows(**kwargs)]
+            # Linhas parciais já foram validadas na criação
+            header = AssortmentHeader if kwargs.get('projection') is None \
+                else AssortmentHeader.model_construct
+            return header(
+                **cls.pagination(kwargs['data']),
                 data=assortment_list
             )
-            
+
         except Exception as e:
             log.error(f"Erro ao processar cardápio: {str(e)}")
             raise HTTPException(
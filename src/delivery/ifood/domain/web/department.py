@@ -1,11 +1,11 @@
 """ Department """
-import asyncio
 import json
 from typing import Dict, List, Optional, Any
 
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.ifood.department import DepartmentHeader, DepartmentModel
 
@@ -64,7 +64,7 @@ class Department:
         log.info(f"{url}: scraping data for store {store_id}")
 
         try:
-            await asyncio.sleep(request_waiting)
+            await rate_limit_wait(request_waiting, 'ifood')
             response = await client.get(
                 url,
                 headers=cls._get_default_headers()
@@ -75,7 +75,8 @@ class Department:
             
         except Exception as e:
             log.error(f"Erro ao buscar departamentos da loja {store_id}: {str(e)}")
-            return {}
+            # Tells a failed request from an empty page (crawlers stop on the latter)
+            return {'error': str(e)}
 
     @staticmethod
     async def get_category(categories: List[Dict[str, Any]]) -> List[Dict[str, str]]:
@@ -5,6 +5,7 @@ from fastapi import HTTPException, status
 from loguru import logger as log
 from typing import Dict, Optional
 
+from core.http.client import create_client
 from core.util.model_validator import validate_and_parse_model
 from core.util.strings import clean_html, format_zip_code
 from models.ifood.postal_code import PostalCodeHeader
@@ -62,7 +63,7 @@ class PostalCode:
         if not address:
             return {}
 
-        async with httpx.AsyncClient(verify=False) as client:
+        async with create_client(timeout=5.0, verify=False, provider='ifood') as client:
             latitude, longitude = await PostalCode._get_coordinates(client, formatted_zip)
             address['latitude'] = latitude
             address['longitude'] = longitude
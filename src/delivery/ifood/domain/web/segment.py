@@ -1,11 +1,11 @@
 """ Segment """
-import asyncio
 import json
 
 from fastapi import HTTPException, status
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.model_validator import validate_and_parse_model
 from core.util.strings import clean_html
 from models.ifood.segment import SegmentHeader
@@ -65,7 +65,7 @@ class Segment:
             'TE': "trailers",
             'cache-control': "no-cache"
         }
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'ifood')
         response = await client.get(
             url,
             headers=headers,
@@ -1,5 +1,4 @@
 """ Store """
-import asyncio
 import json
 import re
 from typing import Dict, List, Optional, Any
@@ -8,6 +7,7 @@ from fastapi import HTTPException, status
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.model_validator import validate_and_parse_model
 from core.util.strings import clean_html
 from models.ifood.store import MarketHeader, MarketModel
@@ -89,7 +89,7 @@ class Store:
                 "channel": "IFOOD"
             }
 
-            await asyncio.sleep(request_waiting)
+            await rate_limit_wait(request_waiting, 'ifood')
             response = await client.post(
                 url,
                 headers=cls._get_default_headers(),
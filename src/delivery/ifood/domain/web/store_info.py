@@ -7,6 +7,7 @@ from fastapi import HTTPException, status
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.model_validator import validate_and_parse_model
 from core.util.strings import clean_html
 from models.ifood.store_info import StoreInfoHeader, StoreInfoModel as StoreModel
@@ -145,7 +146,7 @@ class StoreInfo:
             "channel": "IFOOD"
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'ifood')
         
         for attempt in range(max_retries):
             try:
@@ -1,14 +1,18 @@
 """ Assortment """
-import asyncio
 import json
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 
+import ijson
 from fastapi import status
+from ijson.common import ObjectBuilder
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics import timing
+from core.metrics.instruments import PARSE_SECONDS, measure, rate_limit_wait
+from core.util.stream import AsyncByteReader
 from core.util.strings import clean_html
 from models.uber_eats.restaurant.assortment import (AssortmentHeader,
                                                     AssortmentModel)
@@ -18,6 +22,39 @@ class Assortment:
     """ Class Assortment """
     domain = 'ubereats.com'
     base_url = f'https://www.{domain}'
+    catalog_prefix = 'data.catalogSectionsMap.'
+
+    @classmethod
+    def _build_headers(cls) -> Dict[str, str]:
+        """ Constructs the headers for the HTTP request. """
+        return {
+            'User-Agent': generate_user_agent(),
+            'Accept': '*/*',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br, zstd',
+            'Content-Type': 'application/json',
+            'x-csrf-token': 'x',
+            'Origin': cls.base_url,
+            'Alt-Used': f'www.{cls.domain}',
+            'Connection': 'keep-alive',
+            'Sec-Fetch-Dest': 'empty',
+            'Sec-Fetch-Mode': 'cors',
+            'Sec-Fetch-Site': 'same-origin',
+            'Priority': 'u=0',
+            'TE': 'trailers'
+        }
+
+    @classmethod
+    def _build_payload(cls, store_id: str) -> str:
+        """ Constructs the payload for the HTTP request. """
+        return json.dumps({
+            "storeUuid": store_id,
+            "diningMode": "DELIVERY",
+            "time": {
+                "asap": True
+            },
+            "cbType": "EATER_ENDORSED"
+        })
 
     @classmethod
     async def request(
@@ -36,32 +73,9 @@ class Assortment:
         url = f"{cls.base_url}/_p/api/getStoreV1"
         log.info(f"Fetching data from: {url}")
 
-        payload = json.dumps({
-            "storeUuid": store_id,
-            "diningMode": "DELIVERY",
-            "time": {
-                "asap": True
-            },
-            "cbType": "EATER_ENDORSED"
-        })
-
-        headers = {
-            'User-Agent': generate_user_agent(),
-            'Accept': '*/*',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br, zstd',
-            'Content-Type': 'application/json',
-            'x-csrf-token': 'x',
-            'Origin': cls.base_url,
-            'Alt-Used': f'www.{cls.domain}',
-            'Connection': 'keep-alive',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-origin',
-            'Priority': 'u=0',
-            'TE': 'trailers'
-        }
-        await asyncio.sleep(request_waiting)
+        payload = cls._build_payload(store_id)
+        headers = cls._build_headers()
+        await rate_limit_wait(request_waiting, 'uber_eats')
         try:
             response = await client.post(
                 url,
@@ -74,6 +88,63 @@ class Assortment:
             log.error(f"Error fetching data: {e}")
             return {}
 
+    @classmethod
+    async def stream(
+        cls,
+        client: object,
+        store_id: str,
+        request_waiting: int
+    ) -> AsyncIterator[AssortmentModel]:
+        """
+        Fetch store data and yield assortment rows while the body is downloaded.
+        The getStoreV1 document is decoded incrementally, so only the catalog item
+        being parsed is materialized instead of the whole payload.
+        :param client: HTTP client for making requests
+        :param store_id: Unique identifier for the store
+        :param request_waiting: Delay before making the request (in seconds)
+        :return: Async iterator of AssortmentModel
+        """
+        url = f"{cls.base_url}/_p/api/getStoreV1"
+        log.info(f"Streaming data from: {url}")
+
+        payload = cls._build_payload(store_id)
+        headers = cls._build_headers()
+        await rate_limit_wait(request_waiting, 'uber_eats')
+        try:
+            async with client.stream(
+                'POST',
+                url,
+                headers=headers,
+                content=payload
+            ) as response:
+                response.raise_for_status()
+                reader = AsyncByteReader(response.aiter_bytes())
+                async for row in cls.iter_catalog(store_id, reader):
+                    yield row
+        except Exception as e:
+            # Rows may already be sent: a silent stop would look like a short catalog
+            log.error(f"Error streaming data: {e}")
+            raise
+
+    @classmethod
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='uber_eats')
+    async def iter_catalog(
+        cls,
+        store_id: str,
+        reader: Any
+    ) -> AsyncIterator[AssortmentModel]:
+        """
+        Walk the parser events of a getStoreV1 response and yield one row per
+        finished catalog item of the first section (same rules as get_data).
+        :param store_id: Store identifier
+        :param reader: Async file-like object with the raw JSON response
+        :return: Async iterator of AssortmentModel
+        """
+        walker = CatalogWalker(store_id, cls.catalog_prefix)
+        async for prefix, event, value in ijson.parse_async(reader, use_float=True):
+            for row in walker.feed(prefix, event, value):
+                yield row
+
     @staticmethod
     def parse_price(item: dict) -> float:
         """
@@ -191,6 +262,7 @@ class Assortment:
             return None
 
     @classmethod
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='uber_eats')
     async def get_data(
         cls,
         store_id: str,
@@ -226,3 +298,103 @@ class Assortment:
         except Exception as e:
             log.error(f"Error processing data: {e}")
             return AssortmentHeader(data=[])
+
+
+class CatalogWalker:
+    """
+    Class CatalogWalker
+
+    Parser state of Assortment.iter_catalog. The catalog sections may come
+    before data.sections names the first one, so their rows are held until
+    it is known; items decoded before their section title wait for it.
+    :param store_id: Store identifier
+    :param catalog_prefix: ijson prefix of the catalog sections map
+    """
+    title_tail = 'item.payload.standardItemsPayload.title.text'
+    items_tail = 'item.payload.standardItemsPayload.catalogItems.item'
+
+    def __init__(self, store_id: str, catalog_prefix: str):
+        self.store_id = store_id
+        self.catalog_prefix = catalog_prefix
+        self.now = datetime.now()
+        self.section_uuid = None
+        self.sections_done = False
+        # Rows of sections seen before data.sections was decoded
+        self.pending: Dict[str, List[AssortmentModel]] = {}
+        # Raw items of the current section item, kept until its title is known
+        self.waiting_title: List[dict] = []
+        self.uuid = self.category = None
+        self.builder = None
+        self.depth = 0
+
+    def feed(self, prefix: str, event: str, value: Any) -> List[AssortmentModel]:
+        """
+        Function Feed
+        :param prefix: ijson prefix of the event
+        :param event: ijson event name
+        :param value: ijson event value
+        :return: rows of the first section finished by this event
+        """
+        if self.builder is not None:
+            rows = self._build(event, value)
+        elif not self.sections_done and prefix == 'data.sections.item.uuid':
+            self.section_uuid = value
+            return []
+        elif prefix == 'data.sections.item' and event == 'end_map':
+            return self._end_sections()
+        elif prefix.startswith(self.catalog_prefix):
+            rows = self._catalog_event(prefix[len(self.catalog_prefix):], event, value)
+        else:
+            return []
+        return self._route(rows)
+
+    def _emit(self, item: dict) -> Optional[AssortmentModel]:
+        if re.search(r'Save on Select Items', self.category, re.IGNORECASE):
+            return None
+        return Assortment.parse_item(item, self.category, self.store_id, self.now)
+
+    def _build(self, event: str, value: Any) -> List[Optional[AssortmentModel]]:
+        """Feed a catalog item being decoded; the finished item once it closes."""
+        self.builder.event(event, value)
+        if event in ('start_map', 'start_array'):
+            self.depth += 1
+        elif event in ('end_map', 'end_array'):
+            self.depth -= 1
+        if self.depth > 0:
+            return []
+        item, self.builder = self.builder.value, None
+        if self.category is None:
+            self.waiting_title.append(item)
+            return []
+        return [self._emit(item)]
+
+    def _catalog_event(self, path: str, event: str, value: Any) -> List[Optional[AssortmentModel]]:
+        """Track the section item, its title and the start of its catalog items."""
+        self.uuid, _, tail = path.partition('.')
+        if tail == 'item' and event == 'start_map':
+            self.category, self.waiting_title = None, []
+        elif tail == self.title_tail:
+            self.category = clean_html(value or '')
+        elif tail == self.items_tail and event == 'start_map':
+            self.builder, self.depth = ObjectBuilder(), 1
+            self.builder.event(event, value)
+        elif tail == 'item' and event == 'end_map' and self.waiting_title:
+            self.category = self.category or ''
+            rows = [self._emit(item) for item in self.waiting_title]
+            self.waiting_title = []
+            return rows
+        return []
+
+    def _end_sections(self) -> List[AssortmentModel]:
+        """The first section is known: release its held rows and drop the others."""
+        self.sections_done = True
+        rows = self.pending.pop(self.section_uuid, [])
+        self.pending.clear()
+        return rows
+
+    def _route(self, rows: List[Optional[AssortmentModel]]) -> List[AssortmentModel]:
+        rows = [row for row in rows if row]
+        if self.sections_done:
+            return rows if self.uuid == self.section_uuid else []
+        self.pending.setdefault(self.uuid, []).extend(rows)
+        return []
@@ -1,5 +1,4 @@
 """ StoreInfo """
-import asyncio
 from typing import Any, Dict, Optional
 
 from fastapi import HTTPException, status
@@ -7,6 +6,7 @@ from httpx import AsyncClient, HTTPStatusError, RequestError
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.uber_eats.restaurant.store_info import StoreInfoHeader, StoreInfoModel
 
@@ -76,7 +76,7 @@ class StoreInfo:
         payload = cls._build_payload(store_id)
         headers = cls._build_headers()
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'uber_eats')
 
         try:
             log.info(f"Requesting data for store_id={store_id} with payload={payload}")
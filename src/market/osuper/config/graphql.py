@@ -0,0 +1,125 @@
+""" GraphQL """
+import hashlib
+import json
+import re
+from typing import Dict, Tuple
+
+_SPACES = re.compile(r'\s+')
+_PUNCTUATION = re.compile(r'\s*([{}()\[\]:!,=$@|&])\s*')
+
+
+def minify(document: str) -> str:
+    """
+    Function Minify
+    Drop insignificant whitespace from a GraphQL document (no string literals).
+    :param document:
+    :return: str
+    """
+    return _PUNCTUATION.sub(r'\1', _SPACES.sub(' ', document)).strip()
+
+
+class Document:
+    """
+    Class Document
+
+    A GraphQL operation minified once at import. Payloads are serialized to
+    bytes on first use and reused for the same variables.
+    """
+
+    def __init__(self, operation_name: str, query: str):
+        self.operation_name = operation_name
+        self.query = minify(query)
+        self.sha256_hash = hashlib.sha256(self.query.encode()).hexdigest()
+        self._name_json = json.dumps(operation_name).encode()
+        self._query_json = json.dumps(self.query).encode()
+        self._extensions_json = json.dumps(
+            {"persistedQuery": {"version": 1, "sha256Hash": self.sha256_hash}},
+            separators=(',', ':')
+        ).encode()
+        self._payloads: Dict[Tuple[bytes, bool, bool], bytes] = {}
+
+    def payload(
+        self,
+        variables: dict,
+        include_query: bool = True,
+        persisted: bool = False
+    ) -> bytes:
+        """
+        Function Payload
+        :param variables: operation variables
+        :param include_query: send the document text
+        :param persisted: send the persisted query hash extension
+        :return: bytes
+        """
+        variables_json = json.dumps(variables, separators=(',', ':')).encode()
+        key = (variables_json, include_query, persisted)
+        if key not in self._payloads:
+            parts = [
+                b'{"operationName":', self._name_json,
+                b',"variables":', variables_json
+            ]
+            if include_query:
+                parts += [b',"query":', self._query_json]
+            if persisted:
+                parts += [b',"extensions":', self._extensions_json]
+            parts.append(b'}')
+            if len(self._payloads) > 256:
+                self._payloads.clear()
+            self._payloads[key] = b''.join(parts)
+        return self._payloads[key]
+
+
+# Only the fields read by Store._build_store_model; contacts are passed
+# through as they come, so they keep every field they had (__typename too)
+STORE_QUERY = Document('OnlineStoresQuery', """
+    query OnlineStoresQuery($storeId: ID!) {
+      publicViewer(storeId: $storeId) {
+        onlineStores {
+          id
+          name
+          alias
+          cnpj
+          fullAddress {
+            complete
+          }
+          contacts {
+            identification
+            type
+            value
+            __typename
+          }
+        }
+      }
+    }
+""")
+
+# Only the fields read by Department.get_data
+DEPARTMENT_QUERY = Document('AllCategoriesPageQuery', """
+    query AllCategoriesPageQuery($storeId: ID!) {
+      publicViewer(storeId: $storeId) {
+        categories(storeId: $storeId) {
+          id
+          name
+          slug
+        }
+      }
+    }
+""")
+
+# Only the fields read by Category.get_data
+CATEGORY_QUERY = Document('AllCategoriesPageQuery', """
+    query AllCategoriesPageQuery($storeId: ID!) {
+      publicViewer(storeId: $storeId) {
+        categories(storeId: $storeId) {
+          id
+          name
+          slug
+          children(active: true, group: true) {
+            id
+            name
+            slug
+          }
+        }
+      }
+    }
+""")
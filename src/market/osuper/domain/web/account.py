@@ -1,5 +1,5 @@
 """Account"""
-import asyncio
+import os
 import re
 from typing import Optional
 
@@ -8,12 +8,24 @@ from loguru import logger
 from user_agent import generate_user_agent
 from httpx import AsyncClient, TimeoutException
 
+from core.metrics.instruments import rate_limit_wait
+from core.util.persistent_cache import PersistentTTLCache
+
+ACCOUNT_ID_PATTERN = re.compile(r'accountId":(\d+),"checkoutDomain', re.IGNORECASE)
+# Characters kept between chunks so a marker split across two chunks still matches
+SCAN_OVERLAP = 64
+
 
 class Account:
     """Class Account"""
+    cache = PersistentTTLCache(
+        'osuper_account',
+        ttl=int(os.getenv('OSUPER_ACCOUNT_TTL', str(7 * 24 * 60 * 60)))
+    )
 
-    @staticmethod
+    @classmethod
     async def get_id(
+        cls,
         client: AsyncClient,
         domain: str,
         request_waiting: int
@@ -21,6 +33,10 @@ class Account:
         """
         Retrieve the account ID from a given domain.
 
+        The id is cached per domain (persisted across restarts). On a miss the
+        storefront HTML is streamed and the download stops at the first
+        accountId marker.
+
         Args:
             client (AsyncClient): The HTTP client to use for requests.
             domain (str): The domain to fetch the account ID from.
@@ -32,6 +48,10 @@ class Account:
         Raises:
             TimeoutException: If the request times out.
         """
+        if (account_id := cls.cache.get(domain)) is not None:
+            logger.info(f"Account id cache hit for {domain}")
+            return account_id
+
         url = f"https://{domain}"
         headers = {
             'Host': domain,
@@ -49,18 +69,15 @@ class Account:
         }
 
         try:
-            await asyncio.sleep(request_waiting)
-            response = await client.get(url, headers=headers)
-
-            if response.status_code == status.HTTP_200_OK:
-                match = re.search(
-                    r'accountId":(\d+),"checkoutDomain',
-                    response.text,
-                    re.IGNORECASE
-                )
-                return int(match.group(1)) if match else None
+            await rate_limit_wait(request_waiting, 'osuper')
+            async with client.stream('GET', url, headers=headers) as response:
+                if response.status_code != status.HTTP_200_OK:
+                    return None
+                account_id = await cls._scan(response)
 
-            return None
+            if account_id is not None:
+                cls.cache.set(domain, account_id)
+            return account_id
 
         except TimeoutException as e:
             logger.error(f"Request timed out: {e}")
@@ -68,3 +85,22 @@ class Account:
         except Exception as e:
             logger.exception(f"An error occurred while fetching account ID: {e}")
             return None
+
+    @staticmethod
+    async def _scan(response) -> Optional[int]:
+        """
+        Read the response body until the accountId marker is found.
+
+        Args:
+            response (Response): The streamed HTTP response.
+
+        Returns:
+            Optional[int]: The account ID if the marker was seen, None otherwise.
+        """
+        tail = ''
+        async for chunk in response.aiter_text():
+            window = tail + chunk
+            if match := ACCOUNT_ID_PATTERN.search(window):
+                return int(match.group(1))
+            tail = window[-SCAN_OVERLAP:]
+        return None
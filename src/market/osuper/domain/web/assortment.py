@@ -1,12 +1,15 @@
 """ Assortment """
-import asyncio
 import json
 from datetime import datetime
+from typing import AsyncIterator, Optional, Tuple
 
 from fastapi import HTTPException, status
+from httpx import AsyncClient
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics import timing
+from core.metrics.instruments import PARSE_SECONDS, measure, rate_limit_wait
 from core.util.model_validator import validate_and_parse_model
 from core.util.strings import check_subdomain, clean_html
 from models.osuper.assortment import AssortmentHeader, AssortmentModel
@@ -17,6 +20,139 @@ RECORDS_PER_PAGE = 12
 
 class Assortment:
     """ Class Assortment """
+    url = "https://search.osuper.com.br/ecommerce_products_production/_search"
+
+    @staticmethod
+    def _build_headers(domain: str) -> dict:
+        """ Build headers for the search request. """
+        return {
+            'User-Agent': generate_user_agent(),
+            'Accept': 'application/json, text/plain, */*',
+            'Accept-Language': 'pt-BR,pt;q=0.8,en-US;q=0.5,en;q=0.3',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Content-Type': 'application/json',
+            'Origin': check_subdomain(domain),
+            'Connection': 'keep-alive',
+            'Sec-Fetch-Dest': 'empty',
+            'Sec-Fetch-Mode': 'cors',
+            'Sec-Fetch-Site': 'cross-site',
+            'Pragma': 'no-cache',
+            'Cache-Control': 'no-cache',
+            'TE': 'trailers'
+        }
+
+    @staticmethod
+    def _build_payload(
+        account_id: int,
+        store_id: int,
+        search_term: str,
+        page: str,
+        records_per_page: int
+    ) -> str:
+        """ Build the search payload for one page. """
+        return json.dumps({
+            "accountId": account_id,
+            "storeId": store_id,
+            "categoryName": search_term,
+            "first": records_per_page,
+            "promotion": None,
+            "after": page,
+            "search": "",
+            "brands": [],
+            "categories": [],
+            "tags": [],
+            "personas": [],
+            "sort": {
+                "field": "_score",
+                "order": "desc"
+            },
+            "pricingRange": {},
+            "highlightEnabled": False
+        })
+
+    @classmethod
+    async def iter_cursor(
+        cls,
+        client: AsyncClient,
+        domain: str,
+        account_id: int,
+        store_id: int,
+        search_term: str,
+        request_waiting: int,
+        records_per_page: int = RECORDS_PER_PAGE,
+        page: str = ''
+    ) -> AsyncIterator[Tuple[list, Optional[str]]]:
+        """
+        Follow pageInfo.endCursor and yield each page with the cursor of the next one.
+        :param client: HTTP client
+        :param domain: store domain (used for the Origin header)
+        :param account_id: account id
+        :param store_id: store id
+        :param search_term: category name used as search filter
+        :param request_waiting: delay before each page request
+        :param records_per_page: page size sent as "first"
+        :param page: cursor to start from ('' for the first page)
+        :return: async iterator of (edges, next cursor or None on the last page)
+        """
+        log.info(f"{cls.url}: scraping data")
+        headers = cls._build_headers(domain)
+
+        while True:
+            payload = cls._build_payload(
+                account_id, store_id, search_term, page, records_per_page
+            )
+            await rate_limit_wait(request_waiting, 'osuper')
+            response = await client.post(
+                cls.url,
+                headers=headers,
+                data=payload
+            )
+            if response.status_code != status.HTTP_200_OK:
+                # Not the end of the cursor: the caller must not take the pages so far as complete
+                response.raise_for_status()
+                raise HTTPException(
+                    status_code=status.HTTP_502_BAD_GATEWAY,
+                    detail=f"{cls.url}: unexpected status {response.status_code}"
+                )
+
+            data = json.loads(response.text)
+            edges = [] if not data.get('edges') else data.get('edges')
+            page_info = {} if not data.get('pageInfo') else data.get('pageInfo')
+            if page_info.get('hasNextPage') is not True:
+                yield edges, None
+                return
+            page = page_info.get('endCursor')
+            yield edges, page
+
+    @classmethod
+    async def iter_pages(
+        cls,
+        client: AsyncClient,
+        domain: str,
+        account_id: int,
+        store_id: int,
+        search_term: str,
+        request_waiting: int,
+        records_per_page: int = RECORDS_PER_PAGE,
+        page: str = ''
+    ) -> AsyncIterator[list]:
+        """
+        Follow pageInfo.endCursor and yield the edges of each page as it arrives.
+        :param client: HTTP client
+        :param domain: store domain (used for the Origin header)
+        :param account_id: account id
+        :param store_id: store id
+        :param search_term: category name used as search filter
+        :param request_waiting: delay before each page request
+        :param records_per_page: page size sent as "first"
+        :param page: cursor to start from ('' for the first page)
+        :return: async iterator of edges lists
+        """
+        async for edges, _ in cls.iter_cursor(
+            client, domain, account_id, store_id, search_term,
+            request_waiting, records_per_page, page
+        ):
+            yield edges
 
     @classmethod
     async def request(
@@ -29,78 +165,171 @@ class Assortment:
         :return: list
         """
         try:
-            url = "https://search.osuper.com.br/ecommerce_products_production/_search"
-            log.info(f"{url}: scraping data")
-
-            origin = check_subdomain(kwargs["domain"])
-
-            headers = {
-                'User-Agent': generate_user_agent(),
-                'Accept': 'application/json, text/plain, */*',
-                'Accept-Language': 'pt-BR,pt;q=0.8,en-US;q=0.5,en;q=0.3',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'Content-Type': 'application/json',
-                'Origin': origin,
-                'Connection': 'keep-alive',
-                'Sec-Fetch-Dest': 'empty',
-                'Sec-Fetch-Mode': 'cors',
-                'Sec-Fetch-Site': 'cross-site',
-                'Pragma': 'no-cache',
-                'Cache-Control': 'no-cache',
-                'TE': 'trailers'
-            }
-            payload = json.dumps({
-                "accountId": kwargs['account_id'],
-                "storeId": kwargs['store_id'],
-                "categoryName": kwargs['search_term'],
-                "first": RECORDS_PER_PAGE,
-                "promotion": None,
-                "after": kwargs['page'],
-                "search": "",
-                "brands": [],
-                "categories": [],
-                "tags": [],
-                "personas": [],
-                "sort": {
-                    "field": "_score",
-                    "order": "desc"
-                },
-                "pricingRange": {},
-                "highlightEnabled": False
-            })
-
-            await asyncio.sleep(kwargs['request_waiting'])
-            response = await kwargs['client'].post(
-                url,
-                headers=headers,
-                data=payload
-            )
-
-            if response and response.status_code == status.HTTP_200_OK:
-                data = json.loads(response.text)
-                current_products = [] if not data.get('edges') else data.get('edges')
-                kwargs['products'].append(current_products)
-
-                page_info = {} if not data.get('pageInfo') else data.get('pageInfo')
-                end_cursor = "" if not page_info else page_info.get('endCursor')
-
-                if page_info.get('hasNextPage') is True:
-                    await cls.request(
-                        client=kwargs['client'],
-                        domain=kwargs['domain'],
-                        page=end_cursor,
-                        account_id=kwargs['account_id'],
-                        store_id=kwargs['store_id'],
-                        search_term=kwargs['search_term'],
-                        products=kwargs['products'],
-                        request_waiting=kwargs['request_waiting']
-                    )
+            async for edges in cls.iter_pages(
+                client=kwargs['client'],
+                domain=kwargs['domain'],
+                account_id=kwargs['account_id'],
+                store_id=kwargs['store_id'],
+                search_term=kwargs['search_term'],
+                request_waiting=kwargs['request_waiting'],
+                records_per_page=kwargs.get('records_per_page', RECORDS_PER_PAGE),
+                page=kwargs['page']
+            ):
+                kwargs['products'].append(edges)
             return kwargs['products']
         except Exception as e:
             log.info(e.args)
 
+    @classmethod
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='osuper')
+    async def stream(
+        cls,
+        client: AsyncClient,
+        domain: str,
+        account_id: int,
+        store_id: int,
+        category_id: int,
+        search_term: str,
+        request_waiting: int,
+        records_per_page: int = RECORDS_PER_PAGE
+    ) -> AsyncIterator[AssortmentModel]:
+        """
+        Yield assortment rows page by page instead of accumulating every page.
+        :param client: HTTP client
+        :param domain: store domain
+        :param account_id: account id
+        :param store_id: store id
+        :param category_id: category id
+        :param search_term: category name used as search filter
+        :param request_waiting: delay before each page request
+        :param records_per_page: page size
+        :return: async iterator of AssortmentModel
+        """
+        pages = cls.iter_pages(
+            client, domain, account_id, store_id, search_term,
+            request_waiting, records_per_page
+        )
+        try:
+            async for edges in pages:
+                now = datetime.now()
+                for row in edges:
+                    try:
+                        if assortment_model := cls.parse_node(
+                            row, store_id, category_id, search_term, now
+                        ):
+                            yield assortment_model
+                    except ValueError as e:
+                        log.info(e.args)
+        except Exception as e:
+            # Rows may already be sent: a silent stop would look like the last page
+            log.error(f"Error streaming assortment: {e}")
+            raise
+
     @staticmethod
-    async def get_data(**kwargs):
+    def parse_node(
+        row: dict,
+        store_id: int,
+        category_id: int,
+        search_term: str,
+        now: datetime
+    ) -> Optional[AssortmentModel]:
+        """
+        Function Parse Node
+        :param row: search edge
+        :param store_id:
+        :param category_id:
+        :param search_term:
+        :param now:
+        :return: AssortmentModel or None when the product model is invalid
+        """
+        node = {} if not row.get('node') else row.get('node')
+        name = 'NA' if not node else clean_html(node.get('name'))
+        ean = 0 if not node or not node.get('gtin') \
+            else int(node.get('gtin'))
+        sku = 'NA' if not node or not node.get('objectID') \
+            else node.get('objectID')
+        brand = 'NA' if not node or not node.get('brandName') \
+            else clean_html(node.get('brandName'))
+        available = 'S'
+        sale_unit = '' if not node or not node.get('saleUnit') \
+            else node.get('saleUnit')
+        slug = '' if not node.get('slug') else node.get('slug')
+        image = '' if not node.get('image') else node.get('image')
+        price_from, price_to, discount = Assortment.store_prices(node, store_id)
+        in_stock = Assortment.store_count(node.get('quantity'), store_id, 'inStock')
+        qty_sale = Assortment.store_count(node.get('sales_per_store'), store_id, 'count')
+
+        fields = {
+            'name': name,
+            'ean': ean,
+            'sku': sku,
+            'store_id': store_id,
+            'category_id': category_id,
+            'search_term': search_term,
+            'brand': brand,
+            'available': available,
+            'sale_unit': sale_unit,
+            'qty_sale': qty_sale,
+            'price_from': price_from,
+            'price_to': price_to,
+            'discount': discount,
+            'in_stock': in_stock,
+            'slug': slug,
+            'image': image,
+            'created_at': now.strftime("%Y-%m-%d"),
+            'hour': now.strftime("%H:%M:%S")
+        }
+        # Validate Product Model
+        if product_model := validate_and_parse_model(fields, ProductModel):
+            # Save data in the Assortment Model
+            return AssortmentModel(**fields)
+        log.info(product_model)
+        return None
+
+    @staticmethod
+    def store_prices(node: dict, store_id: int) -> Tuple[float, float, float]:
+        """
+        Function Store Prices
+        :param node: search node
+        :param store_id: store the prices are read for
+        :return: (price_from, price_to, discount); price_from is 0 without a promotion
+        """
+        price_from = price_to = discount = 0
+        for price in node.get('pricing') or []:
+            if price.get('store') == store_id:
+                price_from = 0 if not price.get('price') \
+                    else float(price.get('price'))
+                price_to = 0 if not price.get('promotionalPrice') \
+                    else float(price.get('promotionalPrice'))
+                discount = 0 if not price.get('discount') \
+                    else float(price.get('discount'))
+                break
+
+        if price_from > 0 and price_to == 0:
+            price_to = price_from
+            price_from = 0
+
+        if (price_from > 0 and price_to > 0) and (price_from == price_to):
+            price_from = 0
+        return price_from, price_to, discount
+
+    @staticmethod
+    def store_count(entries: Optional[list], store_id: int, key: str) -> int:
+        """
+        Function Store Count
+        :param entries: per store list of the node (quantity, sales_per_store)
+        :param store_id: store the count is read for
+        :param key: count field of the entries
+        :return: count of the store, 0 when missing
+        """
+        for entry in entries or []:
+            if entry.get('store') == store_id:
+                return 0 if not entry.get(key) else int(entry.get(key))
+        return 0
+
+    @classmethod
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='osuper')
+    async def get_data(cls, **kwargs):
         """
         Function Get Data
         :param kwargs:
@@ -112,94 +341,15 @@ class Assortment:
             if len(kwargs['data']) > 0:
                 for products in kwargs['data']:
                     for row in products:
-                        node = {} if not row.get('node') else row.get('node')
-                        name = 'NA' if not node else clean_html(node.get('name'))
-                        ean = 0 if not node or not node.get('gtin') \
-                            else int(node.get('gtin'))
-                        sku = 'NA' if not node or not node.get('objectID') \
-                            else node.get('objectID')
-                        brand = 'NA' if not node or not node.get('brandName') \
-                            else clean_html(node.get('brandName'))
-                        available = 'S'
-                        sale_unit = '' if not node or not node.get('saleUnit') \
-                            else node.get('saleUnit')
-                        slug = '' if not node.get('slug') or not node.get('slug') \
-                            else node.get('slug')
-                        image = '' if not node.get('image') or not node.get('image') \
-                            else node.get('image')
-                        # Price Info
-                        price_from = price_to = discount = 0
-                        pricing = [] if not node else node.get('pricing')
-                        if len(pricing) > 0:
-                            for price in pricing:
-                                if price.get('store') == kwargs['store_id']:
-                                    price_from = 0 if not price or not price.get('price') \
-                                        else float(price.get('price'))
-                                    price_to = 0 if not price or not price.get('promotionalPrice') \
-                                        else float(price.get('promotionalPrice'))
-                                    discount = 0 if not price or not price.get('discount') \
-                                        else float(price.get('discount'))
-                                    break
-
-                        if price_from > 0 and price_to == 0:
-                            price_to = price_from
-                            price_from = 0
-
-                        if (price_from > 0 and price_to > 0) and (price_from == price_to):
-                            price_from = 0
-
-                        # Stock info
-                        quantity = [] if not node else node.get('quantity')
-                        in_stock = 0
-                        if len(quantity) > 0:
-                            for qty in quantity:
-                                if qty.get('store') == kwargs['store_id']:
-                                    in_stock = 0 if not qty or not qty.get('inStock') \
-                                        else int(qty.get('inStock'))
-                                    break
-
-                        sales_per_store = [] if not node.get('sales_per_store') \
-                            else node.get('sales_per_store')
-                        qty_sale = 0
-                        if len(sales_per_store) > 0:
-                            for sales in sales_per_store:
-                                if sales.get('store') == kwargs['store_id']:
-                                    qty_sale = 0 if not sales.get('count') \
-                                        else int(sales.get('count'))
-                                    break
-
-                        fields = {
-                            'name': name,
-                            'ean': ean,
-                            'sku': sku,
-                            'store_id': kwargs['store_id'],
-                            'category_id': kwargs['category_id'],
-                            'search_term': kwargs['search_term'],
-                            'brand': brand,
-                            'available': available,
-                            'sale_unit': sale_unit,
-                            'qty_sale': qty_sale,
-                            'price_from': price_from,
-                            'price_to': price_to,
-                            'discount': discount,
-                            'in_stock': in_stock,
-                            'slug': slug,
-                            'image': image,
-                            'created_at': now.strftime("%Y-%m-%d"),
-                            'hour': now.strftime("%H:%M:%S")
-                        }
-                        log.info(fields)
                         try:
-                            # Validate Product Model
-                            if product_model := validate_and_parse_model(
-                                fields,
-                                ProductModel
+                            if assortment_model := cls.parse_node(
+                                row,
+                                kwargs['store_id'],
+                                kwargs['category_id'],
+                                kwargs['search_term'],
+                                now
                             ):
-                                # Save data in the Assortment Model
-                                assortment_model = AssortmentModel(**fields)
                                 assortment_list.append(assortment_model)
-                            else:
-                                log.info(product_model)
                         except ValueError as e:
                             log.info(e.args)
                             return HTTPException(
@@ -1,13 +1,15 @@
 """Category"""
 
-import asyncio
 from typing import List, Dict, Any
 
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import check_subdomain, clean_html
 from models.osuper.category import CategoryHeader, CategoryModel
+from src.market.osuper.config.graphql import CATEGORY_QUERY
+from src.market.osuper.domain.web.graphql import GraphQL
 
 
 class Category:
@@ -35,20 +37,16 @@ class Category:
         url = f"https://api.{domain}/graphql"
         log.info(f"Scraping data from {url}")
 
-        payload = Category._build_payload(store_id)
         headers = Category._generate_headers(domain)
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'osuper')
 
         try:
-            response = await client.post(
-                url, headers=headers, json=payload, timeout=None
+            response_data = await GraphQL.execute(
+                client, url, headers, CATEGORY_QUERY, {"storeId": str(store_id)}
             )
-            response.raise_for_status()
-
-            response_data = response.json()
             categories = (
-                response_data.get("data", {})
+                (response_data.get("data") or {})
                 .get("publicViewer", {})
                 .get("categories", [])
             )
@@ -57,38 +55,6 @@ class Category:
             log.error(f"Error fetching data: {e}")
             return []
 
-    @staticmethod
-    def _build_payload(store_id: int) -> Dict[str, Any]:
-        """Constructs the GraphQL payload for the request."""
-        return {
-            "query": """
-            query AllCategoriesPageQuery($storeId: ID!) {
-              publicViewer(storeId: $storeId) {
-                id
-                categories(storeId: $storeId) {
-                  id
-                  name
-                  slug
-                  imageCategoryPage {
-                    url
-                    thumborized
-                    __typename
-                  }
-                  children(active: true, group: true) {
-                    id
-                    name
-                    slug
-                    __typename
-                  }
-                  __typename
-                }
-                __typename
-              }
-            }
-            """,
-            "variables": {"storeId": str(store_id)},
-        }
-
     @staticmethod
     def _generate_headers(domain: str) -> Dict[str, str]:
         """Generates HTTP headers for the API request."""
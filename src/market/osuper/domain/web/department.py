@@ -1,12 +1,14 @@
 """Department"""
-import asyncio
 from typing import List, Dict, Any
 
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import check_subdomain, clean_html
 from models.osuper.department import DepartmentHeader, DepartmentModel
+from src.market.osuper.config.graphql import DEPARTMENT_QUERY
+from src.market.osuper.domain.web.graphql import GraphQL
 
 
 class Department:
@@ -34,46 +36,16 @@ class Department:
         url = f"https://api.{domain}/graphql"
         log.info(f"Scraping data from {url}")
 
-        payload = {
-            "query": """
-            query AllCategoriesPageQuery($storeId: ID!) {
-              publicViewer(storeId: $storeId) {
-                id
-                categories(storeId: $storeId) {
-                  id
-                  name
-                  slug
-                  imageCategoryPage {
-                    url
-                    thumborized
-                    __typename
-                  }
-                  children(active: true, group: true) {
-                    id
-                    name
-                    slug
-                    __typename
-                  }
-                  __typename
-                }
-                __typename
-              }
-            }
-            """,
-            "variables": {"storeId": f"{store_id}"},
-        }
-
         headers = Department._generate_headers(domain)
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'osuper')
 
         try:
-            response = await client.post(url, headers=headers, json=payload, timeout=None)
-            response.raise_for_status()
-
-            response_data = response.json()
+            response_data = await GraphQL.execute(
+                client, url, headers, DEPARTMENT_QUERY, {"storeId": str(store_id)}
+            )
             categories = (
-                response_data.get("data", {})
+                (response_data.get("data") or {})
                 .get("publicViewer", {})
                 .get("categories", [])
             )
@@ -0,0 +1,101 @@
+"""GraphQL"""
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+from httpx import AsyncClient
+from loguru import logger as log
+
+from src.market.osuper.config.graphql import Document
+
+NOT_FOUND = {'PERSISTED_QUERY_NOT_FOUND', 'PERSISTEDQUERYNOTFOUND'}
+NOT_SUPPORTED = {'PERSISTED_QUERY_NOT_SUPPORTED', 'PERSISTEDQUERYNOTSUPPORTED'}
+
+
+class GraphQL:
+    """Class GraphQL"""
+    # host -> whether the API accepted a persisted query hash
+    persisted_support: Dict[str, bool] = {}
+
+    @classmethod
+    def _answered(cls, response: Any) -> bool:
+        """Whether the server resolved the persisted query."""
+        if not response.is_success or cls._error_codes(response) & (NOT_FOUND | NOT_SUPPORTED):
+            return False
+        try:
+            return response.json().get('data') is not None
+        except ValueError:
+            return False
+
+    @staticmethod
+    def _error_codes(response: Any) -> set:
+        """Collect error codes/messages of a GraphQL response."""
+        try:
+            errors = response.json().get('errors') or []
+        except ValueError:
+            return set()
+        codes = set()
+        for error in errors:
+            codes.add(str((error.get('extensions') or {}).get('code', '')).upper())
+            codes.add(str(error.get('message', '')).upper())
+        return codes
+
+    @classmethod
+    async def execute(
+        cls,
+        client: AsyncClient,
+        url: str,
+        headers: Dict[str, str],
+        document: Document,
+        variables: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """
+        Execute a GraphQL operation, sending only the persisted query hash
+        when the host supports it and the full document otherwise.
+
+        Args:
+            client: HTTP client instance.
+            url: GraphQL endpoint.
+            headers: Request headers.
+            document: Prebuilt GraphQL document.
+            variables: Operation variables.
+
+        Returns:
+            The decoded JSON response.
+        """
+        host = urlsplit(url).hostname
+        if cls.persisted_support.get(host) is not False:
+            response = await client.post(
+                url,
+                headers=headers,
+                content=document.payload(variables, include_query=False, persisted=True),
+                timeout=None
+            )
+            if cls._answered(response):
+                cls.persisted_support[host] = True
+                return response.json()
+
+            if cls._error_codes(response) & NOT_FOUND:
+                # Register the document under its hash
+                response = await client.post(
+                    url,
+                    headers=headers,
+                    content=document.payload(variables, persisted=True),
+                    timeout=None
+                )
+                if cls._answered(response):
+                    cls.persisted_support[host] = True
+                    return response.json()
+
+            # Server errors say nothing about persisted query support
+            if response.status_code < 500:
+                log.info(f"{host}: persisted queries not supported")
+                cls.persisted_support[host] = False
+
+        response = await client.post(
+            url,
+            headers=headers,
+            content=document.payload(variables),
+            timeout=None
+        )
+        response.raise_for_status()
+        return response.json()
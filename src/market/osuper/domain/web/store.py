@@ -1,14 +1,15 @@
 """ Store """
-import asyncio
-import json
 from typing import List, Dict, Any
 
 from loguru import logger as log
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import check_subdomain, clean_html
 from models.osuper.store import StoreHeader, StoreModel
+from src.market.osuper.config.graphql import STORE_QUERY
 from src.market.osuper.domain.web.account import Account
+from src.market.osuper.domain.web.graphql import GraphQL
 
 
 class Store:
@@ -30,205 +31,16 @@ class Store:
             url = f"https://api.{domain}/graphql"
             log.info(f"{url}: Fetching store data")
 
-            payload = {
-                "query": """
-                fragment StoreFields on PublicViewerStore {
-                  id
-                  name
-                  alias
-                  timezone
-                  cnpj
-                  messageConfig
-                  alertConfig {
-                    id
-                    active
-                    backgroundColor
-                    text
-                    textColor
-                    time
-                    icon
-                    __typename
-                  }
-                  id
-                  popUpConfig {
-                    id
-                    active
-                    backgroundColor
-                    text
-                    textColor
-                    title
-                    icon
-                    __typename
-                  }
-                  antifraudConfig {
-                    type
-                    enabled
-                    fingerprint
-                    __typename
-                  }
-                  deliveryMapTool {
-                    apiKey
-                    defaultCenter {
-                      lat
-                      lng
-                      __typename
-                    }
-                    defaultZoom
-                    email
-                    __typename
-                  }
-                  couponConfig {
-                    active
-                    __typename
-                  }
-                  categoriesConfigurations {
-                    ordering
-                    enableHighlighting
-                    __typename
-                  }
-                  fullAddress {
-                    id
-                    complete
-                    __typename
-                  }
-                  contacts {
-                    identification
-                    type
-                    value
-                    __typename
-                  }
-                  deliveryConfig {
-                    id
-                    active
-                    daysToCollect
-                    preparationTime
-                    maxDeliveriesBySchedule
-                    maxDeadlineExpressDelivery
-                    __typename
-                  }
-                  selfCollectConfig {
-                    id
-                    active
-                    daysToCollect
-                    preparationPrice
-                    preparationTime
-                    __typename
-                  }
-                  orderConfiguration {
-                    id
-                    minOrderValue
-                    minOrderValueEnabled
-                    minValueForFreeDelivery
-                    paymentNotice
-                    registrationMessage
-                    replacementOption
-                    deliveryNotice
-                    freeDeliveryEnabled
-                    freeDeliveryEnabledForExpressDelivery
-                    displayFreeDeliveryStatus
-                    freeDeliveryPeriodStart
-                    freeDeliveryPeriodEnd
-                    minOrderValueForExpress
-                    minOrderValueForFreeDeliveryExpress
-                    __typename
-                  }
-                  productConfig {
-                    id
-                    displayNormalPrice
-                    displayPercentageOfDiscount
-                    displayPromotionBox
-                    displayUnitContent
-                    stockDisplayMethod
-                    minimumStockToDisplay
-                    minimumStockToDisplayWeighable
-                    displayProductsOutOfStock
-                    displayPromotionLimit
-                    __typename
-                  }
-                  adwordsConfig {
-                    awConversionId
-                    awConversionLabel
-                    __typename
-                  }
-                  recipeConfig {
-                    displayParallax
-                    subTitle
-                    title
-                    ordering
-                    __typename
-                  }
-                  disableLeads
-                  footerText
-                  chatEmbed
-                  chatEnabled
-                  facebookPixelCode
-                  allowedCustomerType
-                  socialMediaConfig {
-                    facebook
-                    instagram
-                    twitter
-                    youtube
-                    linkedin
-                    __typename
-                  }
-                  openingHours {
-                    weekdays {
-                      start
-                      end
-                      __typename
-                    }
-                    sundays {
-                      end
-                      start
-                      __typename
-                    }
-                    saturdays {
-                      start
-                      end
-                      __typename
-                    }
-                    __typename
-                  }
-                  googleAdsConfig {
-                    tagId
-                    events {
-                      addToCart
-                      contact
-                      viewProduct
-                      registration
-                      __typename
-                    }
-                    __typename
-                  }
-                  __typename
-                }
-                query OnlineStoresQuery($storeId: ID!) {
-                  publicViewer(storeId: $storeId) {
-                    id
-                    onlineStores {
-                      ...StoreFields
-                      __typename
-                    }
-                    __typename
-                  }
-                }
-                """,
-                "variables": {
-                    "storeId": "",
-                }
-            }
-
             headers = Store._build_headers(domain)
-            await asyncio.sleep(request_waiting)
-            response = await client.post(
+            await rate_limit_wait(request_waiting, 'osuper')
+            data = await GraphQL.execute(
+                client,
                 url,
-                headers=headers,
-                json=payload,
-                timeout=None
+                headers,
+                STORE_QUERY,
+                {"storeId": ""}
             )
-
-            response.raise_for_status()  # Raise an error for HTTP codes >= 400
-            return Store._extract_store_data(response)
+            return Store._extract_store_data(data)
         except Exception as e:
             log.error(f"Error fetching store data: {e}")
             return []
@@ -258,18 +70,13 @@ class Store:
         }
 
     @staticmethod
-    def _extract_store_data(response: Any) -> List[Dict[str, Any]]:
+    def _extract_store_data(data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """
         Extract store data from the API response.
-        :param response: The HTTP response.
+        :param data: The decoded GraphQL response.
         :return: Extracted store data.
         """
-        try:
-            data = response.json()
-            return data.get('data', {}).get('publicViewer', {}).get('onlineStores', [])
-        except json.JSONDecodeError:
-            log.error("Failed to parse JSON response")
-            return []
+        return (data.get('data') or {}).get('publicViewer', {}).get('onlineStores', [])
 
     @staticmethod
     async def get_data(
@@ -1,42 +1,19 @@
 """ Category Module """
-import asyncio
 import json
-import os
 
 from httpx import AsyncClient, HTTPStatusError, Timeout
 from loguru import logger as log
 from tenacity import retry, stop_after_attempt, wait_exponential
-from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vipcommerce.category import CategoryHeader, CategoryModel
+from src.market.vipcommerce.domain.web.token import TokenManager
 
 
 class Category:
     """ Class Category """
 
-    @staticmethod
-    def _build_headers() -> dict:
-        """Build HTTP headers for the request."""
-        auth_token = os.getenv('AUTH_TOKEN_VIPCOMMERCE')
-        if not auth_token:
-            log.error("Token de autenticação não encontrado. Verifique as variáveis de ambiente.")
-            raise ValueError("Token de autenticação ausente.")
-
-        return {
-            'User-Agent': generate_user_agent(),
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Content-Type': 'application/json',
-            'DNT': '1',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site',
-            'Authorization': f"Bearer {auth_token}",
-            'Connection': 'keep-alive',
-        }
-
     @staticmethod
     @retry(wait=wait_exponential(min=1, max=10), stop=stop_after_attempt(3))
     async def request(
@@ -67,12 +44,14 @@ class Category:
         )
         log.info(f"Solicitando dados de categorias em: {url}")
 
-        headers = Category._build_headers()
-        await asyncio.sleep(request_waiting)
+        headers = await TokenManager.headers(client, domain)
+        await rate_limit_wait(request_waiting, 'vipcommerce')
 
         try:
             timeout = Timeout(30)
-            response = await client.get(url, headers=headers, timeout=timeout)
+            response = await TokenManager.send(
+                client, domain, 'GET', url, headers=headers, timeout=timeout
+            )
             response.raise_for_status()
             return response.json().get('data', [])
 
@@ -1,44 +1,21 @@
 """ Distribution Center """
-import asyncio
-import os
 from typing import Any, Dict, List
 
 from fastapi import status
 from loguru import logger as log
-from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vipcommerce.distribution_center import (
     DistributionCenterHeader,
     DistributionCenterModel
 )
+from src.market.vipcommerce.domain.web.token import TokenManager
 
 
 class DistributionCenter:
     """ Class Distribution Center """
 
-    @staticmethod
-    def _build_headers() -> dict:
-        """Build headers for the HTTP request."""
-        auth_token = os.getenv('AUTH_TOKEN_VIPCOMMERCE')
-        if not auth_token:
-            log.error("Token de autenticação não encontrado. Verifique as variáveis de ambiente.")
-            raise ValueError("Token de autenticação ausente")
-
-        return {
-            'User-Agent': generate_user_agent(),
-            'Accept': 'application/json',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Content-Type': 'application/json',
-            'DNT': '1',
-            'Sec-Fetch-Dest': 'empty',
-            'Sec-Fetch-Mode': 'cors',
-            'Sec-Fetch-Site': 'same-site',
-            'Authorization': f"Bearer {auth_token}",
-            'Connection': 'keep-alive'
-        }
-
     @staticmethod
     async def request(
         client: object,
@@ -61,11 +38,13 @@ class DistributionCenter:
                f"filial/{branch_id}/retiradas?cep={zip_code}")
         log.info(f"{url}: scraping data")
 
-        headers = DistributionCenter._build_headers()
-        await asyncio.sleep(request_waiting)
+        headers = await TokenManager.headers(client, domain)
+        await rate_limit_wait(request_waiting, 'vipcommerce')
 
         try:
-            response = await client.get(url, headers=headers, timeout=None)
+            response = await TokenManager.send(
+                client, domain, 'GET', url, headers=headers, timeout=None
+            )
             if response.status_code == status.HTTP_200_OK:
                 data = response.json().get('data', [])
                 return data
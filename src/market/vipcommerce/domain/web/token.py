@@ -0,0 +1,211 @@
+"""Token"""
+import asyncio
+import base64
+import json
+import math
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+from dotenv import dotenv_values, find_dotenv
+from fastapi import status
+from httpx import AsyncClient, Response
+from loguru import logger as log
+from user_agent import generate_user_agent
+
+
+class TokenManager:
+    """
+    Class TokenManager
+
+    Single source of authorized headers for every VipCommerce module. Headers
+    are built once per token, the token is refreshed before it expires and a
+    401 triggers one refresh + replay. Concurrent refreshes for the same
+    domain are coalesced behind a lock. A refresh that gives no usable token
+    (none, the same one, or one already expired) is not retried before a
+    backoff that doubles up to VIPCOMMERCE_TOKEN_RETRY_MAX; the current
+    token is kept meanwhile.
+    """
+    # Refresh this many seconds before the JWT "exp" claim
+    refresh_margin = int(os.getenv('VIPCOMMERCE_TOKEN_REFRESH_MARGIN', '300'))
+    retry_backoff = float(os.getenv('VIPCOMMERCE_TOKEN_RETRY_BACKOFF', '30'))
+    retry_max = float(os.getenv('VIPCOMMERCE_TOKEN_RETRY_MAX', '600'))
+    auth_url = os.getenv(
+        'VIPCOMMERCE_AUTH_URL', 'https://api.{domain}/v1/auth/loja/login'
+    )
+    token_variable = 'AUTH_TOKEN_VIPCOMMERCE'
+
+    # domain -> (token, expires_at, headers)
+    _tokens: Dict[str, Tuple[str, float, Dict[str, str]]] = {}
+    _locks: Dict[str, asyncio.Lock] = {}
+    # domain -> (no refresh before, last backoff in seconds)
+    _failures: Dict[str, Tuple[float, float]] = {}
+
+    @staticmethod
+    def _expires_at(token: str) -> float:
+        """Read the "exp" claim of a JWT; tokens without it never expire."""
+        try:
+            payload = token.split('.')[1]
+            payload += '=' * (-len(payload) % 4)
+            claims = json.loads(base64.urlsafe_b64decode(payload))
+            return float(claims['exp'])
+        except (IndexError, KeyError, TypeError, ValueError):
+            return math.inf
+
+    @staticmethod
+    def _build_headers(auth_token: str) -> Dict[str, str]:
+        """Build HTTP headers for the request."""
+        return {
+            'User-Agent': generate_user_agent(),
+            'Accept': 'application/json',
+            'Accept-Language': 'en-US,en;q=0.5',
+            'Accept-Encoding': 'gzip, deflate, br',
+            'Content-Type': 'application/json',
+            'DNT': '1',
+            'Sec-Fetch-Dest': 'empty',
+            'Sec-Fetch-Mode': 'cors',
+            'Sec-Fetch-Site': 'same-site',
+            'Authorization': f"Bearer {auth_token}",
+            'Connection': 'keep-alive',
+        }
+
+    @classmethod
+    async def _obtain(cls, client: AsyncClient, domain: str) -> Optional[str]:
+        """
+        Get a fresh token: log in with VIPCOMMERCE_AUTH_KEY when configured,
+        otherwise re-read AUTH_TOKEN_VIPCOMMERCE (rotated secret / .env).
+        """
+        auth_key = os.getenv('VIPCOMMERCE_AUTH_KEY')
+        if auth_key:
+            try:
+                response = await client.post(
+                    cls.auth_url.format(domain=domain),
+                    json={"domain": domain, "username": "loja", "key": auth_key},
+                    headers={'User-Agent': generate_user_agent(), 'Accept': 'application/json'},
+                    timeout=30
+                )
+                response.raise_for_status()
+                if token := response.json().get('data'):
+                    return token
+            except Exception as e:
+                log.error(f"Falha ao renovar o token de {domain}: {e}")
+
+        return cls._static_token()
+
+    @classmethod
+    def _static_token(cls) -> Optional[str]:
+        """
+        AUTH_TOKEN_VIPCOMMERCE as currently written in .env (a rotated secret),
+        else as set in the environment. Only this variable is read; the
+        process environment is left untouched.
+        """
+        path = find_dotenv(usecwd=True)
+        rotated = dotenv_values(path).get(cls.token_variable) if path else None
+        return rotated or os.getenv(cls.token_variable)
+
+    @classmethod
+    def _backing_off(cls, domain: str) -> bool:
+        failure = cls._failures.get(domain)
+        return failure is not None and failure[0] > time.time()
+
+    @classmethod
+    def _back_off(cls, domain: str) -> float:
+        """Record a refresh without a usable token; return the seconds until the next one."""
+        delay = cls._failures.get(domain, (0.0, 0.0))[1]
+        delay = min(max(delay * 2, cls.retry_backoff), cls.retry_max)
+        cls._failures[domain] = (time.time() + delay, delay)
+        return delay
+
+    @classmethod
+    async def refresh(
+        cls,
+        client: AsyncClient,
+        domain: str,
+        stale_token: Optional[str] = None
+    ) -> Dict[str, str]:
+        """
+        Refresh the token of a domain. Callers that waited on the lock reuse
+        the token obtained by the first one instead of refreshing again.
+
+        :param client: HTTP client
+        :param domain: API domain
+        :param stale_token: token that was rejected/expired, if any
+        :return: authorized headers
+        """
+        lock = cls._locks.setdefault(domain, asyncio.Lock())
+        async with lock:
+            current = cls._tokens.get(domain)
+            if current and current[0] != stale_token \
+                    and current[1] - cls.refresh_margin > time.time():
+                return current[2]
+            if cls._backing_off(domain):
+                if current:
+                    return current[2]
+                raise ValueError("Token de autenticação ausente.")
+
+            auth_token = await cls._obtain(client, domain)
+            if not auth_token:
+                cls._back_off(domain)
+                log.error(
+                    "Token de autenticação não encontrado. Verifique as variáveis de ambiente."
+                )
+                raise ValueError("Token de autenticação ausente.")
+
+            expires_at = cls._expires_at(auth_token)
+            if auth_token == stale_token or expires_at - cls.refresh_margin <= time.time():
+                delay = cls._back_off(domain)
+                log.warning(
+                    f"Token de {domain} não foi renovado; nova tentativa em {delay:.0f} s."
+                )
+            else:
+                cls._failures.pop(domain, None)
+
+            cls._tokens[domain] = (
+                auth_token,
+                expires_at,
+                cls._build_headers(auth_token)
+            )
+            return cls._tokens[domain][2]
+
+    @classmethod
+    async def headers(cls, client: AsyncClient, domain: str) -> Dict[str, str]:
+        """
+        Authorized headers for a domain, refreshed ahead of expiry.
+        :param client: HTTP client
+        :param domain: API domain
+        :return: headers
+        """
+        current = cls._tokens.get(domain)
+        if current and (current[1] - cls.refresh_margin > time.time() or cls._backing_off(domain)):
+            return current[2]
+        return await cls.refresh(client, domain, current[0] if current else None)
+
+    @classmethod
+    async def send(
+        cls,
+        client: AsyncClient,
+        domain: str,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Response:
+        """
+        Send an authorized request; on 401 refresh the token and replay once.
+        :param client: HTTP client
+        :param domain: API domain
+        :param method: HTTP method
+        :param url: request URL
+        :param headers: headers from TokenManager.headers (fetched if omitted)
+        :param kwargs: extra httpx request arguments
+        :return: Response
+        """
+        headers = headers or await cls.headers(client, domain)
+        response = await client.request(method, url, headers=headers, **kwargs)
+        if response.status_code != status.HTTP_401_UNAUTHORIZED:
+            return response
+
+        log.warning(f"{url}: token rejected, refreshing")
+        stale_token = headers['Authorization'].removeprefix('Bearer ')
+        headers = await cls.refresh(client, domain, stale_token)
+        return await client.request(method, url, headers=headers, **kwargs)
@@ -1,13 +1,16 @@
 """ Assortment """
-import asyncio
 import json
 import re
 from datetime import datetime
+from typing import Iterator
 
 from fastapi import HTTPException, status
 from loguru import logger as log
 from pydantic import ValidationError
 
+from core.metrics import timing
+from core.metrics.instruments import PARSE_SECONDS, measure, rate_limit_wait
+from core.util.fields import Fields, build, wants
 from core.util.strings import clean_ean, clean_html
 from models.vtex.assortment import AssortmentHeader, AssortmentModel
 
@@ -49,7 +52,7 @@ class Assortment:
             'cache-control': "no-cache"
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
         response = await client.get(
             url,
             headers=headers,
@@ -65,6 +68,10 @@ class Assortment:
             return [] if not data else data
         if response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
             data = [{'status_code': status.HTTP_429_TOO_MANY_REQUESTS}]
+        else:
+            # Not an empty window: callers must not take it for the end of the category
+            log.error(f"{url}: status {response.status_code}")
+            data = [{'status_code': response.status_code}]
         return data
 
     @staticmethod
@@ -142,13 +149,20 @@ class Assortment:
     @classmethod
     def get_seller(
         cls,
-        products: dict
+        products: dict,
+        projection: Fields = None
     ) -> list:
         """
         Function Get Seller
         :param products:
+        :param projection: requested fields; image and installments are skipped when not requested
         :return: list
         """
+        with_image = wants(projection, 'image')
+        with_installments = wants(
+            projection,
+            'installments_amount', 'installments_value', 'interest_rate', 'installments_total_value'
+        )
         seller_info = []
         installments_amount = installments_value = installments_total_value = 0
         interest_rate = ''
@@ -166,7 +180,7 @@ class Assortment:
                 is_kit = 'S' if product.get('isKit') is True else 'N'
 
                 # Image Info
-                image_info = cls.get_image(product)
+                image_info = cls.get_image(product) if with_image else {'image': ''}
                 for seller in product.get('sellers'):
                     seller_id = 'NA' if not seller.get('sellerId') \
                         else seller.get('sellerId')
@@ -205,7 +219,7 @@ class Assortment:
 
                     commertial_offer = {} if not seller.get('commertialOffer') \
                         else seller.get('commertialOffer')
-                    if commertial_offer and len(
+                    if with_installments and commertial_offer and len(
                             commertial_offer.get('Installments')
                     ) > 0:
                         installment_info = cls.get_installments(
@@ -270,6 +284,106 @@ class Assortment:
                 installments_info.append(data)
         return installments_info.pop()
 
+    @staticmethod
+    def pagination(_from: int, _to: int) -> dict:
+        """
+        Function Pagination
+        :param _from:
+        :param _to:
+        :return: dict
+        """
+        return {
+            'records_per_page': 20,
+            'items': 2500,
+            'pages': 130,
+            'offset': _from,
+            'limit': _to
+        }
+
+    @classmethod
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='vtex')
+    def iter_rows(
+        cls,
+        domain: str,
+        subdomain: str,
+        department_id: int,
+        category_id: int,
+        data: list,
+        projection: Fields = None
+    ) -> Iterator[AssortmentModel]:
+        """
+        Function Iter Rows
+        Yield one AssortmentModel per product seller as it is parsed.
+        :param domain:
+        :param subdomain:
+        :param department_id:
+        :param category_id:
+        :param data:
+        :param projection: requested fields (see core.util.fields), None for all
+        :return: Iterator[AssortmentModel]
+        """
+        now = datetime.now()
+        store_url = f"https://www.{domain}/" \
+            if not subdomain else f"https://{subdomain}.{domain}/"
+
+        for product in data:
+            product_detail = cls.product_detail(store_url, product)
+            sellers = cls.get_seller(product, projection)
+
+            for seller_info in sellers:
+                price_from = seller_info.get('price_from')
+                price_to = seller_info.get('price_to')
+                discount = product_detail.get('discount')
+                if (price_from > 0 and price_to > 0) and (price_from == price_to):
+                    price_from = 0
+
+                if seller_info.get('available') == 'N':
+                    price_from = 0
+                    price_to = 0
+
+                if price_to > 0 and discount > 0:
+                    discount_value = abs((price_to * discount) / 100)
+                    price_pix = round(abs(price_to - discount_value), 2)
+                else:
+                    price_pix = price_to
+
+                fields = {
+                    'name': product_detail.get('product_name'),
+                    'product_title': product_detail.get('product_title'),
+                    'ean': seller_info.get('ean'),
+                    'sku': seller_info.get('sku'),
+                    'product_ref': product_detail.get('product_ref'),
+                    'department_id': department_id,
+                    'category_id': category_id,
+                    'brand_id': product_detail.get('brand_id'),
+                    'measurement_unit': seller_info.get('measurement_unit'),
+                    'unit_multiplier': seller_info.get('unit_multiplier'),
+                    'is_kit': seller_info.get('is_kit'),
+                    'seller_id': seller_info.get('seller_id'),
+                    'seller_name': seller_info.get('seller_name'),
+                    'seller_default': seller_info.get('seller_default'),
+                    'seller_type': seller_info.get('seller_type'),
+                    'available_quantity': seller_info.get('available_quantity'),
+                    'available': seller_info.get('available'),
+                    'price_from': price_from,
+                    'price_to': price_to,
+                    'price_pix': price_pix,
+                    'price_without_discount': seller_info.get('price_without_discount'),
+                    'discount': discount,
+                    'installments_amount': seller_info.get('installments_amount'),
+                    'installments_value': seller_info.get('installments_value'),
+                    'interest_rate': seller_info.get('interest_rate'),
+                    'installments_total_value': seller_info.get('installments_total_value'),
+                    'reward_value': seller_info.get('reward_value'),
+                    'tax': seller_info.get('tax'),
+                    'url': product_detail.get('product_slug'),
+                    'image': seller_info.get('image'),
+                    'created_at': now.strftime("%Y-%m-%d"),
+                    'hour': now.strftime("%H:%M:%S")
+                }
+                log.info(fields)
+                yield build(AssortmentModel, projection, fields)
+
     @classmethod
     async def get_data(
         cls,
@@ -279,7 +393,8 @@ class Assortment:
         category_id: int,
         _from: int,
         _to: int,
-        data: list
+        data: list,
+        projection: Fields = None
     ):
         """
         Function Get Data
@@ -290,91 +405,25 @@ class Assortment:
         :param _from:
         :param _to:
         :param data:
+        :param projection: requested fields, None for all
         :return:
         """
         try:
-            now = datetime.now()
-            assortment_list = []
-            store_url = f"https://www.{domain}/" \
-                if not subdomain else f"https://{subdomain}.{domain}/"
-
-            for product in data:
-                product_detail = cls.product_detail(store_url, product)
-                sellers = cls.get_seller(product)
-
-                for seller_info in sellers:
-                    price_from = seller_info.get('price_from')
-                    price_to = seller_info.get('price_to')
-                    discount = product_detail.get('discount')
-                    if (price_from > 0 and price_to > 0) and (price_from == price_to):
-                        price_from = 0
-
-                    if seller_info.get('available') == 'N':
-                        price_from = 0
-                        price_to = 0
-
-                    if price_to > 0 and discount > 0:
-                        discount_value = abs((price_to * discount) / 100)
-                        price_pix = round(abs(price_to - discount_value), 2)
-                    else:
-                        price_pix = price_to
-
-                    fields = {
-                        'name': product_detail.get('product_name'),
-                        'product_title': product_detail.get('product_title'),
-                        'ean': seller_info.get('ean'),
-                        'sku': seller_info.get('sku'),
-                        'product_ref': product_detail.get('product_ref'),
-                        'department_id': department_id,
-                        'category_id': category_id,
-                        'brand_id': product_detail.get('brand_id'),
-                        'measurement_unit': seller_info.get('measurement_unit'),
-                        'unit_multiplier': seller_info.get('unit_multiplier'),
-                        'is_kit': seller_info.get('is_kit'),
-                        'seller_id': seller_info.get('seller_id'),
-                        'seller_name': seller_info.get('seller_name'),
-                        'seller_default': seller_info.get('seller_default'),
-                        'seller_type': seller_info.get('seller_type'),
-                        'available_quantity': seller_info.get('available_quantity'),
-                        'available': seller_info.get('available'),
-                        'price_from': price_from,
-                        'price_to': price_to,
-                        'price_pix': price_pix,
-                        'price_without_discount': seller_info.get('price_without_discount'),
-                        'discount': discount,
-                        'installments_amount': seller_info.get('installments_amount'),
-                        'installments_value': seller_info.get('installments_value'),
-                        'interest_rate': seller_info.get('interest_rate'),
-                        'installments_total_value': seller_info.get('installments_total_value'),
-                        'reward_value': seller_info.get('reward_value'),
-                        'tax': seller_info.get('tax'),
-                        'url': product_detail.get('product_slug'),
-                        'image': seller_info.get('image'),
-                        'created_at': now.strftime("%Y-%m-%d"),
-                        'hour': now.strftime("%H:%M:%S")
-                    }
-                    log.info(fields)
-                    try:
-                        assortment_model = AssortmentModel(**fields)
-                        assortment_list.append(assortment_model)
-                    except ValidationError as e:
-                        log.info(e)
-                        return HTTPException(
-                            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                            detail=str(e)
-                        )
-
-            # Pagination Info
-            records_per_page = 20
-            items = 2500
-            pages = 130
+            try:
+                assortment_list = list(cls.iter_rows(
+                    domain, subdomain, department_id, category_id, data, projection
+                ))
+            except ValidationError as e:
+                log.info(e)
+                return HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=str(e)
+                )
 
-            result = AssortmentHeader(
-                records_per_page=records_per_page,
-                items=items,
-                pages=pages,
-                offset=_from,
-                limit=_to,
+            # Partial rows were validated when built
+            header = AssortmentHeader if projection is None else AssortmentHeader.model_construct
+            result = header(
+                **cls.pagination(_from, _to),
                 data=assortment_list
             )
             return result
@@ -1,10 +1,10 @@
-import asyncio
 import json
 from typing import List, Optional
 
 from fastapi import status
 from loguru import logger as log
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vtex.brand import BrandHeader, BrandModel
 
@@ -38,7 +38,7 @@ class Brand:
             'cache-control': 'no-cache'
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
         response = await client.get(url, headers=headers, timeout=None)
 
         if response.status_code == status.HTTP_200_OK:
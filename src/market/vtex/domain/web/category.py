@@ -1,12 +1,12 @@
 """Category"""
 
-import asyncio
 import json
 from typing import List, Union
 
 from fastapi import status
 from loguru import logger as log
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vtex.category import CategoryHeader, CategoryModel
 
@@ -43,7 +43,7 @@ class Category:
             'cache-control': 'no-cache'
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
 
         try:
             response = await client.get(
@@ -1,12 +1,12 @@
 """ Department """
 
-import asyncio
 import json
 from typing import List, Optional
 
 from fastapi import status
 from loguru import logger
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vtex.department import DepartmentHeader, DepartmentModel
 
@@ -40,7 +40,7 @@ class Department:
             'cache-control': 'no-cache'
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
 
         response = await client.get(url, headers=headers, timeout=None)
 
@@ -1,10 +1,10 @@
 """ Intelligence Search """
-import asyncio
 import json
 
 from fastapi import status
 from loguru import logger as log
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vtex.intelligent_search import (IntelligentSearchHeader,
                                             IntelligentSearchModel)
@@ -35,7 +35,7 @@ class IntelligentSearch:
             'Accept': 'application/json',
             'cache-control': 'no-cache'
         }
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
         response = await client.get(
             url,
             headers=headers,
@@ -1,5 +1,4 @@
 """ Search Term """
-import asyncio
 import json
 import re
 from datetime import datetime
@@ -8,6 +7,7 @@ from fastapi import HTTPException, status
 from loguru import logger as log
 from pydantic import ValidationError
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_ean, clean_html
 from models.vtex.search_term import SearchTermHeader, SearchTermModel
 
@@ -46,7 +46,7 @@ class SearchTerm:
             'cache-control': "no-cache"
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
         response = await client.get(
             url,
             headers=headers,
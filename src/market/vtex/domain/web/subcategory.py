@@ -1,11 +1,11 @@
 """ SubCategory """
-import asyncio
 import json
 from typing import List
 
 from fastapi import status
 from loguru import logger as log
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.vtex.subcategory import SubCategoryHeader, SubCategoryModel
 
@@ -36,7 +36,7 @@ class SubCategory:
             'cache-control': 'no-cache'
         }
 
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'vtex')
         response = await client.get(url, headers=headers, timeout=None)
 
         if response.status_code == status.HTTP_200_OK:
@@ -1,13 +1,14 @@
 """ Assortment """
-import asyncio
 import re
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Iterator, Optional
 
 from fastapi import HTTPException, status
 from loguru import logger
 from user_agent import generate_user_agent
 
+from core.metrics import timing
+from core.metrics.instruments import PARSE_SECONDS, measure, rate_limit_wait
 from core.util.strings import clean_html
 from models.tendaatacado.assortment import AssortmentHeader, AssortmentModel
 
@@ -46,7 +47,7 @@ class Assortment:
         params = cls._prepare_request_params(search_term, page)
 
         logger.info(f"Requesting data from {url}")
-        await asyncio.sleep(request_waiting)
+        await rate_limit_wait(request_waiting, 'tendaatacado')
 
         try:
             response = await client.get(
@@ -105,24 +106,44 @@ class Assortment:
         :param data: Raw API response data
         :return: AssortmentHeader object with processed data
         """
-        now = datetime.now()
-        products = data.get("products", [])
-        assortment_list = []
+        return AssortmentHeader(
+            **cls.pagination(data),
+            data=list(cls.iter_rows(category_id, search_term, data))
+        )
 
-        for product in products:
+    @classmethod
+    def pagination(cls, data: Dict[str, Any]) -> Dict[str, int]:
+        """
+        Reads the pagination fields of the API response.
+        :param data: Raw API response data
+        :return: records_per_page, items and pages
+        """
+        return {
+            'records_per_page': cls.records_per_page,
+            'items': data.get("total_products", 0),
+            'pages': data.get("total_pages", 0),
+        }
+
+    @classmethod
+    @measure(PARSE_SECONDS, phase=timing.PARSE, provider='tendaatacado')
+    def iter_rows(
+        cls,
+        category_id: int,
+        search_term: str,
+        data: Dict[str, Any]
+    ) -> Iterator[AssortmentModel]:
+        """
+        Parses the products of the API response one at a time.
+        :param category_id: Category ID
+        :param search_term: Search term
+        :param data: Raw API response data
+        :return: iterator of AssortmentModel, skipping products that fail to parse
+        """
+        now = datetime.now()
+        for product in data.get("products", []):
             assortment = cls._parse_product(product, category_id, search_term, now)
             if assortment:
-                assortment_list.append(assortment)
-
-        total_items = data.get("total_products", 0)
-        total_pages = data.get("total_pages", 0)
-
-        return AssortmentHeader(
-            records_per_page=cls.records_per_page,
-            items=total_items,
-            pages=total_pages,
-            data=assortment_list
-        )
+                yield assortment
 
     @staticmethod
     def _parse_product(
@@ -1,11 +1,11 @@
 """ Category """
-import asyncio
 from typing import Any, Dict, List
 
 from fastapi import HTTPException, status
 from loguru import logger
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.tendaatacado.category import CategoryHeader, CategoryModel
 
@@ -43,7 +43,7 @@ class Category:
         url = f"{cls.base_url}/api/public/store/departments"
         logger.info(f"Fetching data from: {url}")
         try:
-            await asyncio.sleep(request_waiting)
+            await rate_limit_wait(request_waiting, 'tendaatacado')
             response = await client.get(
                 url,
                 headers=headers,
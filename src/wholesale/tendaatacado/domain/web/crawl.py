@@ -0,0 +1,138 @@
+""" Crawl """
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Set, Tuple
+
+from fastapi import HTTPException
+from loguru import logger
+
+from core.util.concurrency import host_semaphore
+from models.tendaatacado.assortment import AssortmentModel
+from models.tendaatacado.category import CategoryModel
+from src.wholesale.tendaatacado.domain.web.assortment import Assortment
+from src.wholesale.tendaatacado.domain.web.category import Category
+
+CRAWL_CONCURRENCY = 4
+
+
+class Crawl:
+    """Class Crawl: Walks the whole category tree and every assortment page"""
+
+    @staticmethod
+    async def categories(client: Any, request_waiting: int) -> List[CategoryModel]:
+        """
+        Category tree the crawl walks.
+        :param client: HTTP client for making requests
+        :param request_waiting: Time to wait before the request
+        :return: List of CategoryModel
+        """
+        data = await Category.request(client, request_waiting)
+        return (await Category.get_data(data)).data if data else []
+
+    @classmethod
+    async def stream(
+        cls,
+        client: Any,
+        request_waiting: int,
+        concurrency: int = CRAWL_CONCURRENCY,
+        categories: Optional[List[CategoryModel]] = None
+    ) -> AsyncIterator[AssortmentModel]:
+        """
+        Crawls every category returned by Category.request. The first page of
+        each category gives total_pages; the remaining pages are queued as soon
+        as it arrives. At most concurrency requests run at once, within the
+        host's shared budget, and rows are deduplicated across categories (a
+        product can live in several). A page that cannot be fetched ends the
+        crawl with its HTTPException instead of a partial result.
+
+        :param client: HTTP client for making requests
+        :param request_waiting: Time to wait before each request
+        :param concurrency: Maximum concurrent requests of this crawl
+        :param categories: Category tree already fetched (skips Category.request)
+        :return: Async iterator of unique AssortmentModel rows
+        """
+        if categories is None:
+            categories = await cls.categories(client, request_waiting)
+        logger.info(f"Crawling {len(categories)} categories")
+
+        budget = host_semaphore(Assortment.domain)
+        own = asyncio.Semaphore(max(1, concurrency))
+        seen: Set[Tuple[int, str]] = set()
+
+        def fetch(category: CategoryModel, page: int) -> asyncio.Task:
+            return asyncio.create_task(
+                cls.fetch_page(client, (own, budget), category, page, request_waiting)
+            )
+
+        pending = {fetch(category, 1) for category in categories}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    category, page, result = task.result()
+                    if not result.get("products"):
+                        continue
+                    if page == 1:
+                        total_pages = int(result.get("total_pages", 0) or 0)
+                        pending.update(
+                            fetch(category, next_page)
+                            for next_page in range(2, total_pages + 1)
+                        )
+                    for row in await cls.unique_rows(category, result, seen):
+                        yield row
+        finally:
+            for task in pending:
+                task.cancel()
+
+    @staticmethod
+    async def fetch_page(
+        client: Any,
+        semaphores: Tuple[asyncio.Semaphore, asyncio.Semaphore],
+        category: CategoryModel,
+        page: int,
+        request_waiting: int
+    ) -> Tuple[CategoryModel, int, Dict[str, Any]]:
+        """
+        One assortment page under the host budget. A failed page raises
+        (HTTPException from Assortment.request), which aborts the crawl.
+        :param semaphores: (crawl's own, host budget), acquired in that order
+        :return: (category, page, response data)
+        """
+        own, budget = semaphores
+        async with own, budget:
+            try:
+                result = await Assortment.request(
+                    client,
+                    category.category_id,
+                    category.search_term,
+                    str(page),
+                    request_waiting
+                )
+            except HTTPException as e:
+                detail = f"Category {category.category_id} page {page}: {e.detail}"
+                logger.error(detail)
+                raise HTTPException(status_code=e.status_code, detail=detail) from e
+            return category, page, result
+
+    @staticmethod
+    async def unique_rows(
+        category: CategoryModel,
+        result: Dict[str, Any],
+        seen: Set[Tuple[int, str]]
+    ) -> List[AssortmentModel]:
+        """
+        Rows of a page not yielded before (a product can live in several categories).
+        :param seen: (product_id, sku) of the rows yielded so far; updated
+        :return: List of AssortmentModel
+        """
+        header = await Assortment.process_data(
+            category.category_id, category.search_term, result
+        )
+        rows = []
+        for row in header.data:
+            key = (row.product_id, row.sku)
+            if key not in seen:
+                seen.add(key)
+                rows.append(row)
+        return rows
@@ -1,11 +1,11 @@
 """ Department """
-import asyncio
 from typing import Any, Dict, List
 
 from httpx import AsyncClient, HTTPStatusError, RequestError
 from loguru import logger
 from user_agent import generate_user_agent
 
+from core.metrics.instruments import rate_limit_wait
 from core.util.strings import clean_html
 from models.tendaatacado.department import DepartmentHeader, DepartmentModel
 
@@ -42,7 +42,7 @@ class Department:
         }
         try:
             logger.info(f"Requesting data from {url}")
-            await asyncio.sleep(request_waiting)
+            await rate_limit_wait(request_waiting, 'tendaatacado')
             response = await client.get(
                 url,
                 headers=headers,
@@ -0,0 +1,68 @@
+import json
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_KEY = os.getenv('API_KEY')
+BASE_URL = os.getenv('BASE_URL')
+
+HEADERS = {
+    'accept': "application/json",
+    'x-api-key': API_KEY,
+    'cache-control': "no-cache"
+}
+
+PAYLOAD = {
+    "jobs": [
+        {
+            "provider": "tendaatacado",
+            "endpoint": "wholesale/department",
+            "params": {"request_waiting": 3}
+        },
+        {
+            "provider": "tendaatacado",
+            "endpoint": "wholesale/category",
+            "params": {"request_waiting": 3}
+        }
+    ]
+}
+
+
+def request(url: str, payload: dict):
+    with httpx.Client() as client:
+        response = client.post(
+            url,
+            headers=HEADERS,
+            json=payload,
+            timeout=None
+        )
+        return response
+
+
+def test_batch():
+    url = f"{BASE_URL}/api/v1/batch"
+
+    response = request(url, PAYLOAD)
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert [item['index'] for item in data['data']] == [0, 1]
+    assert all(item['status_code'] == 200 for item in data['data'])
+
+
+def test_batch_completed():
+    url = f"{BASE_URL}/api/v1/batch"
+
+    response = request(url, {**PAYLOAD, "mode": "completed"})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert sorted(item['index'] for item in lines) == [0, 1]
+
+
+def test_batch_unknown_provider():
+    url = f"{BASE_URL}/api/v1/batch"
+
+    response = request(url, {"jobs": [{"provider": "unknown", "endpoint": "x"}]})
+    assert response.status_code == 422
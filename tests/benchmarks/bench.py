@@ -0,0 +1,297 @@
+""" Parser Benchmarks
+
+Runs every provider parser over recorded upstream responses (fixtures/) and
+reports rows per second and tracemalloc peak bytes per row. Each run is
+appended to a JSON lines history and compared with the previous run of the
+same case on the same machine.
+
+    python -m tests.benchmarks.bench
+    python -m tests.benchmarks.bench -k vtex -k ifood --seconds 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from unittest import mock
+
+import httpx
+from loguru import logger
+
+from core.util.fields import parse_fields
+from core.util.persistent_cache import CACHE_DIR
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+HISTORY = os.getenv('BENCHMARK_HISTORY', os.path.join(CACHE_DIR, 'benchmarks.jsonl'))
+
+PROJECTION = 'ean,sku,price_from,price_to'
+
+
+def fixture(name: str) -> Any:
+    with open(os.path.join(FIXTURES, name), encoding='utf-8') as file:
+        return json.load(file)
+
+
+def fixture_bytes(name: str) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as file:
+        return file.read()
+
+
+class Case(NamedTuple):
+    """ A parser run: setup() builds the input once, run(input) returns the row count. """
+    setup: Callable[[], Any]
+    run: Callable[[Any], int]
+
+
+CASES: Dict[str, Case] = {}
+
+
+def case(name: str, setup: Callable[[], Any]) -> Callable:
+    def register(run: Callable[[Any], int]) -> Callable[[Any], int]:
+        CASES[name] = Case(setup, run)
+        return run
+    return register
+
+
+LOOP = asyncio.new_event_loop()
+
+
+def run_async(coro) -> Any:
+    return LOOP.run_until_complete(coro)
+
+
+async def collect(rows) -> int:
+    return len([row async for row in rows])
+
+
+# VTEX products/search
+
+@case('vtex', lambda: fixture('vtex_products_search.json'))
+def vtex(data: list) -> int:
+    from src.market.vtex.domain.web.assortment import Assortment
+    return len(list(Assortment.iter_rows('mambo.com.br', '', 731, 732, data)))
+
+
+@case('vtex_fields', lambda: fixture('vtex_products_search.json'))
+def vtex_fields(data: list) -> int:
+    from models.vtex.assortment import AssortmentModel
+    from src.market.vtex.domain.web.assortment import Assortment
+    projection = parse_fields(f'{PROJECTION},available', AssortmentModel)
+    return len(list(Assortment.iter_rows('mambo.com.br', '', 731, 732, data, projection)))
+
+
+# iFood catalog-category, menuitem and merchant GraphQL
+
+def ifood_setup() -> Dict[str, Any]:
+    """Catalog fixture plus the menuitem detail parsed once by the real get_product."""
+    from src.delivery.ifood.domain.web.assortment import Assortment
+
+    menuitem = fixture_bytes('ifood_menuitem.json')
+    client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(200, content=menuitem)
+    ))
+
+    async def no_wait(*args, **kwargs):
+        return None
+
+    with mock.patch('asyncio.sleep', no_wait):
+        detail = run_async(Assortment.get_product(client=client, store_id='s', category_id='c'))
+    run_async(client.aclose())
+    return {'data': fixture('ifood_catalog_category.json')['data'], 'detail': detail}
+
+
+def ifood_rows(setup: Dict[str, Any], projection=None, consume: Callable = collect) -> Any:
+    from src.delivery.ifood.domain.web.assortment import Assortment
+
+    async def get_product(**kwargs):
+        return setup['detail']
+
+    with mock.patch.object(Assortment, 'get_product', get_product):
+        return run_async(consume(Assortment.iter_rows(
+            client=None,
+            segment_type='MERCADOS',
+            region='sao-paulo-sp',
+            store_slug='carrefour-hiper---imigrantes-bosque-da-saude',
+            store_id='ee4559e2-6c68-429c-9dad-89796c13315e',
+            department_id='f9845b8a-efe4-48a0-a9aa-c45b50eafafe',
+            search_term='Grãos',
+            latitude='-23.5942581',
+            longitude='-46.6107278',
+            data=setup['data'],
+            projection=projection
+        )))
+
+
+@case('ifood', ifood_setup)
+def ifood(setup: Dict[str, Any]) -> int:
+    return ifood_rows(setup)
+
+
+@case('ifood_fields', ifood_setup)
+def ifood_fields(setup: Dict[str, Any]) -> int:
+    from models.ifood.assortment import AssortmentModel
+    return ifood_rows(setup, parse_fields(f'{PROJECTION},availability', AssortmentModel))
+
+
+@case('ifood_store_info', lambda: fixture('ifood_merchant_graphql.json')['data'])
+def ifood_store_info(data: dict) -> int:
+    from src.delivery.ifood.domain.web.store_info import StoreInfo
+    return 1 if run_async(StoreInfo.get_data('ee4559e2', data)) else 0
+
+
+# OSuper _search edges
+
+@case('osuper', lambda: fixture('osuper_search.json')['data']['search']['edges'])
+def osuper(edges: list) -> int:
+    from src.market.osuper.domain.web.assortment import Assortment
+    now = datetime.now()
+    return sum(
+        1 for row in edges
+        if Assortment.parse_node(row, 253, 571970, 'Bebidas > Refrigerantes', now)
+    )
+
+
+# VipCommerce produtos
+
+@case('vipcommerce', lambda: fixture('vipcommerce_produtos.json'))
+def vipcommerce(data: dict) -> int:
+    from src.market.vipcommerce.domain.web.assortment import Assortment
+    return len(list(Assortment.iter_rows('supermercadosmais.com.br', 1, 1, 61, data)))
+
+
+# Tenda products
+
+@case('tendaatacado', lambda: fixture('tendaatacado_products.json'))
+def tendaatacado(data: dict) -> int:
+    from src.wholesale.tendaatacado.domain.web.assortment import Assortment
+    return len(list(Assortment.iter_rows(126, 'acucar-e-adocantes', data)))
+
+
+# Uber Eats getStoreV1
+
+@case('uber_eats', lambda: fixture('uber_eats_get_store_v1.json')['data'])
+def uber_eats(data: dict) -> int:
+    from src.delivery.uber_eats.restaurant.domain.web.assortment import Assortment
+    return len(run_async(Assortment.get_data('a6961a93', data)).data)
+
+
+@case('uber_eats_stream', lambda: fixture_bytes('uber_eats_get_store_v1.json'))
+def uber_eats_stream(body: bytes) -> int:
+    from core.util.stream import AsyncByteReader
+    from src.delivery.uber_eats.restaurant.domain.web.assortment import Assortment
+
+    async def chunks():
+        for start in range(0, len(body), 65536):
+            yield body[start:start + 65536]
+
+    return run_async(collect(Assortment.iter_catalog('a6961a93', AsyncByteReader(chunks()))))
+
+
+def quiet() -> None:
+    """Keep the parsers' log calls (they are part of the cost) but drop the output."""
+    logger.remove()
+    logger.add(lambda message: None, level='INFO')
+
+
+def measure(name: str, seconds: float = 2.0, min_runs: int = 5) -> Dict[str, Any]:
+    """
+    Function Measure
+    :param name: case name
+    :param seconds: minimum timed duration
+    :param min_runs: minimum timed runs
+    :return: result record
+    """
+    bench = CASES[name]
+    data = bench.setup()
+    rows = bench.run(data)  # warm up (imports, caches)
+
+    timings: List[float] = []
+    started = time.perf_counter()
+    while len(timings) < min_runs or time.perf_counter() - started < seconds:
+        start = time.perf_counter()
+        bench.run(data)
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    bench.run(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'case': name,
+        'rows': rows,
+        'runs': len(timings),
+        'rows_per_sec': round(rows / statistics.median(timings), 1),
+        'rows_per_sec_best': round(rows / min(timings), 1),
+        'peak_bytes_per_row': round(peak / max(rows, 1)),
+    }
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = ''
+    return {
+        'commit': commit,
+        'python': platform.python_version(),
+        'machine': f'{platform.node()} {platform.machine()}',
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+    }
+
+
+def previous(history: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Last recorded run of the same case, Python and machine."""
+    if not os.path.exists(history):
+        return None
+    last = None
+    with open(history, encoding='utf-8') as file:
+        for line in file:
+            record = json.loads(line)
+            if all(record.get(key) == result[key] for key in ('case', 'python', 'machine')):
+                last = record
+    return last
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description='Provider parser benchmarks')
+    parser.add_argument('-k', dest='only', action='append', help='only cases containing this text')
+    parser.add_argument('--seconds', type=float, default=2.0, help='minimum timed seconds per case')
+    parser.add_argument('--output', default=HISTORY, help='JSON lines history file')
+    parser.add_argument('--no-save', action='store_true', help='do not append to the history')
+    args = parser.parse_args(argv)
+
+    quiet()
+    env = environment()
+    names = [name for name in CASES if not args.only or any(text in name for text in args.only)]
+    results = []
+    print(f"{'case':<18}{'rows':>6}{'rows/s':>12}{'best':>12}{'B/row':>10}  vs previous")
+    for name in names:
+        result = {**measure(name, args.seconds), **env}
+        last = previous(args.output, result)
+        delta = '' if last is None else \
+            f"{(result['rows_per_sec'] / last['rows_per_sec'] - 1) * 100:+.1f}% ({last['commit']})"
+        print(f"{name:<18}{result['rows']:>6}{result['rows_per_sec']:>12,.0f}"
+              f"{result['rows_per_sec_best']:>12,.0f}{result['peak_bytes_per_row']:>10,}  {delta}")
+        results.append(result)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'a', encoding='utf-8') as file:
+            for result in results:
+                file.write(json.dumps(result) + '\n')
+    return results
+
+
+if __name__ == '__main__':
+    main()
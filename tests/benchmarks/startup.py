@@ -0,0 +1,145 @@
+""" Startup Benchmarks
+
+Cold start of the API in fresh interpreters, with providers loaded lazily (on
+first use) and eagerly (PROVIDERS_EAGER): seconds to import main, to run the
+startup events, and to answer a first provider request, which pays for
+loading that provider when lazy. Results go to the parser benchmarks'
+history as cases startup-lazy and startup-eager.
+
+    python -m tests.benchmarks.startup
+    python -m tests.benchmarks.startup --runs 10 --top 15
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from tests.benchmarks.bench import HISTORY, environment, previous
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MODES = ('lazy', 'eager')
+FIRST_REQUEST = '/api/v1/vtex/market/assortment'
+
+CHILD = f"""
+import json, sys, time
+start = time.perf_counter()
+import main
+from api.api import registry
+imported = time.perf_counter()
+before = sorted(registry.loaded)
+modules = sorted(name for name in sys.modules if name.startswith('src.'))
+from fastapi.testclient import TestClient
+with TestClient(main.app, base_url='http://localhost') as client:
+    started = time.perf_counter()
+    rejected = client.get('{FIRST_REQUEST}', headers={{'x-api-key': 'wrong'}}).status_code
+    rejected_loaded = sorted(registry.loaded)
+    first = time.perf_counter()
+    status = client.get('{FIRST_REQUEST}', headers={{'x-api-key': 'bench'}}).status_code
+    requested = time.perf_counter()
+print(json.dumps({{
+    'import': imported - start, 'startup': started - imported,
+    'first_request': requested - first, 'status': status,
+    'loaded_at_import': before, 'modules_at_import': modules,
+    'rejected': rejected, 'loaded_after_rejected': rejected_loaded,
+    'loaded': sorted(registry.loaded)
+}}))
+"""
+
+
+def child_env(mode: str, directory: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        'PYTHONPATH': ROOT,
+        'API_KEY': 'bench',
+        'DSN_SENTRY': '',
+        'PROVIDERS_EAGER': 'true' if mode == 'eager' else 'false',
+        'CACHE_DIR': directory,
+        'JOBS_DB': os.path.join(directory, 'jobs.sqlite3'),
+        'SCHEDULES_FILE': os.path.join(directory, 'schedules.json'),
+    }
+
+
+def run_once(mode: str) -> Dict[str, Any]:
+    """One cold start in a new interpreter."""
+    with tempfile.TemporaryDirectory() as directory:
+        process = subprocess.run(
+            [sys.executable, '-c', CHILD], cwd=directory, env=child_env(mode, directory),
+            capture_output=True, text=True, check=True
+        )
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def import_times(top: int) -> List[Dict[str, Any]]:
+    """Modules with the largest cumulative import time (python -X importtime, lazy mode)."""
+    with tempfile.TemporaryDirectory() as directory:
+        process = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import main'], cwd=directory,
+            env=child_env('lazy', directory), capture_output=True, text=True, check=True
+        )
+    modules = []
+    for line in process.stderr.splitlines():
+        if line.startswith('import time:') and '|' in line and 'cumulative' not in line:
+            _, cumulative, name = line.split('|')
+            modules.append({'module': name.strip(), 'ms': int(cumulative) / 1000})
+    return sorted(modules, key=lambda item: item['ms'], reverse=True)[:top]
+
+
+def measure(mode: str, runs: int = 5) -> Dict[str, Any]:
+    """
+    Function Measure
+    :param mode: lazy or eager
+    :param runs: cold starts to take the median of
+    :return: result record
+    """
+    samples = [run_once(mode) for _ in range(runs)]
+    return {
+        'case': f'startup-{mode}',
+        'runs': runs,
+        'import_ms': round(statistics.median(item['import'] for item in samples) * 1000, 1),
+        'startup_ms': round(statistics.median(item['startup'] for item in samples) * 1000, 1),
+        'first_request_ms': round(
+            statistics.median(item['first_request'] for item in samples) * 1000, 1
+        ),
+        'loaded_at_import': samples[-1]['loaded_at_import'],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    parser = argparse.ArgumentParser(description='API cold start benchmarks')
+    parser.add_argument('--runs', type=int, default=5, help='cold starts per mode')
+    parser.add_argument('--top', type=int, default=10, help='slowest imports to list (0: none)')
+    parser.add_argument('--output', default=HISTORY, help='JSON lines history file')
+    parser.add_argument('--no-save', action='store_true', help='do not append to the history')
+    args = parser.parse_args(argv)
+
+    env = environment()
+    results = []
+    print(f"{'case':<16}{'import ms':>11}{'startup ms':>12}{'1st req ms':>12}  vs previous")
+    for mode in MODES:
+        result = {**measure(mode, args.runs), **env}
+        last = previous(args.output, result)
+        delta = '' if last is None else \
+            f"{(result['import_ms'] / last['import_ms'] - 1) * 100:+.1f}% import ({last['commit']})"
+        print(f"{result['case']:<16}{result['import_ms']:>11,.1f}{result['startup_ms']:>12,.1f}"
+              f"{result['first_request_ms']:>12,.1f}  {delta}")
+        results.append(result)
+
+    if args.top:
+        print("\nslowest imports (lazy, cumulative)")
+        for item in import_times(args.top):
+            print(f"{item['ms']:>9,.1f} ms  {item['module']}")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'a', encoding='utf-8') as file:
+            for result in results:
+                file.write(json.dumps(result) + '\n')
+    return results
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from core.util.fields import parse_fields
+from models.ifood.assortment import AssortmentModel
+from tests.benchmarks.bench import CASES, ifood_rows, ifood_setup, measure
+
+
+@pytest.mark.parametrize('name', list(CASES))
+def test_parser_fixture(name: str):
+    bench = CASES[name]
+    assert bench.run(bench.setup()) > 0
+
+
+def test_measure():
+    result = measure('tendaatacado', seconds=0, min_runs=1)
+    assert result['rows'] > 0
+    assert result['rows_per_sec'] > 0
+    assert result['peak_bytes_per_row'] > 0
+
+
+@pytest.mark.parametrize('fields', [
+    'ean,price_to',
+    'sku,availability',
+    'ean,sku,price_from,price_to',
+    'ean,sku,price_from,price_to,availability',
+    'category,sub_category',
+])
+def test_ifood_projection_matches_full_rows(fields: str):
+    async def dump(rows):
+        return [row.model_dump() async for row in rows]
+
+    setup = ifood_setup()
+    projection = parse_fields(fields, AssortmentModel)
+    full = ifood_rows(setup, consume=dump)
+    projected = ifood_rows(setup, projection, consume=dump)
+    assert projected == [{name: row[name] for name in projection} for row in full]
+
+
+def test_ifood_projection_without_taxonomy_skips_item_detail():
+    setup = ifood_setup()
+    projection = parse_fields('ean,sku,price_from,price_to,availability', AssortmentModel)
+    with mock.patch('asyncio.create_task', wraps=asyncio.create_task) as create_task:
+        assert ifood_rows(setup, projection) > 0
+    assert create_task.call_count == 0
@@ -0,0 +1,19 @@
+from tests.benchmarks.startup import run_once
+
+
+def test_lazy_providers_load_on_first_use():
+    result = run_once('lazy')
+    # The jobs router starts the workers; its crawlers import providers when they run
+    assert result['loaded_at_import'] == ['jobs']
+    assert result['modules_at_import'] == []
+    # A rejected request is answered before anything is loaded
+    assert result['rejected'] == 401
+    assert result['loaded_after_rejected'] == ['jobs']
+    assert 'vtex' in result['loaded']
+    assert result['status'] == 422  # no query parameters, but routed to the loaded provider
+
+
+def test_eager_providers_load_at_import():
+    result = run_once('eager')
+    assert 'vtex' in result['loaded_at_import']
+    assert result['loaded'] == result['loaded_at_import']
@@ -0,0 +1,89 @@
+import json
+import os
+import time
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_KEY = os.getenv('API_KEY')
+BASE_URL = os.getenv('BASE_URL')
+
+HEADERS = {
+    'accept': "application/json",
+    'x-api-key': API_KEY,
+    'cache-control': "no-cache"
+}
+
+PAYLOAD = {
+    "kind": "vtex.assortment",
+    "params": {
+        "domain": "mambo.com.br",
+        "alias": "mambodelivery",
+        "department_id": 731,
+        "category_id": 732,
+        "request_waiting": 3
+    }
+}
+
+
+def request(method: str, url: str, payload: dict = None):
+    with httpx.Client() as client:
+        response = client.request(
+            method,
+            url,
+            headers=HEADERS,
+            json=payload,
+            timeout=None
+        )
+        return response
+
+
+def test_submit_job():
+    url = f"{BASE_URL}/api/v1/jobs"
+
+    response = request("POST", url, PAYLOAD)
+    data = json.loads(response.text)
+    assert response.status_code == 202
+    assert data['status'] == 'queued'
+
+    time.sleep(10)
+    response = request("GET", f"{url}/{data['job_id']}/results")
+    results = json.loads(response.text)
+    assert response.status_code == 200
+    assert results['items'] == len(results['data'])
+
+
+def test_cancel_job():
+    url = f"{BASE_URL}/api/v1/jobs"
+
+    job = json.loads(request("POST", url, PAYLOAD).text)
+    response = request("DELETE", f"{url}/{job['job_id']}")
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert data['status'] == 'cancelled'
+
+
+def test_unknown_kind():
+    url = f"{BASE_URL}/api/v1/jobs"
+
+    response = request("POST", url, {"kind": "unknown"})
+    assert response.status_code == 422
+
+
+def test_retry_running_job():
+    url = f"{BASE_URL}/api/v1/jobs"
+
+    job = json.loads(request("POST", url, PAYLOAD).text)
+    response = request("POST", f"{url}/{job['job_id']}/retry")
+    assert response.status_code == 409
+
+
+def test_schedules():
+    url = f"{BASE_URL}/api/v1/jobs/schedules"
+
+    response = request("GET", url)
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert isinstance(data['data'], list)
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import time
+
+import httpx
+from tenacity import wait_none
+
+from core.jobs import crawlers
+from core.jobs.store import DONE, FAILED, JobStore
+from core.jobs.worker import WorkerPool
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks', 'fixtures')
+FIXTURE = os.path.join(FIXTURES, 'vtex_products_search.json')
+VIPCOMMERCE_FIXTURE = os.path.join(FIXTURES, 'vipcommerce_produtos.json')
+TENDAATACADO_FIXTURE = os.path.join(FIXTURES, 'tendaatacado_products.json')
+
+PARAMS = {
+    'domain': 'mambo.com.br',
+    'alias': 'mambodelivery',
+    'department_id': 731,
+    'category_id': 732,
+    'request_waiting': 0
+}
+
+
+class Upstream:
+    """VTEX search with three windows; the second answers 503 while down."""
+
+    def __init__(self):
+        with open(FIXTURE, encoding='utf-8') as file:
+            self.products = json.load(file)
+        self.down = True
+        self.requested = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        _from = int(request.url.params['_from'])
+        self.requested.append(_from)
+        if _from == 50 and self.down:
+            return httpx.Response(503, text='Service Unavailable')
+        products = self.products if _from < 100 else self.products[:10]
+        return httpx.Response(200, json=products)
+
+
+async def wait_for(store: JobStore, job_id: str, status: str, timeout: float = 10) -> dict:
+    deadline = time.monotonic() + timeout
+    while (job := store.get(job_id))['status'] != status:
+        assert time.monotonic() < deadline, job
+        await asyncio.sleep(0.01)
+    return job
+
+
+def test_upstream_failure_fails_the_job_and_retry_resumes(tmp_path, monkeypatch):
+    monkeypatch.setattr('core.jobs.worker.JOB_SNAPSHOTS', False)
+    upstream = Upstream()
+
+    async def run():
+        store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+        pool = WorkerPool(size=1, store=store, checkpoint_interval=0)
+        await pool.start()
+        await pool._client.aclose()
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        try:
+            job = await pool.submit('vtex.assortment', PARAMS)
+            failed = await wait_for(store, job['job_id'], FAILED)
+            assert '503' in failed['error']
+            assert failed['checkpoint'] == {'_from': 50}
+
+            upstream.down = False
+            await pool.retry(job['job_id'])
+            done = await wait_for(store, job['job_id'], DONE)
+            resumed = store.results(done['job_id'], 0, done['rows'])
+
+            clean = await pool.submit('vtex.assortment', PARAMS)
+            clean = await wait_for(store, clean['job_id'], DONE)
+            return failed, resumed, store.results(clean['job_id'], 0, clean['rows'])
+        finally:
+            await pool.stop()
+            store.close()
+
+    failed, resumed, clean = asyncio.run(run())
+    assert 0 < failed['rows'] < len(resumed)
+    # The retry starts at the failed window and ends with the rows of an uninterrupted run
+    assert upstream.requested[:4] == [0, 50, 50, 100]
+    assert [row['sku'] for row in resumed] == [row['sku'] for row in clean]
+
+
+def test_failed_page_fails_the_vipcommerce_job(tmp_path, monkeypatch):
+    from src.market.vipcommerce.domain.web.assortment import Assortment
+
+    monkeypatch.setattr('core.jobs.worker.JOB_SNAPSHOTS', False)
+    monkeypatch.setattr(Assortment._fetch.retry, 'wait', wait_none())
+    monkeypatch.setenv('AUTH_TOKEN_VIPCOMMERCE', 'test')
+    monkeypatch.delenv('VIPCOMMERCE_AUTH_KEY', raising=False)
+    with open(VIPCOMMERCE_FIXTURE, encoding='utf-8') as file:
+        products = json.load(file)
+    requested = []
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        page = int(request.url.params['page'])
+        requested.append(page)
+        if page == 3:
+            return httpx.Response(500, text='Internal Server Error')
+        return httpx.Response(200, json=products)
+
+    async def run():
+        store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+        pool = WorkerPool(size=1, store=store, checkpoint_interval=0)
+        await pool.start()
+        await pool._client.aclose()
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        try:
+            job = await pool.submit('vipcommerce.assortment', {
+                'domain': 'failing-page.com.br',
+                'branch_id': 1,
+                'distribution_center_id': 1,
+                'category_id': 61,
+                'request_waiting': 0
+            })
+            return await wait_for(store, job['job_id'], FAILED)
+        finally:
+            await pool.stop()
+            store.close()
+
+    failed = asyncio.run(run())
+    # Every attempt at the page was made before the job gave up on it
+    assert requested.count(3) == 3
+    assert '502' in failed['error'] and 'page 3' in failed['error']
+
+
+def test_failed_page_fails_the_tendaatacado_job(tmp_path, monkeypatch):
+    from models.tendaatacado.category import CategoryModel
+
+    monkeypatch.setattr('core.jobs.worker.JOB_SNAPSHOTS', False)
+    monkeypatch.setitem(crawlers.trees, ('tendaatacado',), [
+        CategoryModel(name='Açúcar', category_id=126, department_id=12, search_term='acucar'),
+        CategoryModel(name='Café', category_id=127, department_id=12, search_term='cafe'),
+    ])
+    with open(TENDAATACADO_FIXTURE, encoding='utf-8') as file:
+        products = json.load(file)
+
+    def upstream(request: httpx.Request) -> httpx.Response:
+        if '/category/127/' in request.url.path and request.url.params['page'] == '1':
+            return httpx.Response(503, text='Service Unavailable')
+        return httpx.Response(200, json=products)
+
+    async def run():
+        store = JobStore(str(tmp_path / 'jobs.sqlite3'))
+        pool = WorkerPool(size=1, store=store, checkpoint_interval=0)
+        await pool.start()
+        await pool._client.aclose()
+        pool._client = httpx.AsyncClient(transport=httpx.MockTransport(upstream))
+        try:
+            job = await pool.submit('tendaatacado.crawl', {'request_waiting': 0})
+            return await wait_for(store, job['job_id'], FAILED)
+        finally:
+            await pool.stop()
+            store.close()
+
+    failed = asyncio.run(run())
+    # The category is not dropped in silence: the job fails naming it
+    assert 'Category 127 page 1' in failed['error']
@@ -0,0 +1,467 @@
+""" Load Test
+
+Starts the stub upstream (tests/load/stub.py) and `uvicorn main:app` against
+it through HTTP_UPSTREAM_OVERRIDE, drives an open-loop request mix at a target
+rate and reports latency percentiles, throughput, in-flight requests and the
+CPU and RSS of every API worker. No network is needed. Each run is appended to
+a JSON lines history and compared with the previous run of the same mix, rate
+and worker count on the same machine.
+
+    python -m tests.load.run
+    python -m tests.load.run --rps 40 --duration 60 --workers 2
+    python -m tests.load.run --mix my_mix.json
+
+A mix file is a JSON list of {"name", "path", "params", "weight"}; string
+params may use {n}, the request sequence number, to bypass response caches.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from core.util.persistent_cache import CACHE_DIR
+from tests.benchmarks.bench import environment
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - /proc is read instead (Linux)
+    psutil = None
+
+# A worker that exits (or a /proc entry that vanishes) while it is read
+PROCESS_ERRORS = (OSError, ValueError, IndexError) + ((psutil.Error,) if psutil is not None else ())
+
+HISTORY = os.getenv('LOAD_HISTORY', os.path.join(CACHE_DIR, 'loadtests.jsonl'))
+API_KEY = 'load-test'
+
+# Every provider's assortment endpoint with the smallest request_waiting it accepts
+MIXES: Dict[str, List[Dict[str, Any]]] = {
+    'assortment': [
+        {
+            'name': 'vtex',
+            'path': '/api/v1/vtex/market/assortment',
+            'params': {
+                'domain': 'mambo.com.br', 'alias': 'mambodelivery', 'department_id': 731,
+                'category_id': 732, '_from': 0, '_to': 49, 'request_waiting': 3
+            },
+            'weight': 3
+        },
+        {
+            'name': 'ifood',
+            'path': '/api/v1/ifood/delivery/assortment',
+            'params': {
+                'segment_type': 'MERCADOS', 'region': 'sao-paulo-sp',
+                'store_slug': 'carrefour-hiper---imigrantes-bosque-da-saude',
+                'store_id': 'ee4559e2-6c68-429c-9dad-89796c13315e',
+                'department_id': 'f9845b8a-efe4-48a0-a9aa-c45b50eafafe', 'search_term': 'Grãos',
+                'latitude': '-23.5942581', 'longitude': '-46.6107278', 'page': '1',
+                'request_waiting': 2, 'fields': 'ean,sku,price_from,price_to,availability'
+            },
+            'weight': 3
+        },
+        {
+            'name': 'osuper',
+            'path': '/api/v1/osuper/market/assortment',
+            'params': {
+                'domain': 'viladasfrutas.com.br', 'account_id': 100, 'store_id': 253,
+                'category_id': '{n}', 'search_term': 'Bebidas > Refrigerantes',
+                'records_per_page': 100, 'request_waiting': 3
+            },
+            'weight': 2
+        },
+        {
+            'name': 'vipcommerce',
+            'path': '/api/v1/vipcommerce/market/assortment',
+            'params': {
+                'domain': 'supermercadosmais.com.br', 'branch_id': 1, 'distribution_center_id': 1,
+                'category_id': 61, 'page': '1', 'request_waiting': 3
+            },
+            'weight': 2
+        },
+        {
+            'name': 'tendaatacado',
+            'path': '/api/v1/tendaatacado/wholesale/assortment',
+            'params': {
+                'category_id': 126, 'search_term': 'acucar-e-adocantes', 'page': '1',
+                'request_waiting': 3
+            },
+            'weight': 2
+        },
+        {
+            'name': 'uber_eats',
+            'path': '/api/v1/uber-eats-restaurant/delivery/assortment',
+            'params': {'store_id': 'load-{n}', 'request_waiting': 3, 'stream': True},
+            'weight': 1
+        },
+    ],
+}
+
+
+class Sample(NamedTuple):
+    """ One request: endpoint name, start offset, latency (s), status (0 on error), body size. """
+    name: str
+    started: float
+    latency: float
+    status: int
+    size: int
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def load_mix(mix: str) -> List[Dict[str, Any]]:
+    if mix in MIXES:
+        return MIXES[mix]
+    with open(mix, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def render_params(params: Dict[str, Any], n: int) -> Dict[str, Any]:
+    return {
+        key: value.format(n=n) if isinstance(value, str) else value
+        for key, value in params.items()
+    }
+
+
+# Worker processes
+
+def children(pid: int) -> List[int]:
+    """The uvicorn workers of a supervisor pid, or the pid itself when it serves alone."""
+    if psutil is not None:
+        kids = [child.pid for child in psutil.Process(pid).children()]
+    else:
+        kids = []
+        for entry in os.listdir('/proc'):
+            if entry.isdigit():
+                try:
+                    with open(f'/proc/{entry}/stat', encoding='utf-8') as file:
+                        fields = file.read().rsplit(')', 1)[1].split()
+                except PROCESS_ERRORS:
+                    continue
+                if int(fields[1]) == pid:
+                    kids.append(int(entry))
+    # Drop the multiprocessing resource tracker and similar helpers that hold no sockets
+    workers = [kid for kid in kids if 'resource_tracker' not in command_line(kid)]
+    return workers or [pid]
+
+
+def command_line(pid: int) -> str:
+    try:
+        if psutil is not None:
+            return ' '.join(psutil.Process(pid).cmdline())
+        with open(f'/proc/{pid}/cmdline', 'rb') as file:
+            return file.read().replace(b'\0', b' ').decode()
+    except PROCESS_ERRORS:
+        return ''
+
+
+def usage(pid: int) -> Optional[Dict[str, float]]:
+    """CPU seconds (user + system) and RSS bytes of a process."""
+    try:
+        if psutil is not None:
+            process = psutil.Process(pid)
+            cpu = process.cpu_times()
+            return {'cpu': cpu.user + cpu.system, 'rss': process.memory_info().rss}
+        with open(f'/proc/{pid}/stat', encoding='utf-8') as file:
+            fields = file.read().rsplit(')', 1)[1].split()
+        ticks = os.sysconf('SC_CLK_TCK')
+        return {
+            'cpu': (int(fields[11]) + int(fields[12])) / ticks,
+            'rss': int(fields[21]) * os.sysconf('SC_PAGE_SIZE'),
+        }
+    except PROCESS_ERRORS:
+        return None
+
+
+class Monitor(threading.Thread):
+    """Samples the workers every interval seconds between start() and stop()."""
+
+    def __init__(self, pids: List[int], interval: float = 0.5):
+        super().__init__(daemon=True)
+        self.pids = pids
+        self.interval = interval
+        self.samples: Dict[int, List[Dict[str, float]]] = {pid: [] for pid in pids}
+        self._done = threading.Event()
+
+    def run(self) -> None:
+        while True:
+            now = time.perf_counter()
+            for pid in self.pids:
+                if (sample := usage(pid)) is not None:
+                    self.samples[pid].append({'time': now, **sample})
+            if self._done.wait(self.interval):
+                return
+
+    def stop(self) -> None:
+        self._done.set()
+        self.join()
+
+    def report(self, since: float = 0.0) -> List[Dict[str, Any]]:
+        """CPU % (mean and peak interval) and RSS per worker over the samples taken after since."""
+        workers = []
+        for pid, samples in self.samples.items():
+            samples = [sample for sample in samples if sample['time'] >= since]
+            if len(samples) < 2:
+                continue
+            rates = [
+                (after['cpu'] - before['cpu']) / (after['time'] - before['time'])
+                for before, after in zip(samples, samples[1:])
+            ]
+            first, last = samples[0], samples[-1]
+            cpu = (last['cpu'] - first['cpu']) / (last['time'] - first['time'])
+            workers.append({
+                'pid': pid,
+                'cpu_percent': round(cpu * 100, 1),
+                'cpu_percent_peak': round(max(rates) * 100, 1),
+                'rss_mb': round(last['rss'] / 2 ** 20, 1),
+                'rss_mb_peak': round(max(sample['rss'] for sample in samples) / 2 ** 20, 1),
+            })
+        return workers
+
+
+# Load generation
+
+async def drive(
+    base_url: str,
+    mix: List[Dict[str, Any]],
+    rps: float,
+    duration: float,
+    seed: int
+) -> List[Sample]:
+    """
+    Function Drive
+    Open loop: request i starts at i / rps whatever the latency of the
+    previous ones, so a slow server shows up as latency, not as a lower rate.
+    :param base_url: API base URL
+    :param mix: request mix
+    :param rps: target requests per second
+    :param duration: seconds
+    :param seed: seed for the endpoint choice
+    :return: samples
+    """
+    chooser = random.Random(seed)
+    weights = [entry.get('weight', 1) for entry in mix]
+    samples: List[Sample] = []
+    headers = {'x-api-key': API_KEY, 'accept': 'application/json'}
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=100)
+
+    async with httpx.AsyncClient(
+        base_url=base_url, headers=headers, limits=limits, timeout=120
+    ) as client:
+
+        async def send(n: int, entry: Dict[str, Any], started: float) -> None:
+            start = time.perf_counter()
+            try:
+                response = await client.get(entry['path'], params=render_params(entry['params'], n))
+                status_code, size = response.status_code, len(response.content)
+            except httpx.HTTPError:
+                status_code, size = 0, 0
+            latency = time.perf_counter() - start
+            samples.append(Sample(entry['name'], started, latency, status_code, size))
+
+        begin = time.perf_counter()
+        tasks = []
+        for n in range(int(rps * duration)):
+            delay = begin + n / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            entry = chooser.choices(mix, weights)[0]
+            tasks.append(asyncio.create_task(send(n, entry, time.perf_counter() - begin)))
+        await asyncio.gather(*tasks)
+    return samples
+
+
+def percentile(latencies: List[float], q: int) -> float:
+    if len(latencies) == 1:
+        return latencies[0]
+    return statistics.quantiles(latencies, n=100, method='inclusive')[q - 1]
+
+
+def summarize(samples: List[Sample], elapsed: float) -> Dict[str, Any]:
+    """
+    Latency percentiles (ms), throughput over the send window and mean
+    in-flight requests (Little's law).
+    """
+    if not samples:
+        return {'requests': 0}
+    latencies = [sample.latency for sample in samples]
+    ok = [sample for sample in samples if 200 <= sample.status < 300]
+    throughput = len(samples) / elapsed
+    return {
+        'requests': len(samples),
+        'errors': len(samples) - len(ok),
+        'throughput': round(throughput, 2),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+        'max_ms': round(max(latencies) * 1000, 1),
+        'in_flight': round(throughput * statistics.mean(latencies), 1),
+        'bytes_per_request': round(statistics.mean(sample.size for sample in samples)),
+    }
+
+
+# Processes
+
+def start(args: List[str], env: Dict[str, str], log_path: str) -> subprocess.Popen:
+    log = open(log_path, 'ab')  # pylint: disable=consider-using-with
+    return subprocess.Popen(args, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float = 60.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{url} exited with {process.returncode}')
+        try:
+            if httpx.get(url, timeout=1).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{url} not ready after {timeout}s')
+
+
+def stop(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def previous(history: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Last recorded run of the same mix, rate, workers, Python and machine."""
+    if not os.path.exists(history):
+        return None
+    last = None
+    with open(history, encoding='utf-8') as file:
+        for line in file:
+            record = json.loads(line)
+            keys = ('mix', 'rps', 'workers', 'python', 'machine')
+            if all(record.get(key) == result[key] for key in keys):
+                last = record
+    return last
+
+
+def report(result: Dict[str, Any], last: Optional[Dict[str, Any]]) -> None:
+    print(f"{'endpoint':<14}{'reqs':>6}{'err':>5}{'req/s':>8}{'p50 ms':>10}{'p95 ms':>10}"
+          f"{'p99 ms':>10}{'in-flight':>11}")
+    for name, summary in [*result['endpoints'].items(), ('total', result['total'])]:
+        if not summary.get('requests'):
+            continue
+        print(f"{name:<14}{summary['requests']:>6}{summary['errors']:>5}{summary['throughput']:>8}"
+              f"{summary['p50_ms']:>10,.0f}{summary['p95_ms']:>10,.0f}{summary['p99_ms']:>10,.0f}"
+              f"{summary['in_flight']:>11}")
+    for worker in result['usage']:
+        print(f"worker {worker['pid']}: "
+              f"cpu {worker['cpu_percent']}% (peak {worker['cpu_percent_peak']}%), "
+              f"rss {worker['rss_mb']} MB (peak {worker['rss_mb_peak']} MB)")
+    if last is not None:
+        total, before = result['total'], last['total']
+        print(f"vs {last['commit']}: "
+              f"throughput {total['throughput'] - before['throughput']:+.2f} req/s, "
+              f"p95 {(total['p95_ms'] / before['p95_ms'] - 1) * 100:+.1f}%, "
+              f"p99 {(total['p99_ms'] / before['p99_ms'] - 1) * 100:+.1f}%")
+
+
+def main(argv: Optional[List[str]] = None) -> Dict[str, Any]:
+    parser = argparse.ArgumentParser(description='API load test against a local stub upstream')
+    parser.add_argument('--mix', default='assortment',
+                        help=f"one of {', '.join(MIXES)} or a JSON file")
+    parser.add_argument('--rps', type=float, default=10.0, help='target requests per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=5.0,
+                        help='seconds of load before measuring')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn workers')
+    parser.add_argument('--upstream-latency', type=float, default=0.05, help='stub latency (s)')
+    parser.add_argument('--upstream-jitter', type=float, default=0.05, help='stub jitter (s)')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the request mix')
+    parser.add_argument('--output', default=HISTORY, help='JSON lines history file')
+    parser.add_argument('--no-save', action='store_true', help='do not append to the history')
+    args = parser.parse_args(argv)
+
+    mix = load_mix(args.mix)
+    stub_port, api_port = free_port(), free_port()
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    env = {
+        **os.environ,
+        'STUB_LATENCY': str(args.upstream_latency),
+        'STUB_JITTER': str(args.upstream_jitter),
+        'HTTP_MODE': 'live',
+        'HTTP_UPSTREAM_OVERRIDE': f'http://127.0.0.1:{stub_port}',
+        'API_KEY': API_KEY,
+        'VIPCOMMERCE_AUTH_KEY': 'load-test',
+        'DSN_SENTRY': '',
+        'CACHE_DIR': workdir,
+        'JOBS_DB': os.path.join(workdir, 'jobs.sqlite3'),
+        'SNAPSHOT_DIR': os.path.join(workdir, 'snapshots'),
+    }
+    uvicorn = [sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--log-level', 'warning']
+    stub = start(
+        [*uvicorn, '--port', str(stub_port), 'tests.load.stub:app'],
+        env, os.path.join(workdir, 'stub.log')
+    )
+    api = start(
+        [*uvicorn, '--port', str(api_port), '--workers', str(args.workers), '--no-access-log',
+         'main:app'],
+        env, os.path.join(workdir, 'api.log')
+    )
+    base_url = f'http://localhost:{api_port}'
+    try:
+        wait_ready(f'http://127.0.0.1:{stub_port}/ready', stub)
+        wait_ready(f'{base_url}/docs', api)
+        time.sleep(1)  # let every worker finish its startup events
+        monitor = Monitor(children(api.pid))
+        print(f'{args.mix}: {args.rps} req/s for {args.duration}s (+{args.warmup}s warmup), '
+              f'{args.workers} worker(s), logs in {workdir}')
+
+        monitor.start()
+        begin = time.perf_counter()
+        seconds = args.warmup + args.duration
+        samples = asyncio.run(drive(base_url, mix, args.rps, seconds, args.seed))
+        monitor.stop()
+    finally:
+        stop(api)
+        stop(stub)
+
+    measured = [sample for sample in samples if sample.started >= args.warmup]
+    result = {
+        'mix': args.mix,
+        'rps': args.rps,
+        'duration': args.duration,
+        'workers': args.workers,
+        'upstream_latency': args.upstream_latency,
+        'total': summarize(measured, args.duration),
+        'endpoints': {
+            entry['name']: summarize(
+                [sample for sample in measured if sample.name == entry['name']], args.duration
+            )
+            for entry in mix
+        },
+        'usage': monitor.report(since=begin + args.warmup),
+        **environment(),
+    }
+    report(result, previous(args.output, result))
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(result) + '\n')
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+""" Stub Upstream
+
+Local stand-in for the provider APIs, used by the load test. The API runs
+with HTTP_UPSTREAM_OVERRIDE pointing here; requests keep their original Host
+header, which selects the recorded response (tests/benchmarks/fixtures) to
+serve after STUB_LATENCY + uniform(0, STUB_JITTER) seconds.
+
+    uvicorn tests.load.stub:app --port 8100
+"""
+import asyncio
+import json
+import os
+import random
+import re
+from typing import Callable, List, Optional, Pattern, Tuple
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'benchmarks', 'fixtures')
+STUB_LATENCY = float(os.getenv('STUB_LATENCY', '0.05'))
+STUB_JITTER = float(os.getenv('STUB_JITTER', '0.05'))
+
+
+def fixture(name: str, select: Optional[Callable[[dict], dict]] = None) -> bytes:
+    with open(os.path.join(FIXTURES, name), 'rb') as file:
+        body = file.read()
+    return body if select is None else json.dumps(select(json.loads(body))).encode()
+
+
+# (host, path, body); the first match wins
+ROUTES: List[Tuple[Pattern, Pattern, bytes]] = [
+    (
+        re.compile(r'.+\.vtexcommercestable\.com\.br$'),
+        re.compile(r'^/api/catalog_system/pub/products/search/'),
+        fixture('vtex_products_search.json')
+    ),
+    (
+        re.compile(r'^marketplace\.ifood\.com\.br$'),
+        re.compile(r'^/v1/merchants/[^/]+/catalog-category/'),
+        fixture('ifood_catalog_category.json')
+    ),
+    (
+        re.compile(r'^marketplace\.ifood\.com\.br$'),
+        re.compile(r'^/ifood-ws-v3/restaurant/[^/]+/menuitem/'),
+        fixture('ifood_menuitem.json')
+    ),
+    (
+        re.compile(r'^search\.osuper\.com\.br$'),
+        re.compile(r'^/ecommerce_products_production/_search$'),
+        # The search endpoint answers with the connection itself, here as the last page
+        fixture('osuper_search.json', lambda data: {
+            **data['data']['search'], 'pageInfo': {'hasNextPage': False, 'endCursor': None}
+        })
+    ),
+    (
+        re.compile(r'^api\..+$'),
+        re.compile(r'^/v1/auth/loja/login$'),
+        json.dumps({'success': True, 'data': 'load.test'}).encode()
+    ),
+    (
+        re.compile(r'^api\..+$'),
+        re.compile(r'^/v1/loja/classificacoes_mercadologicas/secoes/\d+/produtos/'),
+        fixture('vipcommerce_produtos.json')
+    ),
+    (
+        re.compile(r'^api\.tendaatacado\.com\.br$'),
+        re.compile(r'^/api/public/store/category/\d+/products$'),
+        fixture('tendaatacado_products.json')
+    ),
+    (
+        re.compile(r'^www\.ubereats\.com$'),
+        re.compile(r'^/_p/api/getStoreV1$'),
+        fixture('uber_eats_get_store_v1.json')
+    ),
+]
+
+
+def resolve(host: str, path: str) -> Optional[bytes]:
+    host = host.split(':')[0]
+    for host_pattern, path_pattern, body in ROUTES:
+        if host_pattern.match(host) and path_pattern.match(path):
+            return body
+    return None
+
+
+async def upstream(request: Request) -> Response:
+    await request.body()
+    delay = STUB_LATENCY + random.uniform(0, STUB_JITTER)
+    if delay > 0:
+        await asyncio.sleep(delay)
+    body = resolve(request.headers.get('host', ''), request.url.path)
+    if body is None:
+        return Response(
+            json.dumps({'detail': f"No stub for {request.headers.get('host')}{request.url.path}"}),
+            status_code=404,
+            media_type='application/json'
+        )
+    return Response(body, media_type='application/json')
+
+
+app = Starlette(routes=[
+    Route('/{path:path}', upstream, methods=['GET', 'POST', 'PUT', 'DELETE', 'PATCH'])
+])
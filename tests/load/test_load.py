@@ -0,0 +1,50 @@
+import pytest
+from starlette.testclient import TestClient
+
+from tests.load import stub
+from tests.load.run import MIXES, Sample, render_params, summarize
+
+UPSTREAM_URLS = [
+    'https://mambodelivery.vtexcommercestable.com.br/api/catalog_system/pub/products/search/'
+    '?fq=C:/731/732',
+    'https://marketplace.ifood.com.br/v1/merchants/ee4559e2/catalog-category/f9845b8a',
+    'https://marketplace.ifood.com.br/ifood-ws-v3/restaurant/ee4559e2/menuitem/c1',
+    'https://search.osuper.com.br/ecommerce_products_production/_search',
+    'https://api.supermercadosmais.com.br/v1/loja/classificacoes_mercadologicas/secoes/61/produtos/'
+    'filial/1/centro_distribuicao/1/ativos?page=1',
+    'https://api.tendaatacado.com.br/api/public/store/category/126/products',
+    'https://www.ubereats.com/_p/api/getStoreV1',
+]
+
+
+@pytest.fixture(autouse=True)
+def no_latency(monkeypatch):
+    monkeypatch.setattr(stub, 'STUB_LATENCY', 0)
+    monkeypatch.setattr(stub, 'STUB_JITTER', 0)
+
+
+@pytest.mark.parametrize('url', UPSTREAM_URLS)
+def test_stub_route(url: str):
+    with TestClient(stub.app) as client:
+        response = client.post(url) if 'getStoreV1' in url or '_search' in url else client.get(url)
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_stub_unknown_route():
+    with TestClient(stub.app) as client:
+        assert client.get('https://example.com/').status_code == 404
+
+
+def test_render_params():
+    params = MIXES['assortment'][-1]['params']
+    assert render_params(params, 7)['store_id'] == 'load-7'
+
+
+def test_summarize():
+    samples = [Sample('vtex', n / 10, 0.1 + n / 1000, 200 if n else 500, 100) for n in range(100)]
+    summary = summarize(samples, elapsed=10)
+    assert summary['requests'] == 100
+    assert summary['errors'] == 1
+    assert summary['throughput'] == 10
+    assert summary['p50_ms'] < summary['p95_ms'] < summary['p99_ms'] <= summary['max_ms']
@@ -98,6 +98,82 @@ def test_assortment():
     assert len(data) > 0
 
 
+def test_assortment_ndjson():
+    url = f"{BASE_URL}/api/v1/vtex/market/assortment"
+
+    PAYLOAD.update(
+        {
+            "domain": "mambo.com.br",
+            "alias": "mambodelivery",
+            "department_id": 731,
+            "category_id": 732,
+            "_from": 0,
+            "_to": 20
+        }
+    )
+
+    with httpx.Client() as client:
+        response = client.get(
+            url,
+            headers={**HEADERS, 'accept': "application/x-ndjson"},
+            params=PAYLOAD,
+            timeout=None
+        )
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith("application/x-ndjson")
+    assert 'pagination' in lines[-1]
+    assert all('sku' in line for line in lines[:-1])
+
+
+def test_assortment_columnar():
+    url = f"{BASE_URL}/api/v1/vtex/market/assortment"
+
+    PAYLOAD.update(
+        {
+            "domain": "mambo.com.br",
+            "alias": "mambodelivery",
+            "department_id": 731,
+            "category_id": 732,
+            "_from": 0,
+            "_to": 20,
+            "format": "columnar"
+        }
+    )
+
+    response = request(url, PAYLOAD)
+    PAYLOAD.pop("format")
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert data['constants']['department_id'] == 731
+    assert all(len(values) == data['rows'] for values in data['columns'].values())
+
+
+def test_assortment_fields():
+    url = f"{BASE_URL}/api/v1/vtex/market/assortment"
+
+    PAYLOAD.update(
+        {
+            "domain": "mambo.com.br",
+            "alias": "mambodelivery",
+            "department_id": 731,
+            "category_id": 732,
+            "_from": 0,
+            "_to": 20,
+            "fields": "ean,sku,price_from,price_to,available"
+        }
+    )
+
+    response = request(url, PAYLOAD)
+    PAYLOAD.pop("fields")
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert all(
+        set(row) == {'ean', 'sku', 'price_from', 'price_to', 'available'}
+        for row in data['data']
+    )
+
+
 def test_search_term():
     url = f"{BASE_URL}/api/v1/vtex/market/search-term"
 
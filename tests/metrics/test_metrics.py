@@ -0,0 +1,32 @@
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_KEY = os.getenv('API_KEY')
+BASE_URL = os.getenv('BASE_URL')
+
+HEADERS = {
+    'x-api-key': API_KEY,
+    'cache-control': "no-cache"
+}
+
+
+def test_metrics():
+    with httpx.Client() as client:
+        response = client.get(f"{BASE_URL}/metrics", headers=HEADERS, timeout=None)
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert '# TYPE scraper_request_seconds histogram' in response.text
+    assert '# TYPE scraper_upstream_request_seconds histogram' in response.text
+
+
+def test_server_timing():
+    with httpx.Client() as client:
+        response = client.get(f"{BASE_URL}/metrics", headers=HEADERS, timeout=None)
+    phases = [metric.split(';')[0] for metric in response.headers['server-timing'].split(', ')]
+    assert phases[0] == 'auth'
+    assert phases[-1] == 'total'
+    assert response.headers['x-process-time'].endswith(' sec')
@@ -0,0 +1,66 @@
+import json
+import os
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+
+API_KEY = os.getenv('API_KEY')
+BASE_URL = os.getenv('BASE_URL')
+
+HEADERS = {
+    'accept': "application/json",
+    'x-api-key': API_KEY,
+    'cache-control': "no-cache"
+}
+
+
+def request(url: str, payload: dict = None):
+    with httpx.Client() as client:
+        response = client.get(
+            url,
+            headers=HEADERS,
+            params=payload,
+            timeout=None
+        )
+        return response
+
+
+def test_snapshot_list():
+    url = f"{BASE_URL}/api/v1/snapshots"
+
+    response = request(url, {"provider": "vtex"})
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert all(item['provider'] == 'vtex' for item in data['data'])
+
+
+def test_snapshot_unknown_provider():
+    url = f"{BASE_URL}/api/v1/snapshots"
+
+    response = request(url, {"provider": "unknown"})
+    assert response.status_code == 422
+
+
+def test_snapshot_not_found():
+    url = f"{BASE_URL}/api/v1/snapshots/vtex/0"
+
+    response = request(url)
+    assert response.status_code == 404
+
+
+def test_delta():
+    url = f"{BASE_URL}/api/v1/snapshots/delta"
+
+    response = request(url, {"provider": "vtex", "store": "mambodelivery", "since": 0})
+    data = json.loads(response.text)
+    assert response.status_code == 200
+    assert data['items'] >= len(data['data'])
+
+
+def test_delta_requires_since_or_snapshot():
+    url = f"{BASE_URL}/api/v1/snapshots/delta"
+
+    response = request(url, {"provider": "vtex", "store": "mambodelivery"})
+    assert response.status_code == 422